@@ -1,8 +1,10 @@
 import streamlit as st
-from utils.data_loader import load_and_process_data
+from utils.data_loader import load_profit_data, load_inventory_data, load_route_data
+from utils.instrumentation import flush_metrics
 import modules.profit_optimizer as profit_optimizer
 import modules.inventory_bot as inventory_bot
 import modules.route_optimizer as route_optimizer
+from modules.warmup import wait_for_page
 
 # --- APP CONFIG ---
 st.set_page_config(page_title="Shiplytics | Logistics AI", page_icon="📊", layout="wide", initial_sidebar_state="expanded")
@@ -194,12 +196,11 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# --- DATA LOADING (Centralized) ---
-df_profit, df_inventory, df_orders, df_routes, df_vehicles = load_and_process_data()
-
-if df_profit is None:
-    st.error("Critical Error: CSV files not found. Please check your folder.")
-    st.stop()
+def require_data(*frames):
+    if any(df is None for df in frames):
+        st.error("Critical Error: CSV files not found. Please check your folder.")
+        st.stop()
+    return frames
 
 # --- SIDEBAR NAVIGATION ---
 st.sidebar.markdown("""
@@ -212,16 +213,27 @@ st.sidebar.markdown("""
 st.sidebar.markdown("<p style='color: white; font-weight: 600; font-size: 1.1rem; margin-bottom: 1rem;'>Navigation</p>", unsafe_allow_html=True)
 page = st.sidebar.radio("Select Module", ["Vendor Profit Analysis", "Inventory Management", "Route Optimizer"], label_visibility="collapsed")
 
+# --- CACHE WARM-UP ---
+# The first run starts filling every page's caches in the background; wait here if this page's share is in flight
+wait_for_page(page)
+
 # --- PAGE ROUTING ---
+# Data is loaded per page, so only the selected page's tables are built
 if page == "Vendor Profit Analysis":
-    profit_optimizer.render_page(df_profit)
+    df_profit, profit_cube, profit_rollups = require_data(*load_profit_data())
+    profit_optimizer.render_page(df_profit, profit_cube, profit_rollups)
     
 elif page == "Inventory Management":
+    df_inventory, df_orders = require_data(*load_inventory_data())
     inventory_bot.render_page(df_inventory, df_orders)
     
 elif page == "Route Optimizer":
+    df_routes, df_vehicles = require_data(*load_route_data())
     route_optimizer.render_page(df_routes, df_vehicles)
 
+# Write the timing histograms when metrics are on (throttled)
+flush_metrics()
+
 # --- VERSION INFO AT BOTTOM OF SIDEBAR ---
 st.sidebar.markdown("---")
 st.sidebar.markdown("""
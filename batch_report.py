@@ -0,0 +1,147 @@
+"""Headless batch report: runs the analytics of every page for the whole dataset.
+
+    python batch_report.py --out reports --format parquet
+
+Writes one file per section (see SECTIONS) without importing Streamlit or
+Plotly, so it can run from cron or another pipeline.
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from utils.datasets import load_tables, format_ids
+from modules.profit_analysis import route_kpis, switch_recommendations, carrier_table
+from modules.switch_simulation import simulate_switching, savings_table, portfolio_savings
+from modules.inventory_analysis import stock_analysis, plan_transfers
+from modules.demand_forecast import LEAD_TIME_DAYS, SERVICE_LEVELS, fit_demand, reorder_points
+from modules.route_analysis import parse_route_data, iter_city_pair_report
+from modules.route_graph import RouteGraph
+from modules.fleet_assignment import pending_orders, assign_fleet
+
+SECTIONS = ['profit_routes', 'profit_carriers', 'profit_portfolio', 'inventory_status', 'inventory_transfers',
+            'inventory_reorder', 'route_pairs', 'fleet_dispatch']
+
+# Tables each section reads (see utils.datasets.load_tables)
+SECTION_TABLES = {
+    'profit_routes': ['df_profit'],
+    'profit_carriers': ['df_profit'],
+    'profit_portfolio': ['df_profit'],
+    'inventory_status': ['inventory', 'orders'],
+    'inventory_transfers': ['inventory', 'orders'],
+    'inventory_reorder': ['inventory', 'orders'],
+    'route_pairs': ['routes', 'vehicles'],
+    'fleet_dispatch': ['orders', 'perf', 'routes', 'vehicles'],
+}
+
+
+class ResultWriter:
+    """Appends frames to one CSV or Parquet file, so sections can be written chunk by chunk"""
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.rows = 0
+        self._parquet = None
+
+    def write(self, df):
+        # Categories differ between chunks; plain values keep every chunk on one schema
+        df = df.astype({col: str for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def section_frames(section, tables, args):
+    """Yield the result frames of one section"""
+    if section == 'profit_routes':
+        kpis = route_kpis(tables['route_carrier_stats'])
+        report = kpis.merge(switch_recommendations(tables['route_carrier_stats'], args.switch_pct), on='Route')
+        simulation = simulate_switching(tables['df_profit'], args.bootstrap)
+        intervals = savings_table(simulation, [args.switch_pct])[['Route', 'Savings_Low', 'Savings_High']]
+        # Single-carrier routes have nothing to switch, like their Projected_Savings
+        yield report.merge(intervals, on='Route', how='left').fillna({'Savings_Low': 0, 'Savings_High': 0})
+    elif section == 'profit_carriers':
+        yield carrier_table(tables['route_carrier_stats'])
+    elif section == 'profit_portfolio':
+        yield portfolio_savings(simulate_switching(tables['df_profit'], args.bootstrap), range(0, 101, 10))
+    elif section == 'inventory_status':
+        yield stock_analysis(tables['inventory'], tables['orders']).drop(columns='Origin')
+    elif section == 'inventory_transfers':
+        yield plan_transfers(stock_analysis(tables['inventory'], tables['orders']))
+    elif section == 'inventory_reorder':
+        yield reorder_points(stock_analysis(tables['inventory'], tables['orders']), fit_demand(tables['orders']),
+                             args.lead_time, SERVICE_LEVELS[args.service_level])
+    elif section == 'route_pairs':
+        route_df = parse_route_data(tables['routes'])
+        for chunk in iter_city_pair_report(route_df, tables['vehicles'], args.top_vehicles, args.chunk_size):
+            for col in [c for c in chunk.columns if c.startswith('Vehicle_') and c[8:].isdigit()]:
+                chunk[col] = format_ids(chunk[col].astype('Int64').astype('string'), 'Vehicle_ID')
+            yield chunk
+    elif section == 'fleet_dispatch':
+        graph = RouteGraph(parse_route_data(tables['routes']))
+        pending = pending_orders(tables['orders'], tables['perf'], tables['routes'], graph)
+        assignments, unassigned = assign_fleet(pending, tables['vehicles'], graph, max_waves=args.max_waves)
+        plan = pd.concat([assignments, unassigned], ignore_index=True)
+        if 'Wave' in plan.columns:
+            plan['Wave'] = plan['Wave'].astype('Int64')
+        for col in ['Order_ID', 'Vehicle_ID']:
+            if col in plan.columns:
+                plan[col] = format_ids(plan[col].astype('Int64').astype('string'), col)
+        yield plan
+
+
+def run(args):
+    os.makedirs(args.out, exist_ok=True)
+    sections = args.sections or SECTIONS
+    needed = sorted({name for section in sections for name in SECTION_TABLES[section]})
+    tables = load_tables(needed)
+
+    for section in sections:
+        start = time.perf_counter()
+        writer = ResultWriter(os.path.join(args.out, f"{section}.{args.format}"), args.format)
+        try:
+            for frame in section_frames(section, tables, args):
+                writer.write(frame)
+        finally:
+            writer.close()
+        print(f"{section}: {writer.rows} rows -> {writer.path} ({time.perf_counter() - start:.2f}s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Shiplytics analytics headlessly and write the results to disk.")
+    parser.add_argument('--out', default='reports', help="output directory (default: reports)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--sections', nargs='+', choices=SECTIONS, help="sections to run (default: all)")
+    parser.add_argument('--switch-pct', type=float, default=50,
+                        help="share of the worst carrier's orders moved in the switching savings (default: 50)")
+    parser.add_argument('--bootstrap', type=int, default=1000,
+                        help="resamples behind the switching savings intervals (default: 1000)")
+    parser.add_argument('--lead-time', type=int, default=LEAD_TIME_DAYS,
+                        help=f"inventory_reorder replenishment lead time in days (default: {LEAD_TIME_DAYS})")
+    parser.add_argument('--service-level', choices=list(SERVICE_LEVELS), default='95%',
+                        help="inventory_reorder cycle service level (default: 95%%)")
+    parser.add_argument('--top-vehicles', type=int, default=3, help="vehicle picks per city pair (default: 3)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="city pairs per written chunk")
+    parser.add_argument('--max-waves', type=int, help="fleet_dispatch rounds of one order per vehicle (default: until all are planned)")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    try:
+        run(parse_args())
+    except FileNotFoundError as exc:
+        sys.exit(f"Critical Error: {exc}")
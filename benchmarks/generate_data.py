@@ -0,0 +1,209 @@
+"""Synthetic, schema-faithful datasets at any scale.
+
+    python -m benchmarks.generate_data --orders 1000000 --out bench_data
+
+Writes ``<out>/datasets/*.csv`` with the same columns, value formats and ID
+styles as the bundled files, so the app, batch_report.py and the benchmarks
+can be pointed at it (they read ``datasets/`` relative to the working
+directory). Orders are generated and written in chunks, so memory stays flat
+at any order count.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.datasets import COST_COLS, DATASET_FILES
+from utils.geo import ROAD_DETOUR_FACTOR, haversine_km
+
+# The bundled cities first, then synthetic ones once --cities asks for more
+BASE_CITIES = {
+    'Mumbai': (19.0760, 72.8777), 'Delhi': (28.7041, 77.1025), 'Bangalore': (12.9716, 77.5946),
+    'Chennai': (13.0827, 80.2707), 'Kolkata': (22.5726, 88.3639), 'Hyderabad': (17.3850, 78.4867),
+    'Ahmedabad': (23.0225, 72.5714), 'Pune': (18.5204, 73.8567), 'Dubai': (25.2048, 55.2708),
+    'Singapore': (1.3521, 103.8198), 'Bangkok': (13.7563, 100.5018), 'Hong Kong': (22.3193, 114.1694),
+}
+BASE_CARRIERS = ['SpeedyLogistics', 'QuickShip', 'GlobalTransit', 'EcoDeliver', 'ReliableExpress']
+BASE_CATEGORIES = ['Electronics', 'Fashion', 'Food & Beverage', 'Healthcare', 'Industrial', 'Books', 'Home Goods']
+
+SEGMENTS = ['Enterprise', 'SMB', 'Individual']
+PRIORITIES = ['Express', 'Standard', 'Economy']
+SPECIAL_HANDLING = ['None', 'Fragile', 'Temperature_Controlled', 'Hazmat']
+DELIVERY_STATUS = ['On-Time', 'Slightly-Delayed', 'Severely-Delayed']
+QUALITY_ISSUES = ['Perfect', 'Minor_Damage', 'Wrong_Item', 'Major_Damage', 'Incomplete']
+WEATHER = ['None', 'Light_Rain', 'Heavy_Rain', 'Fog']
+VEHICLE_STATUS = ['Available', 'In_Transit', 'Maintenance']
+
+# Vehicle type -> (capacity kg, fuel efficiency km/L, CO2 kg/km), matching the bundled fleet
+VEHICLE_TYPES = {
+    'Express_Bike': (31, 28.0, 0.097),
+    'Small_Van': (743, 9.6, 0.284),
+    'Medium_Truck': (2997, 7.5, 0.368),
+    'Refrigerated': (2302, 6.6, 0.422),
+    'Large_Truck': (7107, 5.5, 0.503),
+}
+
+START_DATE = pd.Timestamp('2025-07-01')
+
+
+def _names(base, prefix, count):
+    names = list(base[:count])
+    names += [f"{prefix}_{i:04d}" for i in range(len(names) + 1, count + 1)]
+    return names
+
+
+def _city_table(count, rng):
+    names = _names(list(BASE_CITIES), 'City', count)
+    coords = np.array([BASE_CITIES.get(name, (np.nan, np.nan)) for name in names])
+    synthetic = np.isnan(coords[:, 0])
+    coords[synthetic, 0] = rng.uniform(8, 32, synthetic.sum())
+    coords[synthetic, 1] = rng.uniform(68, 92, synthetic.sum())
+    return names, coords
+
+
+def _road_km(coords):
+    lat, lon = coords[:, 0], coords[:, 1]
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :]) * ROAD_DETOUR_FACTOR
+
+
+def _ids(prefix, start, count, width):
+    return np.char.add(prefix, np.char.zfill(np.arange(start, start + count).astype(str), width))
+
+
+def _dates(days):
+    return pd.date_range(START_DATE, periods=days, freq='D').strftime('%Y-%m-%d').to_numpy()
+
+
+def _write(df, path, first):
+    df.to_csv(path, mode='w' if first else 'a', header=first, index=False, float_format='%.2f')
+
+
+def generate(out, orders=200, cities=12, warehouses=5, carriers=5, categories=7, vehicles=50,
+             coverage=0.75, days=90, chunk_size=1_000_000, seed=42):
+    """Write a full synthetic dataset under ``<out>/datasets``"""
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(out, 'datasets')
+    os.makedirs(data_dir, exist_ok=True)
+    paths = {name: os.path.join(data_dir, fname) for name, fname in DATASET_FILES.items()}
+
+    city_names, coords = _city_table(cities, rng)
+    road_km = _road_km(coords)
+    carrier_names = _names(BASE_CARRIERS, 'Carrier', carriers)
+    category_names = _names(BASE_CATEGORIES, 'Category', categories)
+    warehouses = min(warehouses, cities)
+    dates = _dates(days)
+
+    # --- ORDERS AND THE ORDER-LEVEL TABLES ---
+    for first_id in range(1, orders + 1, chunk_size):
+        n = min(chunk_size, orders + 1 - first_id)
+        first = first_id == 1
+        order_ids = _ids('ORD', first_id, n, 6)
+
+        origin = rng.integers(0, warehouses, n)
+        dest = (origin + rng.integers(1, cities, n)) % cities
+        value = np.round(rng.lognormal(7.5, 1.2, n), 2)
+        orders_df = pd.DataFrame({
+            'Order_ID': order_ids,
+            'Order_Date': np.take(dates, rng.integers(0, days, n)),
+            'Customer_Segment': np.take(SEGMENTS, rng.integers(0, len(SEGMENTS), n)),
+            'Priority': np.take(PRIORITIES, rng.integers(0, len(PRIORITIES), n)),
+            'Product_Category': np.take(category_names, rng.integers(0, categories, n)),
+            'Order_Value_INR': value,
+            'Origin': np.take(city_names, origin),
+            'Destination': np.take(city_names, dest),
+            'Special_Handling': np.take(SPECIAL_HANDLING, rng.choice(4, n, p=[0.76, 0.12, 0.06, 0.06])),
+        })
+        _write(orders_df, paths['orders'], first)
+
+        # Only a share of orders have been costed, shipped and routed yet
+        covered = rng.random(n) < coverage
+        ids = order_ids[covered]
+        m = len(ids)
+        distance = np.round(road_km[origin[covered], dest[covered]] * rng.uniform(0.8, 1.2, m) + 100, 2)
+
+        _write(pd.DataFrame({
+            'Order_ID': ids,
+            **{col: np.round(rng.uniform(lo, hi, m), 2) for col, (lo, hi) in zip(
+                COST_COLS, [(50, 450), (45, 360), (20, 170), (8, 105), (8, 115), (13, 115), (8, 90)])},
+        }), paths['costs'], first)
+
+        promised = rng.integers(1, 11, m)
+        actual = np.clip(promised + rng.integers(-1, 6, m), 1, None)
+        _write(pd.DataFrame({
+            'Order_ID': ids,
+            'Carrier': np.take(carrier_names, rng.integers(0, carriers, m)),
+            'Promised_Delivery_Days': promised,
+            'Actual_Delivery_Days': actual,
+            'Delivery_Status': np.take(DELIVERY_STATUS, np.clip(actual - promised, 0, 2)),
+            'Quality_Issue': np.take(QUALITY_ISSUES, rng.choice(5, m, p=[0.6, 0.15, 0.1, 0.08, 0.07])),
+            'Customer_Rating': rng.integers(1, 6, m),
+            'Delivery_Cost_INR': np.round(rng.uniform(150, 1200, m), 2),
+        }), paths['perf'], first)
+
+        _write(pd.DataFrame({
+            'Order_ID': ids,
+            'Route': np.char.add(np.char.add(np.take(city_names, origin[covered]).astype(str), '-'),
+                                 np.take(city_names, dest[covered]).astype(str)),
+            'Distance_KM': distance,
+            'Fuel_Consumption_L': np.round(distance / rng.uniform(6, 10, m), 2),
+            'Toll_Charges_INR': np.round(distance * rng.uniform(0, 0.8, m), 2),
+            'Traffic_Delay_Minutes': rng.integers(0, 120, m),
+            'Weather_Impact': np.take(WEATHER, rng.choice(4, m, p=[0.7, 0.16, 0.1, 0.04])),
+        }), paths['routes'], first)
+
+    # --- WAREHOUSE INVENTORY ---
+    loc = np.repeat(np.arange(warehouses), categories)
+    cat = np.tile(np.arange(categories), warehouses)
+    n = len(loc)
+    pd.DataFrame({
+        'Warehouse_ID': [f"WH{i + 1:03d}_{city_names[i]}" for i in loc],
+        'Location': np.take(city_names, loc),
+        'Product_Category': np.take(category_names, cat),
+        'Current_Stock_Units': rng.integers(100, 5000, n),
+        'Reorder_Level': rng.integers(290, 1000, n),
+        'Storage_Cost_per_Unit': np.round(rng.uniform(7.5, 44, n), 2),
+        'Last_Restocked_Date': np.take(dates, rng.integers(0, days, n)),
+    }).to_csv(paths['inventory'], index=False)
+
+    # --- VEHICLE FLEET ---
+    types = list(VEHICLE_TYPES)
+    vtype = rng.integers(0, len(types), vehicles)
+    base = np.array([VEHICLE_TYPES[t] for t in types])[vtype]
+    jitter = rng.uniform(0.8, 1.2, (vehicles, 3))
+    pd.DataFrame({
+        'Vehicle_ID': _ids('VEH', 1, vehicles, 4),
+        'Vehicle_Type': np.take(types, vtype),
+        'Capacity_KG': np.round(base[:, 0] * jitter[:, 0], 2),
+        'Fuel_Efficiency_KM_per_L': np.round(base[:, 1] * jitter[:, 1], 2),
+        'Current_Location': np.take(city_names, rng.integers(0, min(cities, 8), vehicles)),
+        'Status': np.take(VEHICLE_STATUS, rng.choice(3, vehicles, p=[0.56, 0.38, 0.06])),
+        'Age_Years': rng.uniform(0.5, 8, vehicles),
+        'CO2_Emissions_Kg_per_KM': np.round(base[:, 2] * jitter[:, 2], 3),
+    }).to_csv(paths['vehicles'], index=False)
+
+    return data_dir
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Shiplytics datasets.")
+    parser.add_argument('--out', required=True, help="output root; CSVs go to <out>/datasets")
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--cities', type=int, default=12, help="distinct cities (first 12 are the real ones)")
+    parser.add_argument('--warehouses', type=int, default=5, help="cities that hold stock and ship orders")
+    parser.add_argument('--carriers', type=int, default=5)
+    parser.add_argument('--categories', type=int, default=7)
+    parser.add_argument('--vehicles', type=int, default=50)
+    parser.add_argument('--coverage', type=float, default=0.75,
+                        help="share of orders with cost, performance and route rows")
+    parser.add_argument('--days', type=int, default=90, help="span of Order_Date")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    options = vars(args)
+    out = options.pop('out')
+    print(generate(out, **options))
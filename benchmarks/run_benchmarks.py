@@ -0,0 +1,222 @@
+"""Scaling benchmarks for the loading and analytics stages.
+
+    python -m benchmarks.run_benchmarks --scales 10000 100000 1000000
+    python -m benchmarks.run_benchmarks --scales 100000 --compare benchmarks/results/previous.json
+
+For every scale a synthetic dataset is generated once (see generate_data) and
+reused on later runs. Each stage is timed over ``--repeat`` runs and then run
+once more under tracemalloc for its peak allocation (Python and NumPy heaps;
+buffers Arrow allocates for Parquet I/O are not traced). The JSON report holds
+one record per (scale, stage) so runs can be compared with ``--compare``.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_data import generate
+from utils.aggregates import profit_cube, time_rollup
+from utils.datasets import DATASET_FILES, PROFIT_SOURCES, build_profit_frame, load_tables, read_typed_csv
+from modules.inventory_analysis import stock_analysis
+from modules.route_analysis import iter_city_pair_report, parse_route_data
+from modules.route_graph import RouteGraph
+from modules.switch_simulation import simulate_switching
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+# generate() arguments besides the order count, with their defaults; each
+# setting gets its own dataset directory
+GENERATOR_ARGS = {'cities': 12, 'warehouses': 5, 'carriers': 5, 'categories': 7, 'vehicles': 50, 'seed': 42}
+
+
+# --- STAGES ---
+# Each stage is (setup, run): setup prepares inputs outside the timed region and
+# returns the arguments passed to run.
+
+def _tables(state, names):
+    missing = [name for name in names if name not in state]
+    if missing:
+        state.update({name: read_typed_csv(name) for name in missing})
+    return [state[name] for name in names]
+
+
+def _fresh_cache(state):
+    cache_dir = tempfile.mkdtemp(prefix='shiplytics-bench-')
+    state.setdefault('tmp_dirs', []).append(cache_dir)
+    return cache_dir
+
+
+def _warm_cache(state):
+    if 'warm_cache' not in state:
+        state['warm_cache'] = _fresh_cache(state)
+        load_tables(cache_dir=state['warm_cache'])
+    return state['warm_cache']
+
+
+STAGES = {
+    'csv_parse': (lambda state: (), lambda: [read_typed_csv(name) for name in DATASET_FILES]),
+    # A new empty cache directory for every run, so each one parses the CSVs
+    'load_cold': (lambda state: (state,), lambda state: load_tables(cache_dir=_fresh_cache(state))),
+    'load_warm': (lambda state: (_warm_cache(state),), lambda cache_dir: load_tables(cache_dir=cache_dir)),
+    'build_profit_frame': (lambda state: _tables(state, PROFIT_SOURCES), build_profit_frame),
+    'profit_cube': (lambda state: (build_profit_frame(*_tables(state, PROFIT_SOURCES))[0],), profit_cube),
+    'time_rollup': (lambda state: (build_profit_frame(*_tables(state, PROFIT_SOURCES))[0], 'daily'), time_rollup),
+    'switch_simulation': (lambda state: (build_profit_frame(*_tables(state, PROFIT_SOURCES))[0],),
+                          simulate_switching),
+    'parse_route_data': (lambda state: _tables(state, ['routes']), parse_route_data),
+    'route_graph': (lambda state: (parse_route_data(*_tables(state, ['routes'])),), RouteGraph),
+    'vehicle_scoring': (lambda state: (parse_route_data(*_tables(state, ['routes'])), *_tables(state, ['vehicles'])),
+                        lambda route_df, vehicles: list(iter_city_pair_report(route_df, vehicles))),
+    'stock_analysis': (lambda state: _tables(state, ['inventory', 'orders']), stock_analysis),
+}
+
+
+def measure(run, args, repeat):
+    """Wall times of ``repeat`` runs, then one traced run for the peak allocation"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(*args)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak
+
+
+def dataset_dir(work_dir, scale, args):
+    """Generated dataset root for one scale and generator setting, created on first use"""
+    params = ''.join(f"-{name}-{getattr(args, name)}" for name in GENERATOR_ARGS)
+    root = os.path.join(work_dir, f"orders-{scale}{params}")
+    if not os.path.exists(os.path.join(root, 'datasets', DATASET_FILES['vehicles'])):
+        print(f"generating {scale:,} orders in {root}")
+        generate(root, orders=scale, **{name: getattr(args, name) for name in GENERATOR_ARGS})
+    return root
+
+
+def run_scale(root, scale, stages, repeat):
+    cwd = os.getcwd()
+    os.chdir(root)
+    state = {}
+    results = []
+    try:
+        for stage in stages:
+            setup, run = STAGES[stage]
+            args = setup(state)
+            times, peak = measure(run, args, repeat)
+            record = {
+                'scale': scale,
+                'stage': stage,
+                'min_s': min(times),
+                'median_s': statistics.median(times),
+                'peak_mb': peak / 2 ** 20,
+                'repeat': repeat,
+            }
+            results.append(record)
+            print(f"{scale:>12,}  {stage:<20} {record['min_s']:>9.4f}s  {record['peak_mb']:>9.1f} MB")
+    finally:
+        os.chdir(cwd)
+        for tmp_dir in state.get('tmp_dirs', []):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(report, baseline, threshold):
+    """Print min-time ratios against a previous report; returns the regressed (scale, stage) pairs"""
+    previous = {(r['scale'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    print(f"\n{'scale':>12}  {'stage':<20} {'before':>9} {'after':>9} {'ratio':>7}")
+    for record in report['results']:
+        old = previous.get((record['scale'], record['stage']))
+        if old is None:
+            continue
+        ratio = record['min_s'] / old['min_s'] if old['min_s'] else float('inf')
+        flag = '  REGRESSION' if ratio > threshold else ''
+        if flag:
+            regressions.append((record['scale'], record['stage']))
+        print(f"{record['scale']:>12,}  {record['stage']:<20} {old['min_s']:>8.4f}s {record['min_s']:>8.4f}s "
+              f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time and memory-profile each stage across dataset scales.")
+    parser.add_argument('--scales', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="order counts to benchmark")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--work-dir', default=os.path.join(tempfile.gettempdir(), 'shiplytics-bench-data'),
+                        help="where generated datasets are kept between runs")
+    parser.add_argument('--output', help="report path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="previous report to compare against")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="min-time ratio above which a stage counts as regressed (default: 1.2)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="exit with status 1 on any regression")
+    for name, default in GENERATOR_ARGS.items():
+        parser.add_argument(f'--{name}', type=int, default=default)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    work_dir = os.path.abspath(args.work_dir)
+    output = os.path.abspath(args.output) if args.output else os.path.join(
+        RESULTS_DIR, datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+
+    report = {
+        'environment': environment(),
+        'config': {name: getattr(args, name) for name in
+                   ['scales', 'stages', 'repeat', *GENERATOR_ARGS]},
+        'results': [],
+    }
+    for scale in args.scales:
+        root = dataset_dir(work_dir, scale, args)
+        report['results'].extend(run_scale(root, scale, args.stages, args.repeat))
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\nreport written to {output}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(report, json.load(fh), args.threshold)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+from utils.instrumentation import span
+
+# Shared chart layer. Large inputs are reduced before they reach Plotly so the
+# figure JSON sent to the browser stays bounded: line series are downsampled
+# per trace, scatter clouds are sampled and bar charts with too many
+# categories fold the smallest into "Other". Scatter and line traces past
+# WEBGL_THRESHOLD points render with WebGL. Built figures are memoized on
+# their (reduced) input slice and chart options, so a rerun that doesn't change
+# a chart's data skips figure construction.
+WEBGL_THRESHOLD = 1_000
+MAX_POINTS = 5_000   # per line trace / scatter chart
+MAX_BARS = 40        # categories on a bar chart's x axis
+OTHER_LABEL = "Other"
+FIGURE_CACHE_ENTRIES = 64
+WEBGL_KINDS = ('scatter', 'line')
+
+# Figures are shared across sessions rather than copied out of the cache (a
+# copy costs about as much as a rebuild), so callers must not modify them.
+cached_figure = st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+
+
+# --- REDUCTION ---
+
+def _columns(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def downsample_series(df, x, y, max_points=MAX_POINTS, color=None):
+    """Rows of a line series cut down to about ``max_points`` per trace.
+
+    Each trace (one per ``color`` value) is split into equal-count buckets
+    along x and only the rows holding each bucket's minimum and maximum of
+    every y column are kept, with the first and last rows, so peaks and dips
+    survive the reduction.
+    """
+    ys = _columns(y)
+    groups = [df] if color is None else [group for _, group in df.groupby(color, sort=False, observed=True)]
+    if all(len(group) <= max_points for group in groups):
+        return df
+    buckets = max(1, max_points // (2 * len(ys)))
+    kept = []
+    for group in groups:
+        if len(group) <= max_points:
+            kept.append(group)
+            continue
+        group = group.sort_values(x, kind='stable')
+        bucket = np.arange(len(group)) * buckets // len(group)
+        first = np.flatnonzero(np.diff(bucket, prepend=-1))
+        last = np.append(first[1:], len(group)) - 1
+        rows = [[0, len(group) - 1]]
+        for col in ys:
+            # Sorting by value within each (already contiguous) bucket puts its min first and max last
+            order = np.lexsort((group[col].to_numpy(), bucket))
+            rows += [order[first], order[last]]
+        kept.append(group.iloc[np.unique(np.concatenate(rows))])
+    return pd.concat(kept)
+
+
+def sample_points(df, max_points=MAX_POINTS, seed=0):
+    """At most ``max_points`` rows of a scatter cloud, drawn uniformly (reproducible for a given frame)"""
+    return df if len(df) <= max_points else df.sample(max_points, random_state=seed).sort_index()
+
+
+def fold_categories(df, x, y, max_bars=MAX_BARS, color=None):
+    """Bar rows with all but the ``max_bars - 1`` largest x categories summed into one "Other" bar"""
+    if pd.api.types.is_datetime64_any_dtype(df[x]) or df[x].nunique() <= max_bars:
+        return df
+    totals = df.groupby(x, observed=True)[_columns(y)].sum().sum(axis=1)
+    top = df[x].isin(totals.nlargest(max_bars - 1).index)
+    rest = df[~top]
+    # A numeric color is a measure and gets summed; a categorical one keeps its own Other bar
+    keys = [col for col in _columns(color) if not pd.api.types.is_numeric_dtype(df[col])]
+    other = rest.groupby(keys, observed=True).sum(numeric_only=True).reset_index() if keys \
+        else rest.sum(numeric_only=True).to_frame().T
+    other[x] = OTHER_LABEL
+    return pd.concat([df[top].astype({x: str}), other], ignore_index=True)
+
+
+def reduce_for_plot(kind, data, kwargs):
+    """Input of a px.<kind> chart reduced to the sizes above"""
+    if kind == 'line':
+        return downsample_series(data, kwargs['x'], kwargs['y'], color=kwargs.get('color'))
+    if kind == 'scatter':
+        return sample_points(data)
+    if kind == 'bar':
+        return fold_categories(data, kwargs['x'], kwargs['y'], color=kwargs.get('color'))
+    return data
+
+
+# --- FIGURES ---
+
+@cached_figure
+def _express_figure(kind, data, kwargs, traces, layout, hlines):
+    with span(f'chart.build.{kind}'):
+        fig = getattr(px, kind)(data, **kwargs)
+        if traces:
+            fig.update_traces(**traces)
+        if layout:
+            fig.update_layout(**layout)
+        for hline in hlines:
+            fig.add_hline(**hline)
+    return fig
+
+
+def express(kind, data, traces=None, layout=None, hlines=(), **kwargs):
+    """Memoized ``px.<kind>(data, **kwargs)`` with update_traces/update_layout/add_hline applied.
+
+    The data is reduced first (see reduce_for_plot) and scatter and line
+    charts over WEBGL_THRESHOLD points render with WebGL unless
+    ``render_mode`` is given. The figure is shared: don't modify it.
+    """
+    with span('chart.reduce'):
+        data = reduce_for_plot(kind, data, kwargs)
+    if kind in WEBGL_KINDS:
+        kwargs.setdefault('render_mode', 'webgl' if len(data) > WEBGL_THRESHOLD else 'svg')
+    return _express_figure(kind, data, kwargs, traces or {}, layout or {}, list(hlines))
+
+
+
+def plot(fig, name):
+    """st.plotly_chart at full width; serializing the figure is timed as span 'chart.plotly_chart.<name>'"""
+    with span(f'chart.plotly_chart.{name}'):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# --- MAPS ---
+# Many straight segments (routes, transfers) are drawn as one Scattergeo trace
+# per style: endpoints are interleaved with NaN gaps that break the line
+# between segments, so the figure holds a few traces however many rows there are.
+
+def segment_coords(from_values, to_values):
+    """One flat array holding each row's start and end value followed by a NaN gap"""
+    coords = np.full(3 * len(from_values), np.nan)
+    coords[0::3] = from_values
+    coords[1::3] = to_values
+    return coords
+
+
+def per_point(values):
+    """Per-segment values (1-d, or one row per segment) repeated for the segment's three points"""
+    return np.repeat(np.asarray(values), 3, axis=0)
+
+
+def segment_trace(from_lat, from_lon, to_lat, to_lon, endpoint_colors=None, text=None, customdata=None,
+                  **kwargs):
+    """Scattergeo trace drawing one segment per row; no line is drawn for a row with an unknown (NaN) end.
+
+    ``endpoint_colors`` is a (start, end) pair of marker colors; ``text`` and
+    ``customdata`` hold one entry (or row) per segment for hover templates.
+    Other keyword arguments style the whole trace.
+    """
+    if endpoint_colors is not None:
+        # Numeric codes on a two-color scale; plotly validates color strings one by one
+        start, end = endpoint_colors
+        kwargs['marker'] = dict(kwargs.get('marker', {}), color=np.tile([0, 1, 1], len(from_lat)),
+                                colorscale=[[0, start], [1, end]], cmin=0, cmax=1)
+    if text is not None:
+        kwargs['text'] = per_point(text)
+    if customdata is not None:
+        kwargs['customdata'] = per_point(customdata)
+    return go.Scattergeo(lat=segment_coords(from_lat, to_lat), lon=segment_coords(from_lon, to_lon), **kwargs)
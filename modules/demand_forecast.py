@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+# Demand forecasts behind the reorder points on the Inventory Management page.
+# Orders are counted per day for every warehouse (Origin) × product category
+# pair into one (series × days) matrix, and all series are fitted together:
+# simple exponential smoothing over a grid of smoothing factors and a trailing
+# moving average, each scored on its one-step-ahead errors. Loops run over
+# days, never over series. Demand is in orders per day, like Demand_Count.
+
+SES_ALPHAS = np.arange(1, 20) / 20   # smoothing factors tried for every series
+MA_WINDOW = 7                        # moving average days; also the warm-up before errors are scored
+LEAD_TIME_DAYS = 7
+# Safety stock multiples of the lead-time demand deviation for a cycle service level
+SERVICE_LEVELS = {'90%': 1.282, '95%': 1.645, '99%': 2.326}
+
+FORECAST_COLUMNS = ['Origin', 'Product_Category', 'Model', 'Alpha', 'Forecast_Daily', 'Demand_Std', 'Orders',
+                    'Days']
+
+
+def daily_demand(df_orders):
+    """Orders per day for every Origin × Product_Category pair.
+
+    Returns the pairs (one row per series, sorted), the calendar (every day
+    from the first order to the last) and the (series × days) count matrix.
+    Orders without a date are left out.
+    """
+    dates = pd.to_datetime(df_orders['Order_Date']).dt.normalize()
+    dated = dates.notna().to_numpy()
+    keys = pd.DataFrame({
+        'Origin': df_orders['Origin'].astype(str).to_numpy()[dated],
+        'Product_Category': df_orders['Product_Category'].astype(str).to_numpy()[dated],
+    })
+    if len(keys) == 0:
+        return keys, pd.DatetimeIndex([]), np.zeros((0, 0))
+    grouped = keys.groupby(['Origin', 'Product_Category'], sort=True)
+    series = grouped.ngroup().to_numpy()
+    pairs = grouped.size().index.to_frame(index=False)
+
+    dates = dates[dated]
+    start = dates.min()
+    day = (dates - start).dt.days.to_numpy()
+    n_days = int(day.max()) + 1
+    counts = np.bincount(series * n_days + day, minlength=len(pairs) * n_days).reshape(len(pairs), n_days)
+    return pairs, pd.date_range(start, periods=n_days, freq='D'), counts.astype(float)
+
+
+def fit_ses(counts, alphas=SES_ALPHAS, warmup=MA_WINDOW):
+    """Simple exponential smoothing of every row of ``counts`` for every smoothing factor.
+
+    Levels start at the mean of the first ``warmup`` days. Returns the mean
+    squared one-step-ahead error over the days after the warm-up and the level
+    after the last day, both (alphas × series).
+    """
+    n_series, n_days = counts.shape
+    level = np.tile(counts[:, :max(warmup, 1)].mean(axis=1), (len(alphas), 1))
+    sse = np.zeros_like(level)
+    step = alphas[:, None]
+    for t in range(n_days):
+        error = counts[:, t] - level
+        if t >= warmup:
+            sse += error ** 2
+        level += step * error
+    return sse / max(n_days - warmup, 1), level
+
+
+def fit_moving_average(counts, window=MA_WINDOW):
+    """Mean squared one-step-ahead error of a ``window``-day trailing mean per row, and its next forecast"""
+    n_days = counts.shape[1]
+    total = np.concatenate([np.zeros((len(counts), 1)), counts.cumsum(axis=1)], axis=1)
+    forecasts = (total[:, window:-1] - total[:, :-window - 1]) / window   # for days window .. n_days - 1
+    mse = ((counts[:, window:] - forecasts) ** 2).mean(axis=1) if n_days > window else np.zeros(len(counts))
+    return mse, (total[:, -1] - total[:, -window - 1]) / window
+
+
+def fit_demand(df_orders, alphas=SES_ALPHAS, window=MA_WINDOW):
+    """Fitted demand model and next-day forecast for every warehouse × category series.
+
+    Each series gets the smoothing factor with the lowest one-step error, then
+    whichever of that smoothing and the moving average scores better.
+    Demand_Std is the chosen model's one-step error deviation, used for safety
+    stock. Histories shorter than two windows fall back to the plain mean.
+    """
+    pairs, calendar, counts = daily_demand(df_orders)
+    if len(pairs) == 0:
+        return pd.DataFrame(columns=FORECAST_COLUMNS)
+    n_days = len(calendar)
+    window = min(window, n_days // 2)
+    if window < 1:
+        model = np.full(len(pairs), 'Mean', dtype=object)
+        alpha = np.full(len(pairs), np.nan)
+        forecast, mse = counts.mean(axis=1), counts.var(axis=1)
+    else:
+        ses_mse, ses_level = fit_ses(counts, alphas, warmup=window)
+        best = ses_mse.argmin(axis=0)
+        cols = np.arange(len(pairs))
+        ses_mse, ses_level = ses_mse[best, cols], ses_level[best, cols]
+        ma_mse, ma_next = fit_moving_average(counts, window)
+        use_ses = ses_mse <= ma_mse
+        model = np.where(use_ses, 'SES', f'MA{window}').astype(object)
+        alpha = np.where(use_ses, alphas[best], np.nan)
+        forecast = np.where(use_ses, ses_level, ma_next)
+        mse = np.where(use_ses, ses_mse, ma_mse)
+    return pairs.assign(
+        Model=model,
+        Alpha=alpha,
+        Forecast_Daily=np.maximum(forecast, 0),
+        Demand_Std=np.sqrt(mse),
+        Orders=counts.sum(axis=1).astype(np.int64),
+        Days=n_days,
+    )[FORECAST_COLUMNS]
+
+
+def reorder_points(analysis_df, forecast, lead_time_days=LEAD_TIME_DAYS, service_z=SERVICE_LEVELS['95%']):
+    """Dynamic reorder point and days of cover for every location and category of stock_analysis.
+
+    The reorder point covers forecast demand over the lead time plus safety
+    stock of ``service_z`` deviations of lead-time demand. Days of cover is
+    stock over the daily forecast (inf without demand). Stock with no order
+    history has zero forecast demand.
+    """
+    stock = analysis_df[['Location', 'Product_Category', 'Current_Stock_Units', 'Reorder_Level']]
+    keys = stock.astype({'Location': str, 'Product_Category': str})
+    fitted = forecast.astype({'Origin': str, 'Product_Category': str}).rename(columns={'Origin': 'Location'})
+    merged = keys.merge(fitted, on=['Location', 'Product_Category'], how='left')
+    daily = merged['Forecast_Daily'].fillna(0).to_numpy(dtype=float)
+    std = merged['Demand_Std'].fillna(0).to_numpy(dtype=float)
+    units = merged['Current_Stock_Units'].to_numpy(dtype=float)
+
+    reorder_point = np.ceil(daily * lead_time_days + service_z * std * np.sqrt(lead_time_days))
+    with np.errstate(divide='ignore'):
+        cover = np.where(daily > 0, units / daily, np.inf)
+    return pd.DataFrame({
+        'Location': stock['Location'].to_numpy(),
+        'Product_Category': stock['Product_Category'].to_numpy(),
+        'Model': merged['Model'].fillna('No history').to_numpy(),
+        'Forecast_Daily': daily,
+        'Dynamic_Reorder_Point': reorder_point.astype(np.int64),
+        'Reorder_Level': stock['Reorder_Level'].to_numpy(),
+        'Current_Stock_Units': stock['Current_Stock_Units'].to_numpy(),
+        'Days_Of_Cover': cover,
+        'Reorder_Now': units < reorder_point,
+    })
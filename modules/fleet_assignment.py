@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+
+from modules.route_analysis import FUEL_PRICE_PER_L
+from utils.geo import CITIES, ROAD_DETOUR_FACTOR
+
+# Batch dispatch: assigns pending orders to Available vehicles at minimum total
+# cost. Each dispatch wave is one min-cost bipartite assignment (every vehicle
+# takes at most one order); vehicles then sit at their order's destination for
+# the next wave, until every order that fits some vehicle has been assigned.
+
+# Costs in ₹ on top of fuel (FUEL_PRICE_PER_L)
+COST_RATES = {
+    'co2_per_kg': 2.0,            # carbon price per kg CO2
+    'reposition_per_km': 10.0,    # driver time per empty km to the pickup city
+    'age_per_year_km': 0.5,       # extra maintenance per km for each year of vehicle age
+}
+
+# Assumed typical parcel weight per category. orders.csv has no weight column
+# yet, so capacity checks use these for every order without a Weight_KG value
+ORDER_WEIGHT_KG = {
+    'Electronics': 25,
+    'Fashion': 10,
+    'Food & Beverage': 40,
+    'Healthcare': 15,
+    'Industrial': 400,
+    'Books': 20,
+    'Home Goods': 60,
+}
+DEFAULT_ORDER_WEIGHT_KG = 25
+
+# Special handling -> vehicle types allowed to carry it
+HANDLING_VEHICLE_TYPES = {
+    'Temperature_Controlled': ['Refrigerated'],
+}
+
+# Cost of a forbidden pair; larger than any feasible batch total, so the solver
+# only uses one when nothing else is left and those pairs are dropped afterwards
+FORBIDDEN = 1e12
+
+
+def order_weights(orders):
+    """Weight of every order and whether it is estimated.
+
+    Orders use their Weight_KG when the column exists and has a value; the
+    rest get their category's ORDER_WEIGHT_KG. Returns ``(weights, estimated)``.
+    """
+    given = (pd.to_numeric(orders['Weight_KG'], errors='coerce').to_numpy(dtype=float)
+             if 'Weight_KG' in orders.columns else np.full(len(orders), np.nan))
+    estimated = np.isnan(given)
+    assumed = (orders['Product_Category'].astype(str).map(ORDER_WEIGHT_KG)
+               .fillna(DEFAULT_ORDER_WEIGHT_KG).to_numpy(dtype=float))
+    return np.where(estimated, assumed, given), estimated
+
+
+def pending_orders(df_orders, df_perf, df_routes, graph):
+    """Orders without a delivery record yet, with their trip distance and weight.
+
+    Trip distance is the order's routes_distance.csv row when it has one, else
+    the shortest road distance through the route graph. Weight_Estimated
+    marks orders whose weight is the category estimate (see order_weights).
+    """
+    pending = df_orders[~df_orders['Order_ID'].isin(df_perf['Order_ID'])]
+    columns = ['Order_ID', 'Priority', 'Product_Category', 'Special_Handling', 'Origin', 'Destination']
+    pending = pending[columns + (['Weight_KG'] if 'Weight_KG' in pending.columns else [])].reset_index(drop=True)
+
+    routed = df_routes.drop_duplicates('Order_ID').set_index('Order_ID')['Distance_KM']
+    trip_km = pending['Order_ID'].map(routed).to_numpy(dtype=float, copy=True)
+    missing = np.isnan(trip_km)
+    if missing.any():
+        origin = graph.cities.get_indexer(pending['Origin'].astype(str)[missing])
+        dest = graph.cities.get_indexer(pending['Destination'].astype(str)[missing])
+        known = (origin >= 0) & (dest >= 0)
+        graph_km = np.full(len(origin), np.inf)
+        graph_km[known] = graph.dist['distance'][origin[known], dest[known]]
+        trip_km[missing] = graph_km
+
+    pending['Trip_KM'] = trip_km
+    pending['Weight_KG'], pending['Weight_Estimated'] = order_weights(pending)
+    return pending
+
+
+def _solve_assignment(cost):
+    """Row/column pairs of a minimum-cost assignment of the smaller side of ``cost``.
+
+    Uses scipy's linear_sum_assignment when installed; otherwise the same
+    shortest augmenting path method (Jonker-Volgenant), one vectorized Dijkstra
+    pass per row, in O(rows² · cols).
+    """
+    try:
+        from scipy.optimize import linear_sum_assignment
+        return linear_sum_assignment(cost)
+    except ImportError:
+        pass
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n_rows, n_cols = cost.shape
+    u, v = np.zeros(n_rows), np.zeros(n_cols)
+    col4row = np.full(n_rows, -1)
+    row4col = np.full(n_cols, -1)
+    rows = np.arange(n_rows)
+
+    for cur_row in range(n_rows):
+        shortest = np.full(n_cols, np.inf)
+        path = np.full(n_cols, -1)
+        remaining = np.ones(n_cols, dtype=bool)
+        seen_rows = np.zeros(n_rows, dtype=bool)
+        min_val, i, sink = 0.0, cur_row, -1
+        while sink < 0:
+            seen_rows[i] = True
+            reduced = min_val + cost[i] - u[i] - v
+            closer = remaining & (reduced < shortest)
+            path[closer] = i
+            shortest[closer] = reduced[closer]
+
+            candidates = np.where(remaining, shortest, np.inf)
+            min_val = candidates.min()
+            ties = np.flatnonzero(candidates == min_val)
+            free = ties[row4col[ties] < 0]
+            j = free[0] if len(free) else ties[0]
+            remaining[j] = False
+            if row4col[j] < 0:
+                sink = j
+            else:
+                i = row4col[j]
+
+        u[cur_row] += min_val
+        others = seen_rows & (rows != cur_row)
+        u[others] += min_val - shortest[col4row[others]]
+        done = ~remaining
+        v[done] -= min_val - shortest[done]
+
+        j = sink
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+    if transposed:
+        order = np.argsort(col4row)
+        return col4row[order], rows[order]
+    return rows, col4row
+
+
+def _pair_costs(orders, vehicles, location, graph, rates):
+    """(orders × vehicles) ₹ cost components for the vehicles' current cities.
+
+    Repositioning follows the road graph; pairs it can't connect fall back to
+    the great-circle distance × ROAD_DETOUR_FACTOR when both cities have
+    coordinates.
+    """
+    origin = graph.cities.get_indexer(orders['Origin'].astype(str))
+    reposition_km = graph.dist['distance'][np.ix_(origin, location)]
+    # A vehicle parked outside the network can't be reached again
+    reposition_km[:, location < 0] = np.inf
+    unroutable = np.isinf(reposition_km)
+    if unroutable.any():
+        geo_codes = np.append(CITIES.codes(graph.cities), -1)  # -1 (outside the graph) stays unknown
+        crow_km = CITIES.distance(geo_codes[origin][:, None], geo_codes[location][None, :])
+        reposition_km[unroutable] = crow_km[unroutable] * ROAD_DETOUR_FACTOR
+    km = orders['Trip_KM'].to_numpy()[:, None] + reposition_km
+    # inf km × a zero rate is nan; either way the pair is dropped as not finite
+    with np.errstate(invalid='ignore'):
+        costs = {
+            'Reposition_KM': reposition_km,
+            'Fuel_Cost': km / vehicles['Fuel_Efficiency_KM_per_L'].to_numpy() * FUEL_PRICE_PER_L,
+            'CO2_Kg': km * vehicles['CO2_Emissions_Kg_per_KM'].to_numpy(),
+            'Reposition_Cost': reposition_km * rates['reposition_per_km'],
+            'Age_Cost': km * vehicles['Age_Years'].to_numpy() * rates['age_per_year_km'],
+        }
+        costs['CO2_Cost'] = costs['CO2_Kg'] * rates['co2_per_kg']
+        costs['Total_Cost'] = (costs['Fuel_Cost'] + costs['CO2_Cost'] + costs['Reposition_Cost']
+                               + costs['Age_Cost'])
+    return costs
+
+
+def _fits(orders, vehicles):
+    """(orders × vehicles) capacity and special-handling feasibility"""
+    fits = orders['Weight_KG'].to_numpy()[:, None] <= vehicles['Capacity_KG'].to_numpy()[None, :]
+    handling = orders['Special_Handling'].astype(str).to_numpy()
+    vehicle_type = vehicles['Vehicle_Type'].astype(str).to_numpy()
+    for need, types in HANDLING_VEHICLE_TYPES.items():
+        fits[handling == need] &= np.isin(vehicle_type, types)
+    return fits
+
+
+def assign_fleet(pending, df_vehicles, graph, rates=None, max_waves=None):
+    """Minimum-cost assignment of pending orders to Available vehicles, wave by wave.
+
+    ``pending`` is a pending_orders frame and ``graph`` the RouteGraph giving
+    road distances for repositioning (see _pair_costs). Returns ``(assignments, unassigned)``:
+    one row per assigned order with its wave, distances and ₹ cost breakdown,
+    and the orders no vehicle could take with the reason.
+    """
+    rates = {**COST_RATES, **(rates or {})}
+    vehicles = df_vehicles[df_vehicles['Status'] == 'Available'].reset_index(drop=True)
+    location = graph.cities.get_indexer(vehicles['Current_Location'].astype(str))
+    reachable = location >= 0
+    vehicles, location = vehicles[reachable].reset_index(drop=True), location[reachable]
+
+    fits = _fits(pending, vehicles)
+    origin_known = graph.cities.get_indexer(pending['Origin'].astype(str)) >= 0
+    reasons = np.select(
+        [~origin_known | ~np.isfinite(pending['Trip_KM'].to_numpy()), ~fits.any(axis=1)],
+        ['route not in network', 'no available vehicle can carry it'], '')
+    open_orders = np.flatnonzero(reasons == '')
+
+    plans = []
+    wave = 0
+    stalled = False
+    while len(open_orders) and len(vehicles) and (max_waves is None or wave < max_waves):
+        wave += 1
+        orders = pending.iloc[open_orders]
+        costs = _pair_costs(orders, vehicles, location, graph, rates)
+        total = np.where(fits[open_orders] & np.isfinite(costs['Total_Cost']), costs['Total_Cost'], FORBIDDEN)
+        rows, cols = _solve_assignment(total)
+        ok = total[rows, cols] < FORBIDDEN
+        rows, cols = rows[ok], cols[ok]
+        if len(rows) == 0:
+            stalled = True
+            break
+
+        plan = orders.iloc[rows][['Order_ID', 'Priority', 'Origin', 'Destination', 'Weight_KG', 'Weight_Estimated',
+                                  'Trip_KM']]
+        plan = plan.reset_index(drop=True)
+        plan.insert(1, 'Vehicle_ID', vehicles['Vehicle_ID'].to_numpy()[cols])
+        plan.insert(2, 'Wave', wave)
+        plan['Capacity_KG'] = vehicles['Capacity_KG'].to_numpy()[cols]
+        for col, matrix in costs.items():
+            plan[col] = matrix[rows, cols]
+        plans.append(plan)
+
+        # Assigned vehicles end the wave at their order's destination
+        location[cols] = graph.cities.get_indexer(plan['Destination'].astype(str))
+        open_orders = np.delete(open_orders, rows)
+
+    if len(open_orders):
+        if not len(vehicles):
+            reasons[open_orders] = 'no available vehicles'
+        elif stalled:
+            reasons[open_orders] = 'no feasible vehicle in reach'
+        else:
+            reasons[open_orders] = 'wave limit reached'
+    assignments = pd.concat(plans, ignore_index=True) if plans else pd.DataFrame()
+    unassigned = pending.loc[reasons != '', ['Order_ID', 'Origin', 'Destination', 'Weight_KG', 'Weight_Estimated']]
+    unassigned = unassigned.assign(Reason=reasons[reasons != '']).reset_index(drop=True)
+    return assignments, unassigned
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+
+from utils.geo import CITIES
+
+# Calculations behind the Inventory Management page, free of Streamlit and Plotly
+# so batch jobs can run them for every product category at once.
+
+# Stock status flags, stored as codes so status filters compare integers
+STATUS_DTYPE = pd.CategoricalDtype(['Healthy', 'CRITICAL LOW', 'Overstocked'])
+
+
+def stock_analysis(df_inventory, df_orders, demand_df=None):
+    """Stock, reorder level, demand and status for every location and category.
+
+    ``demand_df`` holds precomputed order counts (Origin, Product_Category,
+    Demand_Count), e.g. from the SQL backend; by default they come from ``df_orders``.
+    """
+    if demand_df is None:
+        demand_df = df_orders.groupby(['Origin', 'Product_Category'], observed=True).size().reset_index(name='Demand_Count')
+    else:
+        demand_df = demand_df.astype({'Product_Category': df_inventory['Product_Category'].dtype})
+    stock_df = df_inventory[['Location', 'Product_Category', 'Current_Stock_Units', 'Reorder_Level']].copy()
+
+    analysis_df = pd.merge(stock_df, demand_df, left_on=['Location', 'Product_Category'], right_on=['Origin', 'Product_Category'], how='left')
+    analysis_df['Demand_Count'] = analysis_df['Demand_Count'].fillna(0)
+
+    # Logic: Status Flagging
+    analysis_df['Status'] = 'Healthy'
+    analysis_df.loc[analysis_df['Current_Stock_Units'] < analysis_df['Reorder_Level'], 'Status'] = 'CRITICAL LOW'
+    analysis_df.loc[analysis_df['Current_Stock_Units'] > (analysis_df['Reorder_Level'] * 3), 'Status'] = 'Overstocked'
+    analysis_df['Status'] = analysis_df['Status'].astype(STATUS_DTYPE)
+    return analysis_df
+
+
+TRANSFER_COLUMNS = ['Product_Category', 'From', 'To', 'Units', 'Distance_KM']
+# Lanes per location the HiGHS transport LP starts from; others join only when they'd lower the cost
+CANDIDATE_LANES = 8
+
+
+def _min_cost_transport(supply, demand, cost):
+    """Integer flow matrix moving as many units as the lanes allow (min(total supply,
+    total demand) when every lane exists) at minimum total cost.
+
+    Uses scipy's HiGHS solver when installed (_transport_highs); otherwise
+    successive shortest paths (_transport_ssp). ``inf`` cost means no lane.
+    """
+    try:
+        return _transport_highs(supply, demand, cost)
+    except ImportError:
+        return _transport_ssp(supply, demand, cost)
+
+
+def _nearest_lanes(score, k):
+    """Mask of each row's and each column's ``k`` lowest finite scores"""
+    mask = np.zeros(score.shape, dtype=bool)
+    k_row, k_col = min(k, score.shape[1]), min(k, score.shape[0])
+    mask[np.arange(score.shape[0])[:, None], np.argpartition(score, k_row - 1, axis=1)[:, :k_row]] = True
+    mask[np.argpartition(score, k_col - 1, axis=0)[:k_col], np.arange(score.shape[1])[None, :]] = True
+    return mask & np.isfinite(score)
+
+
+def _transport_highs(supply, demand, cost, lanes_per_node=CANDIDATE_LANES):
+    """_min_cost_transport as a linear program solved by HiGHS, lanes added as needed.
+
+    A dummy source and sink (with a free lane between them) take whatever
+    isn't moved, at a penalty per unit above the cost of any rerouting, so
+    the LP moves as much as it can first. It starts from each location's
+    ``lanes_per_node`` shortest lanes; after each solve, lanes whose reduced
+    cost is negative (the nearest ones per location) join, until none is
+    left and the flow is optimal over every lane. The constraint matrix is
+    totally unimodular, so the simplex vertex is integral.
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_array
+
+    supply = np.asarray(supply, dtype=np.int64)
+    demand = np.asarray(demand, dtype=np.int64)
+    n_src, n_dst = cost.shape
+    flow = np.zeros((n_src, n_dst), dtype=np.int64)
+    finite = np.isfinite(cost)
+    if not finite.any() or supply.sum() == 0 or demand.sum() == 0:
+        return flow
+
+    # An augmenting path crosses at most n_src + n_dst lanes, so leaving a unit unmoved must cost more
+    penalty = (n_src + n_dst) * max(cost[finite].max(), 1.0) + 1.0
+    b_eq = np.r_[supply, demand.sum(), demand, supply.sum()]
+    active = _nearest_lanes(cost, lanes_per_node)
+    while True:
+        src, dst = np.nonzero(active)
+        # Lanes: the active ones, every source -> dummy sink, dummy source -> every sink, dummy -> dummy
+        rows = np.r_[src, np.arange(n_src), np.full(n_dst, n_src), n_src]
+        cols = np.r_[dst, np.full(n_src, n_dst), np.arange(n_dst), n_dst]
+        lanes = np.arange(len(rows))
+        a_eq = coo_array((np.ones(2 * len(rows)), (np.r_[rows, n_src + 1 + cols], np.r_[lanes, lanes])),
+                         shape=(n_src + n_dst + 2, len(rows))).tocsr()
+        costs = np.r_[cost[src, dst], np.full(n_src + n_dst, penalty), 0.0]
+        result = linprog(costs, A_eq=a_eq, b_eq=b_eq, bounds=(0, None), method='highs-ds',
+                         options={'presolve': False})
+        duals = result.eqlin.marginals
+        reduced = cost - duals[:n_src, None] - duals[None, n_src + 1:n_src + 1 + n_dst]
+        improving = finite & ~active & (reduced < -1e-9 * penalty)
+        if not improving.any():
+            break
+        active |= _nearest_lanes(np.where(improving, reduced, np.inf), lanes_per_node)
+    flow[src, dst] = np.round(result.x[:len(src)]).astype(np.int64)
+    return flow
+
+
+def _transport_ssp(supply, demand, cost):
+    """_min_cost_transport without scipy.
+
+    Successive shortest paths: each round finds the cheapest way to move one
+    more unit from any source with stock left to any sink still short, through
+    the residual graph (forward lanes, or undoing part of an earlier shipment),
+    and pushes as much as that path allows. Shortest paths come from a
+    Bellman-Ford that relaxes all lanes of one side at once. ``inf`` cost means
+    no lane.
+    """
+    # Whole thousandths keep path sums exact, so relaxing a lane and undoing it
+    # can never look like an improvement through rounding
+    cost = np.round(cost * 1000)
+    supply = supply.astype(np.int64)
+    demand = demand.astype(np.int64)
+    n_src, n_dst = cost.shape
+    flow = np.zeros((n_src, n_dst), dtype=np.int64)
+    src_idx, dst_idx = np.arange(n_src), np.arange(n_dst)
+
+    while supply.any() and demand.any():
+        dist_src = np.where(supply > 0, 0.0, np.inf)
+        pred_src = np.full(n_src, -1)
+        dist_dst = np.full(n_dst, np.inf)
+        pred_dst = np.full(n_dst, -1)
+        while True:
+            via = dist_src[:, None] + cost
+            best = via.argmin(axis=0)
+            reach = via[best, dst_idx]
+            closer = reach < dist_dst
+            dist_dst[closer], pred_dst[closer] = reach[closer], best[closer]
+
+            with np.errstate(invalid='ignore'):
+                back = np.where(flow > 0, dist_dst[None, :] - cost, np.inf)
+            best_back = back.argmin(axis=1)
+            reach_back = back[src_idx, best_back]
+            closer = reach_back < dist_src
+            if not closer.any():
+                break
+            dist_src[closer], pred_src[closer] = reach_back[closer], best_back[closer]
+
+        short = np.flatnonzero(demand > 0)
+        sink = short[dist_dst[short].argmin()]
+        if not np.isfinite(dist_dst[sink]):
+            break
+
+        forward, backward = [], []
+        src = pred_dst[sink]
+        forward.append((src, sink))
+        while pred_src[src] >= 0:
+            dst = pred_src[src]
+            backward.append((src, dst))
+            src = pred_dst[dst]
+            forward.append((src, dst))
+
+        units = min(supply[src], demand[sink], *(flow[lane] for lane in backward))
+        for lane in forward:
+            flow[lane] += units
+        for lane in backward:
+            flow[lane] -= units
+        supply[src] -= units
+        demand[sink] -= units
+    return flow
+
+
+def plan_transfers(analysis_df, registry=CITIES):
+    """Minimum-distance stock transfers for every product category in one run.
+
+    Per category this solves the transportation problem: overstocked
+    locations can give their stock above 3x the reorder level, critical ones
+    need their shortfall below the reorder level, and each unit moved costs the
+    distance between the two cities. When surplus can't cover every shortfall,
+    as much as possible is moved. Locations missing from ``registry`` can't be
+    routed and are reported. Returns one row per lane used.
+    """
+    surplus = (analysis_df['Current_Stock_Units'] - analysis_df['Reorder_Level'] * 3).clip(lower=0)
+    deficit = (analysis_df['Reorder_Level'] - analysis_df['Current_Stock_Units']).clip(lower=0)
+    frame = analysis_df[['Product_Category', 'Location']].assign(Surplus=surplus, Deficit=deficit)
+    registry.report_unknown(frame.loc[(surplus > 0) | (deficit > 0), 'Location'], 'plan_transfers')
+
+    frames = []
+    for category, cat_data in frame.groupby('Product_Category', observed=True, sort=True):
+        sources = cat_data[cat_data['Surplus'] > 0]
+        sinks = cat_data[cat_data['Deficit'] > 0]
+        if len(sources) == 0 or len(sinks) == 0:
+            continue
+        cost = registry.distance_matrix(sources['Location'], sinks['Location'])
+        flow = _min_cost_transport(sources['Surplus'].to_numpy(), sinks['Deficit'].to_numpy(), cost)
+        src, dst = np.nonzero(flow)
+        frames.append(pd.DataFrame({
+            'Product_Category': category,
+            'From': sources['Location'].to_numpy()[src],
+            'To': sinks['Location'].to_numpy()[dst],
+            'Units': flow[src, dst],
+            'Distance_KM': cost[src, dst],
+        }))
+    if not frames:
+        return pd.DataFrame(columns=TRANSFER_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[TRANSFER_COLUMNS]
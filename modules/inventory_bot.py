@@ -1,36 +1,73 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+from utils.datasets import dataset_version
+from utils.data_loader import load_rollup_data, precomputed, query_backend
+from utils.geo import CITIES
+from utils.instrumentation import span, timed
+from modules.inventory_analysis import stock_analysis, plan_transfers
+from modules.demand_forecast import LEAD_TIME_DAYS, SERVICE_LEVELS, fit_demand, reorder_points
+from modules.charts import cached_figure, express, plot, segment_trace
+from modules.trend_charts import render_trends
 
-# Hardcoded Coords for the Map
-CITY_COORDS = {
-    "Mumbai": {"lat": 19.0760, "lon": 72.8777},
-    "Delhi": {"lat": 28.7041, "lon": 77.1025},
-    "Bangalore": {"lat": 12.9716, "lon": 77.5946},
-    "Chennai": {"lat": 13.0827, "lon": 80.2707},
-    "Kolkata": {"lat": 22.5726, "lon": 88.3639},
-    "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
-    "Ahmedabad": {"lat": 23.0225, "lon": 72.5714},
-    "Pune": {"lat": 18.5204, "lon": 73.8567}
-}
+@st.cache_data(max_entries=4)
+def transfer_plan(_analysis_df, versions):
+    """plan_transfers for every category, solved once per dataset version"""
+    return plan_transfers(_analysis_df)
 
+@st.cache_data(max_entries=4)
+def demand_model(_df_orders, version):
+    """fit_demand on the order history, fitted once per dataset version"""
+    return fit_demand(_df_orders)
+
+@cached_figure
+@timed('chart.build.transfer_map')
+def transfer_map(recommendations):
+    """Map of one category's planned transfer lanes"""
+    # Planned lanes only join cities the registry can place; all lanes share one trace
+    from_lat, from_lon = CITIES.coords(recommendations['From'])
+    to_lat, to_lon = CITIES.coords(recommendations['To'])
+    fig_map = go.Figure(segment_trace(
+        from_lat, from_lon, to_lat, to_lon,
+        endpoint_colors=('#f39c12', '#e74c3c'),
+        text=recommendations['From'].astype(str) + ' → ' + recommendations['To'].astype(str),
+        customdata=recommendations[['Units']],
+        mode='lines+markers',
+        line=dict(width=3, color='#3498db'),
+        marker=dict(size=12),
+        name="Transfers",
+        hovertemplate='<b>%{text}</b><br>%{customdata[0]:,} units<extra></extra>'
+    ))
+    
+    fig_map.update_layout(
+        geo=dict(
+            scope='asia',
+            showland=True,
+            landcolor='rgb(243, 243, 243)',
+            coastlinecolor='rgb(204, 204, 204)',
+            projection_type='natural earth'
+        ),
+        height=400,
+        margin={"r":0,"t":0,"l":0,"b":0},
+        showlegend=False
+    )
+    return fig_map
+
+@timed('page.inventory')
 def render_page(df_inventory, df_orders):
     # Header with professional styling
     st.markdown("""<h1 style='text-align: center;'>Inventory Management System</h1>""", unsafe_allow_html=True)
     st.markdown("""<p style='font-size: 1.1rem; color: #7f8c8d; margin-bottom: 2rem; text-align: center;'>Intelligent inter-warehouse stock balancing and optimization</p>""", unsafe_allow_html=True)
     
     # 1. Data Prep
-    demand_df = df_orders.groupby(['Origin', 'Product_Category']).size().reset_index(name='Demand_Count')
-    stock_df = df_inventory[['Location', 'Product_Category', 'Current_Stock_Units', 'Reorder_Level']].copy()
-    
-    analysis_df = pd.merge(stock_df, demand_df, left_on=['Location', 'Product_Category'], right_on=['Origin', 'Product_Category'], how='left')
-    analysis_df['Demand_Count'] = analysis_df['Demand_Count'].fillna(0)
-    
-    # Logic: Status Flagging
-    analysis_df['Status'] = 'Healthy'
-    analysis_df.loc[analysis_df['Current_Stock_Units'] < analysis_df['Reorder_Level'], 'Status'] = 'CRITICAL LOW'
-    analysis_df.loc[analysis_df['Current_Stock_Units'] > (analysis_df['Reorder_Level'] * 3), 'Status'] = 'Overstocked'
+    with span('inventory.stock_analysis'):
+        # Demand counts are pushed down to SQL when that backend is on
+        sql = query_backend(orders=df_orders)
+        analysis_df = stock_analysis(df_inventory, df_orders, sql.demand_counts() if sql is not None else None)
+    versions = (dataset_version(df_inventory), dataset_version(df_orders))
+    with span('inventory.transfer_plan'):
+        plan = precomputed('transfer_plan', versions) if all(versions) else None
+        if plan is None:
+            plan = transfer_plan(analysis_df, versions) if all(versions) else plan_transfers(analysis_df)
     
     # 2. Filters with enhanced sidebar
     st.sidebar.markdown("---")
@@ -82,81 +119,76 @@ def render_page(df_inventory, df_orders):
     
     with col1:
         st.markdown("#### Stock Health Analysis")
-        fig_bar = px.bar(
-            cat_data, 
+        fig_bar = express(
+            'bar',
+            cat_data[['Location', 'Current_Stock_Units', 'Reorder_Level']], 
             x='Location', 
             y=['Current_Stock_Units', 'Reorder_Level'], 
             barmode='group',
             color_discrete_map={'Current_Stock_Units': '#3498db', 'Reorder_Level': '#e74c3c'},
             labels={'value': 'Units', 'variable': 'Metric'},
-            template="plotly_white"
-        )
-        fig_bar.update_layout(
-            height=400,
-            font=dict(family="Arial, sans-serif", size=11),
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            xaxis_title="",
-            yaxis_title="Stock Units"
+            template="plotly_white",
+            layout=dict(
+                height=400,
+                font=dict(family="Arial, sans-serif", size=11),
+                showlegend=True,
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                xaxis_title="",
+                yaxis_title="Stock Units"
+            )
         )
-        st.plotly_chart(fig_bar, use_container_width=True)
+        plot(fig_bar, 'stock_levels')
         
     with col2:
         st.markdown("#### Transfer Recommendations")
         
-        # Transfer Logic
-        deficits = cat_data[cat_data['Status'] == 'CRITICAL LOW']
-        surpluses = cat_data[cat_data['Status'] == 'Overstocked']
-        
-        fig_map = go.Figure()
+        # Transfer Logic: this category's lanes of the network-wide plan
+        recommendations = plan[plan['Product_Category'] == selected_cat].drop(columns='Product_Category')
         
-        if len(deficits) > 0 and len(surpluses) > 0:
-            recommendations = []
-            for idx, need in deficits.iterrows():
-                if len(surpluses) > 0:
-                    donor = surpluses.iloc[0]
-                    
-                    # Draw Line
-                    start = CITY_COORDS.get(donor['Location'], {'lat':20, 'lon':78})
-                    end = CITY_COORDS.get(need['Location'], {'lat':20, 'lon':78})
-                    
-                    fig_map.add_trace(go.Scattergeo(
-                        lon = [start['lon'], end['lon']], 
-                        lat = [start['lat'], end['lat']],
-                        mode = 'lines+markers', 
-                        line = dict(width=3, color='#3498db'),
-                        marker = dict(size=12, color=['#f39c12', '#e74c3c']),
-                        name = f"{donor['Location']} → {need['Location']}",
-                        showlegend=True
-                    ))
-                    recommendations.append({
-                        'From': donor['Location'],
-                        'To': need['Location'],
-                        'Available': int(donor['Current_Stock_Units']),
-                        'Needed': int(need['Reorder_Level'] - need['Current_Stock_Units'])
-                    })
-            
-            fig_map.update_layout(
-                geo=dict(
-                    scope='asia',
-                    showland=True,
-                    landcolor='rgb(243, 243, 243)',
-                    coastlinecolor='rgb(204, 204, 204)',
-                    projection_type='natural earth'
-                ),
-                height=400,
-                margin={"r":0,"t":0,"l":0,"b":0},
-                showlegend=True,
-                legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5)
-            )
-            st.plotly_chart(fig_map, use_container_width=True)
+        if len(recommendations) > 0:
+            fig_map = transfer_map(recommendations)
+            plot(fig_map, 'transfer_map')
             
             # Show recommendations table
-            if recommendations:
-                st.markdown("##### Recommended Transfers")
-                rec_df = pd.DataFrame(recommendations)
-                st.dataframe(rec_df, use_container_width=True, hide_index=True)
+            st.markdown("##### Recommended Transfers")
+            st.dataframe(recommendations.style.format({'Distance_KM': '{:,.0f}'}), use_container_width=True, hide_index=True)
         else:
             st.info("No stock transfers needed. All locations have balanced inventory levels.")
+        
+        unknown = CITIES.unknown(cat_data['Location'])
+        if unknown:
+            st.caption(f"No coordinates for {', '.join(unknown)}; transfers to or from them can't be planned.")
             
     st.markdown("</div>", unsafe_allow_html=True)
+    
+    # Forecast demand against stock: reorder points that follow each warehouse's order flow
+    st.markdown("---")
+    st.markdown("#### 📦 Demand Forecast & Reorder Points")
+    col1, col2 = st.columns(2)
+    lead_time = col1.slider("Replenishment lead time (days)", 1, 30, LEAD_TIME_DAYS, key="lead_time")
+    service_level = col2.selectbox("Service level", list(SERVICE_LEVELS), index=1, key="service_level")
+    with span('inventory.demand_forecast'):
+        version = dataset_version(df_orders)
+        forecast = demand_model(df_orders, version) if version else fit_demand(df_orders)
+        reorder = reorder_points(cat_data, forecast, lead_time, SERVICE_LEVELS[service_level])
+    due = reorder[reorder['Reorder_Now']]
+    if len(due) > 0:
+        st.warning(f"Reorder now at {', '.join(due['Location'].astype(str))}: stock is below forecast lead-time demand plus safety stock.")
+    else:
+        st.success(f"Every location covers {lead_time} days of forecast demand plus safety stock.")
+    st.dataframe(
+        reorder.drop(columns=['Product_Category']).style.format(
+            {'Forecast_Daily': '{:.2f}', 'Days_Of_Cover': '{:,.0f}'}),
+        use_container_width=True, hide_index=True)
+    st.caption("Daily orders per warehouse forecast by exponential smoothing or a 7-day moving average, "
+               "whichever tracked the history better.")
+    
+    # Outbound demand per warehouse, from the order rollups
+    st.markdown("---")
+    st.markdown("#### 📈 Outbound Order Trend")
+    if st.checkbox("Show orders shipped from each warehouse over time", key="inventory_trend"):
+        rollups = load_rollup_data()
+        if rollups is None:
+            st.error("Order history could not be loaded.")
+        else:
+            render_trends(rollups, "inventory", by='Origin', Origin=list(df_inventory['Location'].unique()))
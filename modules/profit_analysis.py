@@ -0,0 +1,69 @@
+import pandas as pd
+
+# Calculations behind the Vendor Profit Analysis page. Kept free of Streamlit and
+# Plotly so batch jobs can run them for every route at once.
+
+
+def route_kpis(route_carrier_stats, route=None):
+    """Order count, total profit, average margin and loss-making orders per route"""
+    stats = route_carrier_stats
+    if route is not None:
+        stats = stats[stats['Route'] == route]
+    kpis = stats.groupby('Route', sort=True)[['Orders', 'Net_Profit_Sum', 'Margin_Sum', 'Loss_Orders']].sum()
+    return pd.DataFrame({
+        'Route': kpis.index,
+        'Total_Orders': kpis['Orders'].to_numpy(),
+        'Total_Profit': kpis['Net_Profit_Sum'].to_numpy(),
+        'Avg_Margin': (kpis['Margin_Sum'] / kpis['Orders']).to_numpy(),
+        'Loss_Orders': kpis['Loss_Orders'].to_numpy(),
+    })
+
+
+def best_and_worst_carrier(carrier_stats):
+    """Rows of the carriers with the highest and lowest average profit"""
+    best = carrier_stats.loc[carrier_stats['Net_Profit'].idxmax()]
+    worst = carrier_stats.loc[carrier_stats['Net_Profit'].idxmin()]
+    return best, worst
+
+
+def switching_savings(best_profit, worst_profit, worst_orders, pct):
+    """Extra profit from moving pct% of the worst carrier's orders to the best one"""
+    return (best_profit - worst_profit) * (worst_orders * pct / 100)
+
+
+def switch_recommendations(route_carrier_stats, pct):
+    """Best/worst carrier and projected switching savings for every route at once"""
+    stats = route_carrier_stats.assign(
+        Avg_Profit=route_carrier_stats['Net_Profit_Sum'] / route_carrier_stats['Orders'])
+    by_route = stats.groupby('Route', sort=True)['Avg_Profit']
+    best = stats.loc[by_route.idxmax()].set_index('Route')
+    worst = stats.loc[by_route.idxmin()].set_index('Route')
+    result = pd.DataFrame({
+        'Route': best.index,
+        'Best_Carrier': best['Carrier'].to_numpy(),
+        'Best_Avg_Profit': best['Avg_Profit'].to_numpy(),
+        'Worst_Carrier': worst['Carrier'].to_numpy(),
+        'Worst_Avg_Profit': worst['Avg_Profit'].to_numpy(),
+        'Worst_Orders': worst['Orders'].to_numpy(),
+    })
+    result['Switch_Percent'] = pct
+    result['Orders_Switched'] = (result['Worst_Orders'] * pct / 100).astype(int)
+    result['Projected_Savings'] = switching_savings(
+        result['Best_Avg_Profit'], result['Worst_Avg_Profit'], result['Worst_Orders'], pct)
+    # Routes served by a single carrier have nothing to switch
+    same = result['Best_Carrier'] == result['Worst_Carrier']
+    result.loc[same, ['Orders_Switched', 'Projected_Savings']] = 0
+    return result
+
+
+def carrier_table(route_carrier_stats):
+    """Average profit, delivery days and order volume per route and carrier"""
+    stats = route_carrier_stats
+    return pd.DataFrame({
+        'Route': stats['Route'].to_numpy(),
+        'Carrier': stats['Carrier'].to_numpy(),
+        'Avg_Net_Profit': (stats['Net_Profit_Sum'] / stats['Orders']).to_numpy(),
+        'Avg_Delivery_Days': (stats['Delivery_Days_Sum'] / stats['Orders']).to_numpy(),
+        'Orders': stats['Orders'].to_numpy(),
+        'Loss_Orders': stats['Loss_Orders'].to_numpy(),
+    })
@@ -1,7 +1,35 @@
 import streamlit as st
-import plotly.express as px
+from utils.aggregates import COST_COLS, carrier_stats_for_slice
+from utils.datasets import dataset_version
+from utils.data_loader import precomputed, query_backend
+from utils.instrumentation import span, timed
+from modules.profit_analysis import best_and_worst_carrier
+from modules.switch_simulation import simulate_switching, savings_table, portfolio_savings
+from modules.charts import express, plot
+from modules.trend_charts import render_trends
 
-def render_page(df_profit):
+def simulated_savings(df_profit):
+    """Bootstrapped savings for every route and switch percentage: (per-route table, portfolio table)"""
+    with span('profit.switch_simulation'):
+        simulation = simulate_switching(df_profit)
+    return (savings_table(simulation).set_index(['Route', 'Switch_Percent']),
+            portfolio_savings(simulation).set_index('Switch_Percent'))
+
+@st.cache_data(max_entries=4)
+def switch_simulation(_df_profit, version):
+    """simulated_savings, run once per dataset version"""
+    return simulated_savings(_df_profit)
+
+def portfolio_metrics(everywhere):
+    """Savings of switching the same share on every route (a portfolio_savings row)"""
+    p1, p2, p3 = st.columns(3)
+    p1.metric("Portfolio Savings", f"₹{everywhere['Projected_Savings']:,.0f}")
+    p2.metric("90% Interval", f"₹{everywhere['Savings_Low']:,.0f} – ₹{everywhere['Savings_High']:,.0f}")
+    p3.metric("Orders Switched", f"{int(everywhere['Orders_Switched']):,}",
+              delta=f"{int(everywhere['Routes'])} routes", delta_color="off")
+
+@timed('page.profit')
+def render_page(df_profit, cube, rollups):
     # Header with better styling
     st.markdown("""<h1 style='text-align: center;'>Vendor Profit Analysis</h1>""", unsafe_allow_html=True)
     st.markdown("""<p style='font-size: 1.1rem; color: #7f8c8d; margin-bottom: 2rem; text-align: center;'>Optimize carrier selection and maximize profit margins</p>""", unsafe_allow_html=True)
@@ -10,20 +38,37 @@ def render_page(df_profit):
     st.sidebar.markdown("---")
     st.sidebar.markdown("### Filter Options")
     routes = df_profit['Route'].unique()
-    selected_route = st.sidebar.selectbox("Select Route", routes)
+    selected_route = st.sidebar.selectbox("Select Route", ["All Routes", *routes])
+    selected_category = st.sidebar.selectbox("Product Category", ["All Categories", *cube.values['Product_Category']])
+    selected_priority = st.sidebar.selectbox("Priority", ["All Priorities", *cube.values['Priority']])
     
-    # Filter Data
-    route_df = df_profit[df_profit['Route'] == selected_route]
+    # Filter Data (slices of the pre-aggregated profit cube, kept up to date by the loader)
+    filters = {}
+    if selected_route != "All Routes":
+        filters['Route'] = selected_route
+    if selected_category != "All Categories":
+        filters['Product_Category'] = selected_category
+    if selected_priority != "All Priorities":
+        filters['Priority'] = selected_priority
+    sql = query_backend(df_profit=df_profit)
+    if sql is not None:
+        with span('profit.sql_query'):
+            carrier_stats = sql.carrier_stats(**filters)
+            kpis = sql.profit_totals(**filters)
+    else:
+        with span('profit.cube_query'):
+            carrier_stats = carrier_stats_for_slice(cube, **filters)
+            kpis = cube.totals(**filters)
     
     # 2. KPI Section with enhanced styling
     st.markdown("<div style='margin: 2rem 0;'>", unsafe_allow_html=True)
     st.markdown("<h4 style='text-align: center;'>Key Performance Indicators</h4>", unsafe_allow_html=True)
     c1, c2, c3, c4 = st.columns(4)
     
-    total_profit = route_df['Net_Profit'].sum()
-    avg_margin = route_df['Margin_Percent'].mean()
-    bleeding_orders = len(route_df[route_df['Net_Profit'] < 0])
-    total_orders = len(route_df)
+    total_orders = int(kpis['Orders'])
+    total_profit = kpis['Net_Profit_Sum']
+    avg_margin = kpis['Margin_Sum'] / total_orders if total_orders > 0 else 0.0
+    bleeding_orders = int(kpis['Loss_Orders'])
     
     with c1:
         st.metric(
@@ -55,19 +100,14 @@ def render_page(df_profit):
     st.markdown("---")
     
     # 3. Main Analysis Tabs
-    tab1, tab2 = st.tabs(["Performance Analysis", "Optimization Engine"])
+    tab1, tab2, tab3 = st.tabs(["Performance Analysis", "Optimization Engine", "Trends"])
     
     with tab1:
         st.markdown("#### Carrier Performance Matrix")
         st.markdown("<p style='color: #7f8c8d; margin-bottom: 1.5rem;'>Analyze carrier efficiency: profit vs delivery speed</p>", unsafe_allow_html=True)
         
-        carrier_stats = route_df.groupby('Carrier').agg({
-            'Net_Profit': 'mean', 
-            'Actual_Delivery_Days': 'mean', 
-            'Order_ID': 'count'
-        }).reset_index()
-        
-        fig = px.scatter(
+        fig = express(
+            'scatter',
             carrier_stats, 
             x='Actual_Delivery_Days', 
             y='Net_Profit', 
@@ -79,63 +119,111 @@ def render_page(df_profit):
                 'Net_Profit': 'Average Profit (₹)',
                 'Order_ID': 'Order Volume'
             },
-            template="plotly_white"
-        )
-        fig.add_hline(y=0, line_dash="dash", line_color="#e74c3c", annotation_text="Break-even Point")
-        fig.update_layout(
-            height=500,
-            font=dict(family="Arial, sans-serif", size=12),
-            title_font=dict(size=18, color="#2c3e50"),
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+            template="plotly_white",
+            hlines=[dict(y=0, line_dash="dash", line_color="#e74c3c", annotation_text="Break-even Point")],
+            layout=dict(
+                height=500,
+                font=dict(family="Arial, sans-serif", size=12),
+                title_font=dict(size=18, color="#2c3e50"),
+                showlegend=True,
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+            )
         )
-        st.plotly_chart(fig, use_container_width=True)
+        plot(fig, 'carrier_matrix')
         
     with tab2:
         st.markdown("#### Carrier Optimization Simulator")
         st.markdown("<p style='color: #7f8c8d; margin-bottom: 1.5rem;'>Simulate carrier switches to maximize profitability</p>", unsafe_allow_html=True)
         
-        best = carrier_stats.sort_values('Net_Profit', ascending=False).iloc[0]
-        worst = carrier_stats.sort_values('Net_Profit', ascending=True).iloc[0]
+        # Savings come from the precomputed bootstrap table (mean and 90% interval)
+        version = dataset_version(df_profit)
+        if version:
+            route_savings, portfolio = (precomputed('switch_simulation', version)
+                                        or switch_simulation(df_profit, version))
+        else:
+            route_savings, portfolio = simulated_savings(df_profit)
         
-        if worst['Carrier'] != best['Carrier']:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("""
-                    <div style='padding: 1.5rem; background-color: #fee; border-left: 4px solid #e74c3c; border-radius: 8px;'>
-                        <h4 style='color: #c0392b; margin-top: 0;'>Underperforming Carrier</h4>
-                        <p style='font-size: 1.5rem; font-weight: 700; margin: 0.5rem 0; color: #2c3e50;'>{}</p>
-                        <p style='color: #5a6c7d; margin: 0; font-weight: 500;'>Avg Profit: ₹{:,.2f}</p>
-                    </div>
-                """.format(worst['Carrier'], worst['Net_Profit']), unsafe_allow_html=True)
-                
-            with col2:
-                st.markdown("""
-                    <div style='padding: 1.5rem; background-color: #efd; border-left: 4px solid #27ae60; border-radius: 8px;'>
-                        <h4 style='color: #27ae60; margin-top: 0;'>Top Performing Carrier</h4>
-                        <p style='font-size: 1.5rem; font-weight: 700; margin: 0.5rem 0; color: #2c3e50;'>{}</p>
-                        <p style='color: #5a6c7d; margin: 0; font-weight: 500;'>Avg Profit: ₹{:,.2f}</p>
-                    </div>
-                """.format(best['Carrier'], best['Net_Profit']), unsafe_allow_html=True)
-            
-            st.markdown("<div style='margin: 2rem 0;'>", unsafe_allow_html=True)
-            st.markdown("##### Switching Simulation")
+        if selected_route == "All Routes":
+            st.markdown("##### Switch Everywhere")
             pct = st.slider(
-                "Percentage of orders to switch from {} to {}".format(worst['Carrier'], best['Carrier']), 
+                "Percentage of orders to switch from each route's worst carrier to its best",
                 0, 100, 50,
                 help="Adjust the slider to see potential savings"
             )
+            portfolio_metrics(portfolio.loc[float(pct)])
+        else:
+            # Switches are simulated on all of the route's orders
+            if len(filters) > 1:
+                st.caption("The simulator uses every order on {}, ignoring the category and priority filters.".format(selected_route))
+            best, worst = best_and_worst_carrier(carrier_stats_for_slice(cube, Route=selected_route))
+        
+            if worst['Carrier'] != best['Carrier']:
+                col1, col2 = st.columns(2)
             
-            savings = (best['Net_Profit'] - worst['Net_Profit']) * (worst['Order_ID'] * pct/100)
+                with col1:
+                    st.markdown("""
+                        <div style='padding: 1.5rem; background-color: #fee; border-left: 4px solid #e74c3c; border-radius: 8px;'>
+                            <h4 style='color: #c0392b; margin-top: 0;'>Underperforming Carrier</h4>
+                            <p style='font-size: 1.5rem; font-weight: 700; margin: 0.5rem 0; color: #2c3e50;'>{}</p>
+                            <p style='color: #5a6c7d; margin: 0; font-weight: 500;'>Avg Profit: ₹{:,.2f}</p>
+                        </div>
+                    """.format(worst['Carrier'], worst['Net_Profit']), unsafe_allow_html=True)
+                
+                with col2:
+                    st.markdown("""
+                        <div style='padding: 1.5rem; background-color: #efd; border-left: 4px solid #27ae60; border-radius: 8px;'>
+                            <h4 style='color: #27ae60; margin-top: 0;'>Top Performing Carrier</h4>
+                            <p style='font-size: 1.5rem; font-weight: 700; margin: 0.5rem 0; color: #2c3e50;'>{}</p>
+                            <p style='color: #5a6c7d; margin: 0; font-weight: 500;'>Avg Profit: ₹{:,.2f}</p>
+                        </div>
+                    """.format(best['Carrier'], best['Net_Profit']), unsafe_allow_html=True)
             
-            st.markdown("""
-                <div style='padding: 2rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 12px; text-align: center; margin-top: 1.5rem;'>
-                    <p style='color: rgba(255,255,255,0.9); margin: 0; font-size: 1rem;'>PROJECTED MONTHLY SAVINGS</p>
-                    <p style='color: white; font-size: 3rem; font-weight: 700; margin: 0.5rem 0;'>₹{:,.2f}</p>
-                    <p style='color: rgba(255,255,255,0.8); margin: 0; font-size: 0.9rem;'>By switching {}% of orders ({} orders)</p>
-                </div>
-            """.format(savings, pct, int(worst['Order_ID'] * pct/100)), unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-        else:
-            st.info("This route is already using the optimal carrier. No switching recommendations available.")
+                st.markdown("<div style='margin: 2rem 0;'>", unsafe_allow_html=True)
+                st.markdown("##### Switching Simulation")
+                pct = st.slider(
+                    "Percentage of orders to switch from {} to {}".format(worst['Carrier'], best['Carrier']), 
+                    0, 100, 50,
+                    help="Adjust the slider to see potential savings"
+                )
+            
+                savings = route_savings.loc[(selected_route, float(pct))]
+            
+                st.markdown("""
+                    <div style='padding: 2rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 12px; text-align: center; margin-top: 1.5rem;'>
+                        <p style='color: rgba(255,255,255,0.9); margin: 0; font-size: 1rem;'>PROJECTED MONTHLY SAVINGS</p>
+                        <p style='color: white; font-size: 3rem; font-weight: 700; margin: 0.5rem 0;'>₹{:,.2f}</p>
+                        <p style='color: rgba(255,255,255,0.8); margin: 0; font-size: 0.9rem;'>By switching {}% of orders ({} orders)</p>
+                        <p style='color: rgba(255,255,255,0.8); margin: 0.5rem 0 0 0; font-size: 0.9rem;'>90% interval: ₹{:,.2f} to ₹{:,.2f}</p>
+                    </div>
+                """.format(savings['Projected_Savings'], pct, int(savings['Orders_Switched']),
+                           savings['Savings_Low'], savings['Savings_High']), unsafe_allow_html=True)
+                st.caption("Delivery time change per switched order: {:+.1f} days (90% interval {:+.1f} to {:+.1f}). "
+                           "Intervals come from resampling each carrier's orders on this route; "
+                           "carriers with only a few orders give narrow but unreliable intervals.".format(
+                               savings['Days_Change'], savings['Days_Change_Low'], savings['Days_Change_High']))
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+                st.markdown("##### Switch Everywhere")
+                portfolio_metrics(portfolio.loc[float(pct)])
+            else:
+                st.info("This route is already using the optimal carrier. No switching recommendations available.")
+
+    with tab3:
+        st.markdown("#### Profit Trends")
+        st.markdown("<p style='color: #7f8c8d; margin-bottom: 1.5rem;'>Revenue, cost and delivery delays over time, by carrier</p>", unsafe_allow_html=True)
+        
+        # Answered from the daily/weekly/monthly rollups, which are keyed by route, carrier and origin only
+        if 'Product_Category' in filters or 'Priority' in filters:
+            st.caption("Trends cover every product category and priority on the selected route.")
+        route_filter = {'Route': filters['Route']} if 'Route' in filters else {}
+        series = render_trends(rollups, "profit", by='Carrier', **route_filter)
+        
+        if series is not None and len(series):
+            fig = express(
+                'bar', series, x='Period_Start', y=COST_COLS,
+                title="Cost Breakdown",
+                labels={'Period_Start': 'Period', 'value': 'Cost (₹)', 'variable': 'Component'},
+                template="plotly_white",
+                layout=dict(height=400, legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
+            )
+            plot(fig, 'cost_breakdown')
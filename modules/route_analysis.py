@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+# Calculations behind the Smart Route Optimizer page, free of Streamlit and Plotly
+# so batch jobs can run them for every city pair at once.
+
+# Domestic network (used by the "Domestic (India)" route type)
+INDIAN_CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata',
+                 'Hyderabad', 'Ahmedabad', 'Pune']
+
+FUEL_PRICE_PER_L = 100  # ₹100 per liter
+
+
+ROUTE_STAT_COLS = ['Distance_KM', 'Fuel_Consumption_L', 'Toll_Charges_INR',
+                   'Traffic_Delay_Minutes', 'Weather_Impact']
+
+
+def parse_route_data(df_routes):
+    """Parse route data to create origin-destination pairs with statistics.
+
+    Only the distinct ``Route`` labels are split (the column is categorical); each
+    row then just looks up its label's Origin and Destination codes. Both
+    columns share one category list of every city, so they compare directly.
+    Rows whose route has no ``-`` are dropped.
+    """
+    routes = df_routes['Route']
+    if not isinstance(routes.dtype, pd.CategoricalDtype):
+        routes = routes.astype('category')
+    labels = routes.cat.categories.astype(str)
+    parts = labels.str.split('-')
+    valid = parts.str.len() >= 2
+    label_origin = parts.str[0].str.strip()
+    label_dest = parts.str[1].str.strip()
+
+    cities = pd.Index(label_origin[valid]).append(pd.Index(label_dest[valid])).unique().sort_values()
+    origin_codes = np.where(valid, cities.get_indexer(label_origin.fillna('')), -1)
+    dest_codes = np.where(valid, cities.get_indexer(label_dest.fillna('')), -1)
+
+    codes = routes.cat.codes.to_numpy()
+    keep = codes >= 0
+    keep[keep] = valid[codes[keep]]
+    row_codes = codes[keep]
+
+    route_df = pd.DataFrame({
+        'Origin': pd.Categorical.from_codes(origin_codes[row_codes], categories=cities),
+        'Destination': pd.Categorical.from_codes(dest_codes[row_codes], categories=cities),
+    })
+    for col in ROUTE_STAT_COLS:
+        route_df[col] = df_routes[col].array[keep]
+    return route_df
+
+
+def find_routes(route_df, origin, destination):
+    """Routes between two cities, in either direction"""
+    return route_df[
+        ((route_df['Origin'] == origin) & (route_df['Destination'] == destination)) |
+        ((route_df['Origin'] == destination) & (route_df['Destination'] == origin))
+    ]
+
+
+def pair_search(routes_found, ranking, trips):
+    """The routes found between two cities, the shortest one and its top vehicle picks.
+
+    ``trips`` are the rows of ``routes_found`` in ``ranking`` (a rank_fleet
+    result). 'shortest' is None when no route was found and 'vehicles' when
+    there is none or no vehicle is available; vehicle IDs are the integer codes.
+    """
+    search = {'routes': routes_found, 'shortest': None, 'vehicles': None}
+    if len(routes_found) > 0:
+        best = routes_found.index.get_loc(routes_found['Distance_KM'].idxmin())
+        search['shortest'] = routes_found.iloc[best]
+        if len(ranking['vehicles']) > 0:
+            search['vehicles'] = vehicle_picks(ranking, trips[best])
+    return search
+
+
+def top_k_positions(score, k):
+    """Column positions of the ``k`` lowest scores in each row, best first.
+
+    argpartition picks the k candidates per row in linear time; only those k
+    are then sorted.
+    """
+    k = min(k, score.shape[1])
+    if k == 0:
+        return np.empty((len(score), 0), dtype=np.intp)
+    candidates = np.argpartition(score, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(score, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def rank_fleet(df_vehicles, distances, top_n=3, chunk_size=10_000):
+    """Top ``top_n`` available vehicles for every trip distance at once.
+
+    Each vehicle's score for a trip (lower is better) is
+
+        0.4 * fuel cost / trip's max fuel cost + 0.4 * CO2 / trip's max CO2
+        + (1 - 0.2 * (10 - age in years) / 10)
+
+    where fuel cost is distance / km-per-litre × FUEL_PRICE_PER_L, CO2 is
+    kg-per-km × distance and the maxima run over the available fleet. It is
+    computed for a (trips × vehicles) matrix by broadcasting, ``chunk_size``
+    trips at a time to bound its size.
+    Returns a dict with 'vehicles' (the available fleet), 'top' (positions into
+    it per trip, best first), the picks' 'fuel_cost', 'co2_total' and 'score',
+    and each trip's 'max_fuel_cost' and 'max_co2_total' over the whole fleet.
+    """
+    vehicles = df_vehicles[df_vehicles['Status'] == 'Available']
+    distances = np.asarray(distances)
+    fuel_eff = vehicles['Fuel_Efficiency_KM_per_L'].to_numpy()
+    co2_per_km = vehicles['CO2_Emissions_Kg_per_KM'].to_numpy()
+    age_score = 10 - vehicles['Age_Years'].to_numpy()  # Newer is better
+
+    k = min(top_n, len(vehicles))
+    ranking = {
+        'vehicles': vehicles,
+        'top': np.empty((len(distances), k), dtype=np.intp),
+        'fuel_cost': np.empty((len(distances), k)),
+        'co2_total': np.empty((len(distances), k)),
+        'score': np.empty((len(distances), k)),
+        'max_fuel_cost': np.full(len(distances), np.nan),
+        'max_co2_total': np.full(len(distances), np.nan),
+    }
+    if len(vehicles) == 0:
+        return ranking
+
+    for start in range(0, len(distances), chunk_size):
+        rows = slice(start, start + chunk_size)
+        distance = distances[rows, None]
+        fuel_cost = (distance / fuel_eff) * FUEL_PRICE_PER_L
+        co2_total = co2_per_km * distance
+        max_fuel = fuel_cost.max(axis=1, keepdims=True)
+        max_co2 = co2_total.max(axis=1, keepdims=True)
+        score = (fuel_cost / max_fuel * 0.4) + (co2_total / max_co2 * 0.4) + (1 - age_score / 10 * 0.2)
+
+        top = top_k_positions(score, k)
+        ranking['top'][rows] = top
+        ranking['fuel_cost'][rows] = np.take_along_axis(fuel_cost, top, axis=1)
+        ranking['co2_total'][rows] = np.take_along_axis(co2_total, top, axis=1)
+        ranking['score'][rows] = np.take_along_axis(score, top, axis=1)
+        ranking['max_fuel_cost'][rows] = max_fuel[:, 0]
+        ranking['max_co2_total'][rows] = max_co2[:, 0]
+    return ranking
+
+
+def vehicle_picks(ranking, trip):
+    """Vehicle rows picked for one trip of a rank_fleet result, with their trip costs"""
+    picks = ranking['vehicles'].iloc[ranking['top'][trip]].copy()
+    picks['Fuel_Cost'] = ranking['fuel_cost'][trip]
+    picks['CO2_Total'] = ranking['co2_total'][trip]
+    picks['Efficiency_Score'] = ranking['score'][trip]
+    return picks
+
+
+def iter_city_pair_report(route_df, df_vehicles, top_n=3, chunk_size=1000):
+    """Shortest route and top vehicle picks for every city pair with a direct route.
+
+    Pairs are unordered, matching find_routes, and reported once with the two
+    cities in alphabetical order. Results are yielded in frames of up to
+    ``chunk_size`` pairs so callers can stream them out.
+    """
+    origin = route_df['Origin'].astype(str)
+    dest = route_df['Destination'].astype(str)
+    pairs = pd.DataFrame({
+        'City_A': origin.where(origin <= dest, dest),
+        'City_B': dest.where(origin <= dest, origin),
+    })
+    shortest_idx = route_df.assign(**pairs).groupby(['City_A', 'City_B'])['Distance_KM'].idxmin()
+    shortest = pd.concat([pairs.loc[shortest_idx], route_df.loc[shortest_idx]], axis=1)
+    route_counts = pairs.value_counts(['City_A', 'City_B'])
+
+    vehicle_ids = df_vehicles.loc[df_vehicles['Status'] == 'Available', 'Vehicle_ID'].to_numpy()
+    for start in range(0, len(shortest), chunk_size):
+        chunk = shortest.iloc[start:start + chunk_size]
+        pair_index = pd.MultiIndex.from_arrays([chunk['City_A'], chunk['City_B']])
+        report = pd.DataFrame({
+            'Origin': chunk['City_A'].to_numpy(),
+            'Destination': chunk['City_B'].to_numpy(),
+            'Route_Options': route_counts.reindex(pair_index).to_numpy(),
+            'Distance_KM': chunk['Distance_KM'].to_numpy(),
+            'Fuel_Consumption_L': chunk['Fuel_Consumption_L'].to_numpy(),
+            'Toll_Charges_INR': chunk['Toll_Charges_INR'].to_numpy(),
+            'Traffic_Delay_Minutes': chunk['Traffic_Delay_Minutes'].to_numpy(),
+        })
+        ranking = rank_fleet(df_vehicles, report['Distance_KM'].to_numpy(), top_n)
+        for rank in range(ranking['top'].shape[1]):
+            report[f'Vehicle_{rank + 1}'] = vehicle_ids[ranking['top'][:, rank]]
+            report[f'Vehicle_{rank + 1}_Fuel_Cost'] = ranking['fuel_cost'][:, rank]
+            report[f'Vehicle_{rank + 1}_CO2'] = ranking['co2_total'][:, rank]
+        yield report
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+from modules.route_analysis import FUEL_PRICE_PER_L
+
+# Multi-hop routing over the direct routes in routes_distance.csv. Cities are
+# nodes, every parsed route row is an undirected edge (the page treats A-B and
+# B-A as the same route), and all-pairs shortest paths plus next-hop tables are
+# precomputed per weight, so any origin/destination query is a table lookup.
+
+# Weight name -> how to compute it from parse_route_data rows
+WEIGHTS = {
+    'distance': lambda df: df['Distance_KM'].to_numpy(dtype=float),
+    'fuel': lambda df: df['Fuel_Consumption_L'].to_numpy(dtype=float),
+    'toll': lambda df: df['Toll_Charges_INR'].to_numpy(dtype=float),
+    'delay': lambda df: df['Traffic_Delay_Minutes'].to_numpy(dtype=float),
+    'cost': lambda df: (df['Fuel_Consumption_L'].to_numpy(dtype=float) * FUEL_PRICE_PER_L
+                        + df['Toll_Charges_INR'].to_numpy(dtype=float)),
+}
+
+WEIGHT_LABELS = {
+    'distance': 'Shortest distance',
+    'fuel': 'Least fuel',
+    'toll': 'Lowest tolls',
+    'delay': 'Least traffic delay',
+    'cost': 'Lowest fuel + toll cost',
+}
+
+LEG_COLS = ['Distance_KM', 'Fuel_Consumption_L', 'Toll_Charges_INR', 'Traffic_Delay_Minutes']
+
+
+def _floyd_warshall(weights):
+    """All-pairs shortest distances and next hops, one vectorized relaxation per pivot city"""
+    n = len(weights)
+    dist = weights.copy()
+    nodes = np.arange(n)
+    nxt = np.where(np.isfinite(weights), nodes[None, :], -1)
+    nxt[nodes, nodes] = nodes
+    for k in range(n):
+        via = dist[:, k, None] + dist[None, k, :]
+        better = via < dist
+        if better.any():
+            dist[better] = via[better]
+            nxt[better] = np.broadcast_to(nxt[:, k, None], (n, n))[better]
+    return dist, nxt
+
+
+class RouteGraph:
+    """Weighted city graph with precomputed all-pairs shortest paths.
+
+    ``dist[weight][i, j]`` is the best total from city i to city j and
+    ``next_hop[weight][i, j]`` the first city after i on that path, so totals are
+    a single lookup and paths are read off hop by hop. ``edge_row[weight][i, j]``
+    is the route row used for the direct leg between i and j.
+    """
+
+    def __init__(self, route_df, weights=tuple(WEIGHTS)):
+        self.weights = list(weights)
+        self.routes = route_df.reset_index(drop=True)
+        self.cities = pd.Index([], dtype=object)
+        self.direct = {w: np.zeros((0, 0)) for w in self.weights}
+        self.edge_row = {w: np.zeros((0, 0), dtype=np.int64) for w in self.weights}
+        self.dist = {w: np.zeros((0, 0)) for w in self.weights}
+        self.next_hop = {w: np.zeros((0, 0), dtype=np.int64) for w in self.weights}
+        self._add_cities(self.routes)
+
+        origin, dest = self._codes(self.routes)
+        # Both directions of every row, so A-B and B-A rows compete for the same cells
+        a, b = np.concatenate([origin, dest]), np.concatenate([dest, origin])
+        rows = np.tile(np.arange(len(self.routes)), 2)
+        loops = a == b
+        for w in self.weights:
+            values = np.tile(WEIGHTS[w](self.routes), 2)
+            # Parallel routes: write heaviest first so the lightest row wins each cell
+            order = np.argsort(values, kind='stable')[::-1]
+            order = order[~loops[order]]
+            self.direct[w][a[order], b[order]] = values[order]
+            self.edge_row[w][a[order], b[order]] = rows[order]
+            self.dist[w], self.next_hop[w] = _floyd_warshall(self.direct[w])
+
+    def _add_cities(self, route_df):
+        new = pd.Index(pd.unique(np.concatenate([
+            route_df['Origin'].astype(str).to_numpy(), route_df['Destination'].astype(str).to_numpy()])))
+        new = new.difference(self.cities, sort=False)
+        if len(new) == 0:
+            return
+        old_n, n = len(self.cities), len(self.cities) + len(new)
+        self.cities = self.cities.append(new)
+
+        def grow(matrix, fill):
+            grown = np.full((n, n), fill, dtype=matrix.dtype)
+            grown[:old_n, :old_n] = matrix
+            return grown
+
+        added = np.arange(old_n, n)
+        for w in self.weights:
+            self.edge_row[w] = grow(self.edge_row[w], -1)
+            for table in (self.direct, self.dist):
+                table[w] = grow(table[w], np.inf)
+                table[w][added, added] = 0
+            self.next_hop[w] = grow(self.next_hop[w], -1)
+            self.next_hop[w][added, added] = added
+
+    def _codes(self, route_df):
+        return (self.cities.get_indexer(route_df['Origin'].astype(str)),
+                self.cities.get_indexer(route_df['Destination'].astype(str)))
+
+    def add_routes(self, new_routes):
+        """Fold newly ingested route rows into the shortest-path tables.
+
+        New rows can only add edges or make existing ones cheaper, so each one
+        is applied as an edge-weight decrease: every pair is re-checked for a
+        shorter path through the new leg in O(cities²) instead of re-solving.
+        """
+        new_routes = new_routes.reset_index(drop=True)
+        first_row = len(self.routes)
+        self.routes = pd.concat([self.routes, new_routes], ignore_index=True)
+        self._add_cities(new_routes)
+        origin, dest = self._codes(new_routes)
+        for w in self.weights:
+            values = WEIGHTS[w](new_routes)
+            dist, nxt = self.dist[w], self.next_hop[w]
+            for i, (u, v, weight) in enumerate(zip(origin, dest, values)):
+                if u == v or weight >= self.direct[w][u, v]:
+                    continue
+                self.direct[w][u, v] = self.direct[w][v, u] = weight
+                self.edge_row[w][u, v] = self.edge_row[w][v, u] = first_row + i
+                for a, b in ((u, v), (v, u)):
+                    via = dist[:, a, None] + weight + dist[None, b, :]
+                    better = via < dist
+                    if better.any():
+                        hop = nxt[:, a].copy()
+                        hop[a] = b
+                        dist[better] = via[better]
+                        nxt[better] = np.broadcast_to(hop[:, None], dist.shape)[better]
+        return self
+
+    def total(self, origin, destination, weight='distance'):
+        """Best total weight between two cities (inf if unreachable, None if unknown)"""
+        i, j = self.cities.get_indexer([origin, destination])
+        if i < 0 or j < 0:
+            return None
+        return self.dist[weight][i, j]
+
+    def shortest_path(self, origin, destination, weight='distance'):
+        """Best path between two cities, or None if either is unknown or unreachable.
+
+        Returns a dict with the city sequence, one row per leg (the route row
+        used, with its distance, fuel, toll and delay) and the leg totals.
+        """
+        i, j = self.cities.get_indexer([origin, destination])
+        if i < 0 or j < 0 or i == j or not np.isfinite(self.dist[weight][i, j]):
+            return None
+
+        nxt, edge_row = self.next_hop[weight], self.edge_row[weight]
+        path = [i]
+        while path[-1] != j:
+            path.append(nxt[path[-1], j])
+        rows = [edge_row[a, b] for a, b in zip(path[:-1], path[1:])]
+
+        legs = self.routes.loc[rows, LEG_COLS].reset_index(drop=True)
+        legs.insert(0, 'From', self.cities[path[:-1]])
+        legs.insert(1, 'To', self.cities[path[1:]])
+        return {
+            'cities': list(self.cities[path]),
+            'legs': legs,
+            'weight': weight,
+            'total': self.dist[weight][i, j],
+            'totals': legs[LEG_COLS].sum().to_dict(),
+        }
@@ -1,58 +1,184 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
-import numpy as np
+import copy
+import threading
+from utils.datasets import format_ids, dataset_version, is_appended_version
+from utils.geo import CITIES
+from utils.result_cache import LRUCache
+from utils.instrumentation import register_collector, span, timed
+from modules.route_analysis import (INDIAN_CITIES, parse_route_data, find_routes,
+                                    rank_fleet, pair_search)
+from modules.route_graph import RouteGraph, WEIGHT_LABELS
+from modules.fleet_assignment import DEFAULT_ORDER_WEIGHT_KG, ORDER_WEIGHT_KG, pending_orders, assign_fleet
+from utils.data_loader import load_dispatch_data, load_rollup_data, precomputed
+from utils.precompute import pair_key
+from modules.charts import cached_figure, express, plot, segment_trace
+from modules.trend_charts import render_trends
 
-# City coordinates for map visualization
-CITY_COORDS = {
-    "Mumbai": {"lat": 19.0760, "lon": 72.8777},
-    "Delhi": {"lat": 28.7041, "lon": 77.1025},
-    "Bangalore": {"lat": 12.9716, "lon": 77.5946},
-    "Chennai": {"lat": 13.0827, "lon": 80.2707},
-    "Kolkata": {"lat": 22.5726, "lon": 88.3639},
-    "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
-    "Ahmedabad": {"lat": 23.0225, "lon": 72.5714},
-    "Pune": {"lat": 18.5204, "lon": 73.8567},
-    "Dubai": {"lat": 25.2048, "lon": 55.2708},
-    "Singapore": {"lat": 1.3521, "lon": 103.8198},
-    "Bangkok": {"lat": 13.7563, "lon": 100.5018},
-    "Hong Kong": {"lat": 22.3193, "lon": 114.1694}
-}
+SEARCH_CACHE_ENTRIES = 256
 
-def parse_route_data(df_routes):
-    """Parse route data to create origin-destination pairs with statistics"""
-    route_stats = []
-    
-    for _, row in df_routes.iterrows():
-        route = row['Route']
-        if '-' in route:
-            parts = route.split('-')
-            origin = parts[0].strip()
-            destination = parts[1].strip()
-            
-            route_stats.append({
-                'Origin': origin,
-                'Destination': destination,
-                'Distance_KM': row['Distance_KM'],
-                'Fuel_Consumption_L': row['Fuel_Consumption_L'],
-                'Toll_Charges_INR': row['Toll_Charges_INR'],
-                'Traffic_Delay_Minutes': row['Traffic_Delay_Minutes'],
-                'Weather_Impact': row['Weather_Impact']
-            })
+@st.cache_data(max_entries=4)
+def parsed_routes(_df_routes, version):
+    """parse_route_data, computed once per dataset version rather than on every rerun"""
+    return parse_route_data(_df_routes)
+
+@st.cache_data(max_entries=4)
+def fleet_ranking(_route_df, _df_vehicles, routes_version, vehicles_version):
+    """Top vehicles for every parsed route, scored in one batch per dataset version"""
+    return rank_fleet(_df_vehicles, _route_df['Distance_KM'].to_numpy(), top_n=3)
+
+@st.cache_resource
+def _latest_route_graph():
+    """Most recent RouteGraph and its routes version, shared by every session, with the lock guarding them"""
+    return {'lock': threading.Lock()}
+
+def route_graph(route_df, version):
+    """All-pairs route graph for this routes version.
+
+    Built once per version; when routes_distance.csv has only had rows appended
+    since the previous graph, those rows are folded into a copy of it instead.
+    Sessions asking at the same time wait for one build rather than racing it.
+    """
+    if not version:
+        return RouteGraph(route_df)
+    latest = _latest_route_graph()
+    with latest['lock']:
+        graph = latest.get('graph')
+        if graph is not None and latest['version'] == version:
+            return graph
+        if (graph is not None and len(route_df) > len(graph.routes)
+                and is_appended_version('routes', latest['version'])):
+            graph = copy.deepcopy(graph).add_routes(route_df.iloc[len(graph.routes):])
+        else:
+            graph = RouteGraph(route_df)
+        latest.update(graph=graph, version=version)
+        return graph
+
+@st.cache_data(max_entries=4)
+def dispatch_plan(_route_df, _df_routes, _df_vehicles, _df_orders, _df_perf, versions):
+    """Fleet-to-orders assignment for every pending order, once per set of dataset versions"""
+    graph = route_graph(_route_df, versions[0])
+    pending = pending_orders(_df_orders, _df_perf, _df_routes, graph)
+    return assign_fleet(pending, _df_vehicles, graph)
+
+@st.cache_resource
+def route_search_cache():
+    """LRU of route searches, shared by every session in the process"""
+    cache = LRUCache(max_entries=SEARCH_CACHE_ENTRIES)
+    register_collector('route_search_cache', cache.stats)
+    return cache
+
+def route_search(route_df, ranking, origin, destination):
+    """pair_search for two cities, with vehicle IDs formatted for display"""
+    routes_found = find_routes(route_df, origin, destination)
+    # route_df has a RangeIndex, so its labels are the ranking's rows
+    search = pair_search(routes_found, ranking, routes_found.index)
+    if search['vehicles'] is not None:
+        search['vehicles']['Vehicle_ID'] = format_ids(search['vehicles']['Vehicle_ID'], 'Vehicle_ID')
+    return search
+
+@cached_figure
+@timed('chart.build.route_map')
+def route_map(routes_found, shortest_idx, center):
+    """Map of the direct routes found, highlighting the shortest; centered on ``center`` (lat, lon) if given"""
+    # One trace per style, shortest route on top (cities without coordinates are left off the map)
+    origin_lat, origin_lon = CITIES.coords(routes_found['Origin'])
+    dest_lat, dest_lon = CITIES.coords(routes_found['Destination'])
+    labels = routes_found['Origin'].astype(str) + ' → ' + routes_found['Destination'].astype(str)
+    details = routes_found[['Distance_KM', 'Fuel_Consumption_L', 'Toll_Charges_INR']]
+    hovertemplate = ('%{text}<br><b>%{customdata[0]:.2f} km</b><br>Fuel: %{customdata[1]:.2f}L<br>'
+                     'Toll: ₹%{customdata[2]:.2f}<extra></extra>')
+    fig = go.Figure()
+    for is_shortest in (False, True):
+        rows = (routes_found.index == shortest_idx) == is_shortest
+        if not rows.any():
+            continue
+        name = "Other routes"
+        if is_shortest:
+            route = routes_found.loc[shortest_idx]
+            name = f"{labels[shortest_idx]} ({route['Distance_KM']:.0f} km) [SHORTEST]"
+        fig.add_trace(segment_trace(
+            origin_lat[rows], origin_lon[rows], dest_lat[rows], dest_lon[rows],
+            text=labels[rows],
+            customdata=details[rows],
+            mode='lines+markers',
+            line=dict(width=3 if is_shortest else 1, 
+                     color='green' if is_shortest else 'blue'),
+            marker=dict(size=10 if is_shortest else 6),
+            name=name,
+            hovertemplate=hovertemplate
+        ))
     
-    return pd.DataFrame(route_stats)
+    # Update map layout
+    if center is not None:
+        fig.update_layout(
+            geo=dict(
+                scope='asia',
+                projection_type='natural earth',
+                showland=True,
+                landcolor='rgb(243, 243, 243)',
+                coastlinecolor='rgb(204, 204, 204)',
+                center=dict(lat=center[0], lon=center[1]),
+                projection_scale=3
+            ),
+            height=500,
+            margin={"r": 0, "t": 30, "l": 0, "b": 0},
+            showlegend=True
+        )
+    else:
+        fig.update_layout(
+            geo_scope='asia',
+            height=500,
+            margin={"r": 0, "t": 30, "l": 0, "b": 0}
+        )
+    return fig
+
+@cached_figure
+@timed('chart.build.path_map')
+def path_map(cities):
+    """Map of a multi-stop route through ``cities``"""
+    stop_lat, stop_lon = CITIES.coords(cities)
+    fig = go.Figure(go.Scattergeo(
+        lon=stop_lon,
+        lat=stop_lat,
+        mode='lines+markers+text',
+        text=cities,
+        textposition='top center',
+        line=dict(width=3, color='green'),
+        marker=dict(size=10),
+        name=' → '.join(cities)
+    ))
+    fig.update_layout(
+        geo=dict(
+            scope='asia',
+            projection_type='natural earth',
+            showland=True,
+            landcolor='rgb(243, 243, 243)',
+            coastlinecolor='rgb(204, 204, 204)'
+        ),
+        height=500,
+        margin={"r": 0, "t": 30, "l": 0, "b": 0}
+    )
+    return fig
 
+@timed('page.route')
 def render_page(df_routes, df_vehicles):
     # Header with professional styling
     st.markdown("""<h1 style='text-align: center;'>Smart Route Optimizer</h1>""", unsafe_allow_html=True)
     st.markdown("""<p style='font-size: 1.1rem; color: #7f8c8d; margin-bottom: 2rem; text-align: center;'>Find the shortest, most efficient, and cost-effective delivery routes</p>""", unsafe_allow_html=True)
     
     # Parse route data
-    route_df = parse_route_data(df_routes)
+    version = dataset_version(df_routes)
+    with span('route.parse_routes'):
+        route_df = parsed_routes(df_routes, version) if version else parse_route_data(df_routes)
+    vehicles_version = dataset_version(df_vehicles)
+    with span('route.rank_fleet'):
+        if version and vehicles_version:
+            ranking = fleet_ranking(route_df, df_vehicles, version, vehicles_version)
+        else:
+            ranking = rank_fleet(df_vehicles, route_df['Distance_KM'].to_numpy(), top_n=3)
     
     # Get unique cities (only Indian cities for domestic routes)
-    indian_cities = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 
-                     'Hyderabad', 'Ahmedabad', 'Pune']
     all_cities = list(set(route_df['Origin'].unique()) | set(route_df['Destination'].unique()))
     
     # Filter options with sidebar
@@ -61,7 +187,7 @@ def render_page(df_routes, df_vehicles):
     route_type = st.sidebar.selectbox("Route Type", ["Domestic (India)", "International", "All Routes"])
     
     if route_type == "Domestic (India)":
-        available_cities = [c for c in indian_cities if c in all_cities]
+        available_cities = [c for c in INDIAN_CITIES if c in all_cities]
     else:
         available_cities = sorted(all_cities)
     
@@ -86,17 +212,24 @@ def render_page(df_routes, df_vehicles):
     
     st.markdown("<br>", unsafe_allow_html=True)
     
-    # Find all routes between selected cities
-    routes_found = route_df[
-        ((route_df['Origin'] == origin) & (route_df['Destination'] == destination)) |
-        ((route_df['Origin'] == destination) & (route_df['Destination'] == origin))
-    ]
+    # Find all routes between selected cities (users flip between a few pairs, so searches are kept per dataset version)
+    with span('route.search'):
+        searches = precomputed('route_searches', (version, vehicles_version)) if version and vehicles_version else None
+        if searches is not None and pair_key(origin, destination) in searches:
+            search = searches[pair_key(origin, destination)]
+        elif version and vehicles_version:
+            search = route_search_cache().get_or_compute(
+                (origin, destination, route_type), (version, vehicles_version),
+                lambda: route_search(route_df, ranking, origin, destination))
+        else:
+            search = route_search(route_df, ranking, origin, destination)
+    routes_found = search['routes']
     
     if len(routes_found) > 0:
         st.markdown("---")
         
         # Show shortest route
-        shortest = routes_found.loc[routes_found['Distance_KM'].idxmin()]
+        shortest = search['shortest']
         
         # KPIs with enhanced card design
         st.markdown("#### Optimal Route Metrics")
@@ -146,31 +279,11 @@ def render_page(df_routes, df_vehicles):
         st.markdown("#### 🚛 Smart Vehicle Recommendation")
         st.markdown("<p style='color: #7f8c8d; margin-bottom: 1.5rem;'>AI-powered vehicle selection based on route distance, fuel efficiency, and emissions</p>", unsafe_allow_html=True)
         
-        # Calculate vehicle suitability scores
-        distance = shortest['Distance_KM']
-        fuel_needed = shortest['Fuel_Consumption_L']
-        
-        # Filter available vehicles
-        available_vehicles = df_vehicles[df_vehicles['Status'] == 'Available'].copy()
+        # Look up this route's row of the precomputed fleet ranking
+        available_vehicles = ranking['vehicles']
         
         if len(available_vehicles) > 0:
-            # Calculate efficiency scores
-            available_vehicles['Fuel_Cost'] = (distance / available_vehicles['Fuel_Efficiency_KM_per_L']) * 100  # ₹100 per liter
-            available_vehicles['CO2_Total'] = available_vehicles['CO2_Emissions_Kg_per_KM'] * distance
-            available_vehicles['Age_Score'] = 10 - available_vehicles['Age_Years']  # Newer is better
-            
-            # Normalize and calculate composite score (lower is better)
-            available_vehicles['Efficiency_Score'] = (
-                (available_vehicles['Fuel_Cost'] / available_vehicles['Fuel_Cost'].max() * 0.4) +
-                (available_vehicles['CO2_Total'] / available_vehicles['CO2_Total'].max() * 0.4) +
-                (1 - available_vehicles['Age_Score'] / 10 * 0.2)
-            )
-            
-            # Sort by efficiency score
-            available_vehicles = available_vehicles.sort_values('Efficiency_Score')
-            
-            # Get top 3 recommendations
-            top_vehicles = available_vehicles.head(3)
+            top_vehicles = search['vehicles']
             
             # Display recommendations in cards
             cols = st.columns(3)
@@ -209,47 +322,43 @@ def render_page(df_routes, df_vehicles):
             
             with col1:
                 # Cost comparison chart
-                import plotly.express as px
-                cost_comparison = top_vehicles[['Vehicle_ID', 'Fuel_Cost']].copy()
-                cost_comparison['Savings'] = cost_comparison['Fuel_Cost'].max() - cost_comparison['Fuel_Cost']
-                
-                fig_cost = px.bar(
-                    cost_comparison,
+                fig_cost = express(
+                    'bar',
+                    top_vehicles[['Vehicle_ID', 'Fuel_Cost']],
                     x='Vehicle_ID',
                     y='Fuel_Cost',
                     title='Fuel Cost Comparison',
                     labels={'Fuel_Cost': 'Fuel Cost (₹)', 'Vehicle_ID': 'Vehicle'},
                     color='Fuel_Cost',
                     color_continuous_scale=['#27ae60', '#f39c12', '#e74c3c'],
-                    text='Fuel_Cost'
+                    text='Fuel_Cost',
+                    traces=dict(texttemplate='₹%{text:.0f}', textposition='outside'),
+                    layout=dict(showlegend=False, height=350)
                 )
-                fig_cost.update_traces(texttemplate='₹%{text:.0f}', textposition='outside')
-                fig_cost.update_layout(showlegend=False, height=350)
-                st.plotly_chart(fig_cost, use_container_width=True)
+                plot(fig_cost, 'fuel_cost')
             
             with col2:
                 # CO2 comparison chart
-                co2_comparison = top_vehicles[['Vehicle_ID', 'CO2_Total']].copy()
-                
-                fig_co2 = px.bar(
-                    co2_comparison,
+                fig_co2 = express(
+                    'bar',
+                    top_vehicles[['Vehicle_ID', 'CO2_Total']],
                     x='Vehicle_ID',
                     y='CO2_Total',
                     title='CO2 Emissions Comparison',
                     labels={'CO2_Total': 'CO2 Emissions (kg)', 'Vehicle_ID': 'Vehicle'},
                     color='CO2_Total',
                     color_continuous_scale=['#27ae60', '#f39c12', '#e74c3c'],
-                    text='CO2_Total'
+                    text='CO2_Total',
+                    traces=dict(texttemplate='%{text:.1f} kg', textposition='outside'),
+                    layout=dict(showlegend=False, height=350)
                 )
-                fig_co2.update_traces(texttemplate='%{text:.1f} kg', textposition='outside')
-                fig_co2.update_layout(showlegend=False, height=350)
-                st.plotly_chart(fig_co2, use_container_width=True)
+                plot(fig_co2, 'co2')
             
             # Savings Summary
             best_vehicle = top_vehicles.iloc[0]
-            worst_cost = available_vehicles['Fuel_Cost'].max()
+            worst_cost = ranking['max_fuel_cost'][shortest.name]
             savings = worst_cost - best_vehicle['Fuel_Cost']
-            co2_reduction = available_vehicles['CO2_Total'].max() - best_vehicle['CO2_Total']
+            co2_reduction = ranking['max_co2_total'][shortest.name] - best_vehicle['CO2_Total']
             
             st.markdown(f"""
                 <div style='padding: 2rem; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 12px; text-align: center; margin: 1.5rem 0;'>
@@ -313,58 +422,17 @@ def render_page(df_routes, df_vehicles):
         st.markdown("#### Interactive Route Map")
         st.markdown("<p style='color: #7f8c8d; margin-bottom: 1rem;'>Visual representation of available routes</p>", unsafe_allow_html=True)
         
-        fig = go.Figure()
-        
-        # Plot all found routes
-        for idx, route in routes_found.iterrows():
-            origin_coords = CITY_COORDS.get(route['Origin'], {"lat": 20, "lon": 78})
-            dest_coords = CITY_COORDS.get(route['Destination'], {"lat": 20, "lon": 78})
-            
-            is_shortest = (idx == shortest.name)
-            
-            # Draw route line
-            fig.add_trace(go.Scattergeo(
-                lon=[origin_coords['lon'], dest_coords['lon']],
-                lat=[origin_coords['lat'], dest_coords['lat']],
-                mode='lines+markers',
-                line=dict(width=3 if is_shortest else 1, 
-                         color='green' if is_shortest else 'blue'),
-                marker=dict(size=10 if is_shortest else 6),
-                name=f"{route['Origin']} → {route['Destination']} ({route['Distance_KM']:.0f} km)" + 
-                     (" [SHORTEST]" if is_shortest else ""),
-                text=f"{route['Distance_KM']:.2f} km",
-                hovertemplate='<b>%{text}</b><br>Fuel: ' + f"{route['Fuel_Consumption_L']:.2f}L<br>" +
-                             f"Toll: ₹{route['Toll_Charges_INR']:.2f}<extra></extra>"
-            ))
-        
-        # Update map layout
-        if origin in CITY_COORDS and destination in CITY_COORDS:
-            # Center map between the two cities
-            center_lat = (CITY_COORDS[origin]['lat'] + CITY_COORDS[destination]['lat']) / 2
-            center_lon = (CITY_COORDS[origin]['lon'] + CITY_COORDS[destination]['lon']) / 2
-            
-            fig.update_layout(
-                geo=dict(
-                    scope='asia',
-                    projection_type='natural earth',
-                    showland=True,
-                    landcolor='rgb(243, 243, 243)',
-                    coastlinecolor='rgb(204, 204, 204)',
-                    center=dict(lat=center_lat, lon=center_lon),
-                    projection_scale=3
-                ),
-                height=500,
-                margin={"r": 0, "t": 30, "l": 0, "b": 0},
-                showlegend=True
-            )
-        else:
-            fig.update_layout(
-                geo_scope='asia',
-                height=500,
-                margin={"r": 0, "t": 30, "l": 0, "b": 0}
-            )
+        # Center map between the two cities when both can be placed
+        unknown = CITIES.report_unknown([origin, destination], "route map")
+        center = None
+        if not unknown:
+            (lat_a, lat_b), (lon_a, lon_b) = CITIES.coords([origin, destination])
+            center = ((lat_a + lat_b) / 2, (lon_a + lon_b) / 2)
+        fig = route_map(routes_found, shortest.name, center)
         
-        st.plotly_chart(fig, use_container_width=True)
+        plot(fig, 'route_map')
+        if unknown:
+            st.caption(f"Not shown on the map (no coordinates): {', '.join(unknown)}")
         
         # Cost comparison
         if len(routes_found) > 1:
@@ -373,19 +441,143 @@ def render_page(df_routes, df_vehicles):
             cost_df = routes_found.copy()
             cost_df['Fuel_Cost_INR'] = cost_df['Fuel_Consumption_L'] * 100  # ₹100 per liter
             cost_df['Total_Cost_INR'] = cost_df['Fuel_Cost_INR'] + cost_df['Toll_Charges_INR']
-            cost_df['Route_Label'] = cost_df['Origin'] + ' → ' + cost_df['Destination']
+            cost_df['Route_Label'] = cost_df['Origin'].astype(str) + ' → ' + cost_df['Destination'].astype(str)
             
-            import plotly.express as px
-            fig_cost = px.bar(cost_df, x='Route_Label', y=['Fuel_Cost_INR', 'Toll_Charges_INR'],
-                             title="Cost Breakdown by Route",
-                             labels={'value': 'Cost (INR)', 'Route_Label': 'Route'},
-                             barmode='stack',
-                             color_discrete_map={'Fuel_Cost_INR': '#FF6B6B', 'Toll_Charges_INR': '#4ECDC4'})
-            st.plotly_chart(fig_cost, use_container_width=True)
+            fig_cost = express('bar', cost_df[['Route_Label', 'Fuel_Cost_INR', 'Toll_Charges_INR']],
+                               x='Route_Label', y=['Fuel_Cost_INR', 'Toll_Charges_INR'],
+                               title="Cost Breakdown by Route",
+                               labels={'value': 'Cost (INR)', 'Route_Label': 'Route'},
+                               barmode='stack',
+                               color_discrete_map={'Fuel_Cost_INR': '#FF6B6B', 'Toll_Charges_INR': '#4ECDC4'})
+            plot(fig_cost, 'route_costs')
     
     else:
         st.warning(f"No direct routes found between {origin} and {destination} in the dataset.")
-        st.info("Try selecting different cities or check if the route exists in your data.")
+
+        # Fall back to the best connecting route through other cities
+        with span('route.graph'):
+            graph = route_graph(route_df, version)
+        weight = st.selectbox("Optimize Connecting Route For", list(WEIGHT_LABELS),
+                              format_func=WEIGHT_LABELS.get, key="route_weight")
+        with span('route.shortest_path'):
+            path = graph.shortest_path(origin, destination, weight)
+
+        if path is None:
+            st.info("Try selecting different cities or check if the route exists in your data.")
+        else:
+            st.markdown("---")
+            st.markdown("#### Multi-Stop Route")
+            st.markdown(f"<p style='color: #7f8c8d; margin-bottom: 1rem;'>{' → '.join(path['cities'])} "
+                        f"({len(path['legs'])} legs)</p>", unsafe_allow_html=True)
+
+            totals = path['totals']
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Distance", f"{totals['Distance_KM']:.1f} km")
+            col2.metric("Fuel", f"{totals['Fuel_Consumption_L']:.1f} L")
+            col3.metric("Toll", f"₹{totals['Toll_Charges_INR']:.0f}")
+            col4.metric("Delay", f"{totals['Traffic_Delay_Minutes']:.0f} min")
+
+            legs_df = path['legs'].rename(columns={
+                'Distance_KM': 'Distance (km)',
+                'Fuel_Consumption_L': 'Fuel (L)',
+                'Toll_Charges_INR': 'Toll (₹)',
+                'Traffic_Delay_Minutes': 'Delay (min)'
+            })
+            st.dataframe(
+                legs_df.style.format({
+                    'Distance (km)': '{:.2f}',
+                    'Fuel (L)': '{:.2f}',
+                    'Toll (₹)': '{:,.2f}'
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
+            unknown = CITIES.report_unknown(path['cities'], "route map")
+            fig = path_map(path['cities'])
+            plot(fig, 'path_map')
+            if unknown:
+                st.caption(f"Not shown on the map (no coordinates): {', '.join(unknown)}")
+    
+    # FLEET DISPATCH SECTION
+    st.markdown("---")
+    st.markdown("### 🚚 Fleet Dispatch Plan")
+    st.markdown("<p style='color: #7f8c8d; margin-bottom: 1rem;'>Assign every pending order to an available vehicle at minimum fuel, CO2, repositioning and age cost, within vehicle capacity</p>", unsafe_allow_html=True)
+    
+    if st.checkbox("Plan dispatch for all pending orders", key="plan_dispatch"):
+        df_orders, df_perf = load_dispatch_data()
+        if df_orders is None or df_perf is None:
+            st.error("Orders or delivery data could not be loaded.")
+        else:
+            versions = tuple(dataset_version(df) for df in [df_routes, df_vehicles, df_orders, df_perf])
+            with span('route.dispatch_plan'):
+                if all(versions):
+                    assignments, unassigned = dispatch_plan(route_df, df_routes, df_vehicles, df_orders, df_perf, versions)
+                else:
+                    graph = route_graph(route_df, version)
+                    assignments, unassigned = assign_fleet(pending_orders(df_orders, df_perf, df_routes, graph),
+                                                           df_vehicles, graph)
+            
+            estimated = sum(int(df['Weight_Estimated'].sum()) for df in (assignments, unassigned)
+                            if 'Weight_Estimated' in df.columns)
+            if estimated:
+                assumed = ', '.join(f"{category} {kg} kg" for category, kg in ORDER_WEIGHT_KG.items())
+                st.info(f"⚖️ Capacity checks use estimated weights for {estimated} of "
+                        f"{len(assignments) + len(unassigned)} pending orders: orders.csv has no weight for them, "
+                        f"so a typical parcel weight per category is assumed ({assumed}; "
+                        f"{DEFAULT_ORDER_WEIGHT_KG} kg otherwise). Add a Weight_KG column to orders.csv to use real weights.")
+            
+            if len(assignments) == 0:
+                st.warning("⚠️ No pending orders could be assigned to the available fleet.")
+            else:
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Orders Planned", len(assignments))
+                col2.metric("Vehicles Used", assignments['Vehicle_ID'].nunique())
+                col3.metric("Dispatch Waves", int(assignments['Wave'].max()))
+                col4.metric("Total Cost", f"₹{assignments['Total_Cost'].sum():,.0f}")
+                
+                plan_df = assignments[['Order_ID', 'Vehicle_ID', 'Wave', 'Origin', 'Destination', 'Weight_KG',
+                                       'Weight_Estimated', 'Capacity_KG', 'Trip_KM', 'Reposition_KM',
+                                       'Total_Cost']].copy()
+                plan_df['Order_ID'] = format_ids(plan_df['Order_ID'], 'Order_ID')
+                plan_df['Vehicle_ID'] = format_ids(plan_df['Vehicle_ID'], 'Vehicle_ID')
+                st.dataframe(
+                    plan_df.rename(columns={
+                        'Weight_KG': 'Weight (kg)',
+                        'Weight_Estimated': 'Estimated Weight',
+                        'Capacity_KG': 'Capacity (kg)',
+                        'Trip_KM': 'Trip (km)',
+                        'Reposition_KM': 'Empty Run (km)',
+                        'Total_Cost': 'Cost (₹)'
+                    }).style.format({
+                        'Weight (kg)': '{:.0f}',
+                        'Capacity (kg)': '{:.0f}',
+                        'Trip (km)': '{:.1f}',
+                        'Empty Run (km)': '{:.1f}',
+                        'Cost (₹)': '{:,.0f}'
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            
+            if len(unassigned) > 0:
+                st.markdown("##### Orders Not Assigned")
+                unassigned = unassigned.assign(Order_ID=format_ids(unassigned['Order_ID'], 'Order_ID')).rename(
+                    columns={'Weight_Estimated': 'Estimated Weight'})
+                st.dataframe(unassigned, use_container_width=True, hide_index=True)
+    
+    # ROUTE TREND SECTION
+    st.markdown("---")
+    st.markdown("### 📈 Route Trend")
+    st.markdown("<p style='color: #7f8c8d; margin-bottom: 1rem;'>Orders, revenue, profit and delivery delays between the selected cities over time, in both directions</p>", unsafe_allow_html=True)
+    
+    if st.checkbox("Show order history for this route", key="route_trend"):
+        rollups = load_rollup_data()
+        if rollups is None:
+            st.error("Order history could not be loaded.")
+        else:
+            render_trends(rollups, "route", by='Carrier',
+                          Route=[f"{origin}-{destination}", f"{destination}-{origin}"])
     
     # Additional statistics
     st.markdown("---")
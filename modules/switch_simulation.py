@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+
+# Bootstrap simulation of carrier switches. For every route the best and worst
+# carriers are the ones with the highest and lowest average profit (as on the
+# Vendor Profit Analysis page); their order-level Net_Profit and
+# Actual_Delivery_Days are resampled to put confidence intervals around the
+# gain of moving orders from the worst carrier to the best one.
+
+SWITCH_PERCENTS = np.arange(0, 101)
+
+
+def _carrier_samples(df_profit):
+    """Best and worst carrier orders per route, grouped contiguously.
+
+    Returns the per-route frame and the (orders × 2) profit/days values ordered
+    by group, where group ``2 * i`` is route i's best carrier and ``2 * i + 1``
+    its worst, with each group's size. Routes with one carrier are left out.
+    """
+    orders = pd.DataFrame({
+        'Route': df_profit['Route'].astype(str).to_numpy(),
+        'Carrier': df_profit['Carrier'].astype(str).to_numpy(),
+        'Net_Profit': df_profit['Net_Profit'].to_numpy(dtype=float),
+        'Delivery_Days': df_profit['Actual_Delivery_Days'].to_numpy(dtype=float),
+    })
+    stats = orders.groupby(['Route', 'Carrier'], sort=True).agg(
+        Avg_Profit=('Net_Profit', 'mean'), Avg_Days=('Delivery_Days', 'mean'), Orders=('Net_Profit', 'size'))
+    stats = stats.reset_index()
+    by_route = stats.groupby('Route', sort=True)['Avg_Profit']
+    best = stats.loc[by_route.idxmax()].set_index('Route')
+    worst = stats.loc[by_route.idxmin()].set_index('Route')
+    routes = pd.DataFrame({
+        'Route': best.index,
+        'Best_Carrier': best['Carrier'].to_numpy(),
+        'Best_Orders': best['Orders'].to_numpy(),
+        'Worst_Carrier': worst['Carrier'].to_numpy(),
+        'Worst_Orders': worst['Orders'].to_numpy(),
+        'Profit_Gain': (best['Avg_Profit'] - worst['Avg_Profit']).to_numpy(),
+        'Days_Change': (best['Avg_Days'] - worst['Avg_Days']).to_numpy(),
+    })
+    routes = routes[routes['Best_Carrier'] != routes['Worst_Carrier']].reset_index(drop=True)
+
+    groups = pd.DataFrame({
+        'Route': np.repeat(routes['Route'].to_numpy(), 2),
+        'Carrier': np.column_stack([routes['Best_Carrier'], routes['Worst_Carrier']]).ravel(),
+    })
+    group_ids = pd.MultiIndex.from_frame(groups).get_indexer(pd.MultiIndex.from_frame(orders[['Route', 'Carrier']]))
+    keep = group_ids >= 0
+    order = np.argsort(group_ids[keep], kind='stable')
+    values = orders.loc[keep, ['Net_Profit', 'Delivery_Days']].to_numpy()[order]
+    sizes = np.bincount(group_ids[keep], minlength=len(groups))
+    return routes, values, sizes
+
+
+def bootstrap_group_means(values, sizes, n_boot, rng, chunk_size=1_000_000):
+    """(groups × n_boot × columns) means of ``values`` resampled within each group.
+
+    ``values`` holds every group's rows back to back, ``sizes`` the row count of
+    each (all > 0). Each replicate draws every group's rows with replacement;
+    all groups and replicates are drawn as one index array, ``chunk_size``
+    draws at a time.
+    """
+    offsets = np.cumsum(sizes) - sizes
+    row_group = np.repeat(np.arange(len(sizes)), sizes)
+    row_offset, row_size = offsets[row_group], sizes[row_group]
+    means = np.empty((len(sizes), n_boot, values.shape[1]))
+    per_chunk = max(1, chunk_size // max(len(values), 1))
+    for start in range(0, n_boot, per_chunk):
+        stop = min(start + per_chunk, n_boot)
+        picks = row_offset + (rng.random((stop - start, len(values))) * row_size).astype(np.intp)
+        sums = np.add.reduceat(values[picks], offsets, axis=1)
+        means[:, start:stop] = (sums / sizes[:, None]).transpose(1, 0, 2)
+    return means
+
+
+def simulate_switching(df_profit, n_boot=1000, seed=0):
+    """Bootstrap the per-order gain of switching each route's worst carrier to its best.
+
+    Returns a dict with 'routes' (one row per route that has two or more
+    carriers: the carriers, their order counts and the observed per-order
+    'Profit_Gain' and 'Days_Change') and (routes × n_boot) replicate arrays
+    'profit_gain' and 'days_change' of the same differences of means.
+    """
+    routes, values, sizes = _carrier_samples(df_profit)
+    means = bootstrap_group_means(values, sizes, n_boot, np.random.default_rng(seed))
+    gain = means[0::2] - means[1::2]
+    return {'routes': routes, 'profit_gain': gain[..., 0], 'days_change': gain[..., 1]}
+
+
+def savings_table(simulation, pcts=SWITCH_PERCENTS, ci=0.9):
+    """Projected savings with a ``ci`` interval for every route and switch percentage.
+
+    Savings are linear in the share switched, so the interval of each
+    percentage is the per-order interval scaled by the orders it moves. The
+    Days_Change columns are the average delivery-day change of a switched order.
+    """
+    routes = simulation['routes']
+    pcts = np.asarray(pcts, dtype=float)
+    tail = (1 - ci) / 2
+    low, high = np.quantile(simulation['profit_gain'], [tail, 1 - tail], axis=1)
+    days_low, days_high = np.quantile(simulation['days_change'], [tail, 1 - tail], axis=1)
+    moved = routes['Worst_Orders'].to_numpy()[:, None] * pcts[None, :] / 100
+    return pd.DataFrame({
+        'Route': np.repeat(routes['Route'].to_numpy(), len(pcts)),
+        'Switch_Percent': np.tile(pcts, len(routes)),
+        'Orders_Switched': moved.astype(int).ravel(),
+        'Projected_Savings': (routes['Profit_Gain'].to_numpy()[:, None] * moved).ravel(),
+        'Savings_Low': (low[:, None] * moved).ravel(),
+        'Savings_High': (high[:, None] * moved).ravel(),
+        'Days_Change': np.repeat(routes['Days_Change'].to_numpy(), len(pcts)),
+        'Days_Change_Low': np.repeat(days_low, len(pcts)),
+        'Days_Change_High': np.repeat(days_high, len(pcts)),
+    })
+
+
+def portfolio_savings(simulation, pcts=SWITCH_PERCENTS, ci=0.9):
+    """Savings with a ``ci`` interval of switching ``pct``% on every route at once.
+
+    Routes are resampled independently, so each replicate's portfolio total is
+    the sum of its route totals; the interval is taken over those sums.
+    """
+    routes = simulation['routes']
+    pcts = np.asarray(pcts, dtype=float)
+    worst_orders = routes['Worst_Orders'].to_numpy()
+    tail = (1 - ci) / 2
+    # Savings of switching every route's worst-carrier orders, per replicate
+    totals = worst_orders @ simulation['profit_gain']
+    low, high = np.quantile(totals, [tail, 1 - tail])
+    scale = pcts / 100
+    return pd.DataFrame({
+        'Switch_Percent': pcts,
+        'Routes': len(routes),
+        'Orders_Switched': (worst_orders.sum() * scale).astype(int),
+        'Projected_Savings': (worst_orders @ routes['Profit_Gain'].to_numpy()) * scale,
+        'Savings_Low': low * scale,
+        'Savings_High': high * scale,
+    })
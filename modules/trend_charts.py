@@ -0,0 +1,82 @@
+import streamlit as st
+from modules.charts import express, plot
+from utils.aggregates import ROLLUP_MEASURES, bucket_start, rollup_series, rollup_watermark
+
+GRAINS = {"Daily": 'daily', "Weekly": 'weekly', "Monthly": 'monthly'}
+
+
+def date_window(rollups, key):
+    """Date range and grain pickers bounded by the rollups; returns (start, end, grain) or None when empty"""
+    daily = rollups['daily']
+    last = rollup_watermark(daily)
+    if last is None:
+        st.info("No dated orders yet.")
+        return None
+    first = daily['Period_Start'].min()
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        window = st.date_input("Date Range", (first.date(), last.date()), min_value=first.date(),
+                               max_value=last.date(), key=f"{key}_dates")
+    with col2:
+        grain = st.radio("Granularity", list(GRAINS), index=1, horizontal=True, key=f"{key}_grain")
+    # While a range is being picked only its first day is set
+    start, end = (window[0], window[-1]) if len(window) else (first.date(), last.date())
+    return start, end, GRAINS[grain]
+
+
+def render_trends(rollups, key, by=None, **filters):
+    """KPIs and trend charts for a date range, answered from the time rollups.
+
+    ``filters`` pick rollup keys (Route, Carrier, Origin); ``by`` splits the
+    order volume chart by one of them. Returns the per-bucket series.
+    """
+    picked = date_window(rollups, key)
+    if picked is None:
+        return None
+    start, end, grain = picked
+
+    # Window totals are exact from the daily rollup; coarser buckets overlapping the range are plotted whole
+    totals = rollup_series(rollups['daily'], start, end, **filters)[ROLLUP_MEASURES].sum()
+    orders = int(totals['Orders'])
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Orders", f"{orders:,}")
+    c2.metric("Revenue", f"₹{totals['Revenue']:,.0f}")
+    c3.metric("Net Profit", f"₹{totals['Net_Profit']:,.0f}",
+              delta=f"{totals['Net_Profit'] / totals['Revenue'] * 100:.1f}% margin" if totals['Revenue'] else None)
+    c4.metric("Late Deliveries", f"{totals['Late_Orders'] / orders * 100:.1f}%" if orders else "N/A",
+              delta=f"{totals['Delay_Days'] / totals['Late_Orders']:.1f} days late on average" if totals['Late_Orders'] else None,
+              delta_color="inverse")
+
+    first_bucket = bucket_start(start, grain)
+    series = rollup_series(rollups[grain], first_bucket, end, **filters)
+    if len(series) == 0:
+        st.info("No orders in this date range.")
+        return series
+
+    col1, col2 = st.columns(2)
+    legend = dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    with col1:
+        fig = express(
+            'line',
+            series.melt(id_vars='Period_Start', value_vars=['Revenue', 'Total_Cost', 'Net_Profit'],
+                        var_name='Measure', value_name='Amount'),
+            x='Period_Start', y='Amount', color='Measure', markers=True,
+            title="Revenue, Cost and Profit",
+            labels={'Period_Start': 'Period', 'Amount': 'Amount (₹)'},
+            template="plotly_white",
+            layout=dict(height=400, legend=legend)
+        )
+        plot(fig, 'trend_amounts')
+    with col2:
+        volume = rollup_series(rollups[grain], first_bucket, end, by=by, **filters) if by else series
+        fig = express(
+            'bar',
+            volume, x='Period_Start', y='Orders', color=by,
+            title="Order Volume" + (f" by {by}" if by else ""),
+            labels={'Period_Start': 'Period'},
+            template="plotly_white",
+            layout=dict(height=400, legend=legend)
+        )
+        plot(fig, 'trend_volume')
+    return series
+
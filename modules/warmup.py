@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+
+from utils.data_loader import load_dispatch_data, load_inventory_data, load_profit_data, load_route_data, precomputed
+from utils.datasets import dataset_version
+from utils.instrumentation import span
+from modules.inventory_analysis import stock_analysis
+import modules.inventory_bot as inventory_bot
+import modules.profit_optimizer as profit_optimizer
+import modules.route_optimizer as route_optimizer
+
+logger = logging.getLogger(__name__)
+
+# Cache warm-up at server start. The first run of app.py starts one background
+# thread per process that calls the same memoized loaders and builders the
+# pages call, stage by stage, so the first visitors find them cached. A
+# session whose page needs a stage that is still running waits for it (with a
+# progress bar) instead of computing it a second time; memoized calls made
+# mid-stage (e.g. the rollups) wait on Streamlit's own per-key cache lock.
+# Set SHIPLYTICS_WARMUP=0 to turn it off.
+WARMUP_ENV = 'SHIPLYTICS_WARMUP'
+POLL_SECONDS = 0.1
+THREAD_NAME = 'shiplytics-warmup'
+
+
+class _WarmupThreadFilter(logging.Filter):
+    # Memoized calls look for a session to draw their spinner in; the warm-up thread has none, by design
+    def filter(self, record):
+        return record.threadName != THREAD_NAME
+
+
+logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').addFilter(_WarmupThreadFilter())
+
+
+# --- STAGES ---
+# Each loads its tables through the (already memoized) page loaders; missing
+# CSVs are left for the page to report
+
+def _warm_profit():
+    df_profit, _, _ = load_profit_data()
+    if df_profit is not None:
+        version = dataset_version(df_profit)
+        if version and precomputed('switch_simulation', version) is None:
+            profit_optimizer.switch_simulation(df_profit, version)
+
+
+def _warm_inventory():
+    df_inventory, df_orders = load_inventory_data()
+    if df_inventory is not None and df_orders is not None:
+        versions = (dataset_version(df_inventory), dataset_version(df_orders))
+        if precomputed('transfer_plan', versions) is None:
+            inventory_bot.transfer_plan(stock_analysis(df_inventory, df_orders), versions)
+        inventory_bot.demand_model(df_orders, versions[1])
+
+
+def _route_structures():
+    df_routes, df_vehicles = load_route_data()
+    if df_routes is None or df_vehicles is None:
+        return None
+    version, vehicles_version = dataset_version(df_routes), dataset_version(df_vehicles)
+    route_df = route_optimizer.parsed_routes(df_routes, version)
+    return df_routes, df_vehicles, route_df, version, vehicles_version
+
+
+def _warm_routes():
+    loaded = _route_structures()
+    if loaded is not None:
+        df_routes, df_vehicles, route_df, version, vehicles_version = loaded
+        route_optimizer.fleet_ranking(route_df, df_vehicles, version, vehicles_version)
+        route_optimizer.route_graph(route_df, version)
+
+
+def _warm_dispatch():
+    loaded = _route_structures()
+    df_orders, df_perf = load_dispatch_data()
+    if loaded is not None and df_orders is not None and df_perf is not None:
+        df_routes, df_vehicles, route_df, version, vehicles_version = loaded
+        versions = (version, vehicles_version, dataset_version(df_orders), dataset_version(df_perf))
+        route_optimizer.dispatch_plan(route_df, df_routes, df_vehicles, df_orders, df_perf, versions)
+
+
+# (name, progress label, function), in run order: the default page first
+STAGES = [
+    ('profit', "profit data, trend rollups and carrier-switch simulation", _warm_profit),
+    ('inventory', "inventory data, transfer plan and demand forecast", _warm_inventory),
+    ('routes', "route network and vehicle scores", _warm_routes),
+    ('dispatch', "fleet dispatch plan", _warm_dispatch),
+]
+
+# Stages each page waits for before rendering
+PAGE_STAGES = {
+    "Vendor Profit Analysis": ['profit'],
+    "Inventory Management": ['inventory'],
+    "Route Optimizer": ['routes'],
+}
+
+
+class Warmup:
+    """Runs ``stages`` once, in order, on a daemon thread; sessions can wait for any of them"""
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.finished = {name: threading.Event() for name, _, _ in stages}
+        self.errors = {}
+        self.current = None
+        self.thread = threading.Thread(target=self._run, name=THREAD_NAME, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        for name, label, func in self.stages:
+            self.current = label
+            started = time.perf_counter()
+            try:
+                with span(f'warmup.{name}'):
+                    func()
+            except Exception as exc:
+                # The page runs the same call when it renders and reports the error there
+                self.errors[name] = exc
+                logger.exception("Warm-up stage %s failed", name)
+            else:
+                logger.info("Warmed %s in %.2fs", label, time.perf_counter() - started)
+            finally:
+                self.finished[name].set()
+        self.current = None
+
+    def done(self, names=None):
+        return all(self.finished[name].is_set() for name in names or self.finished)
+
+    def progress(self):
+        """Share of stages finished"""
+        return sum(event.is_set() for event in self.finished.values()) / len(self.finished)
+
+    def wait(self, names=None, on_progress=None):
+        """Block until the ``names`` stages (all if None) have run, calling ``on_progress(share, label)`` meanwhile"""
+        names = list(names or self.finished)
+        while not self.done(names):
+            if on_progress is not None:
+                on_progress(self.progress(), self.current)
+            pending = next(name for name in names if not self.finished[name].is_set())
+            self.finished[pending].wait(POLL_SECONDS)
+
+
+@st.cache_resource(show_spinner=False)
+def warmup_service():
+    """The process's warm-up, started on first use (and again after the caches are cleared)"""
+    return Warmup(STAGES).start()
+
+
+def wait_for_page(page):
+    """Show a progress bar until the warm-up stages ``page`` needs have run (no-op once warm or when disabled)"""
+    if os.environ.get(WARMUP_ENV, '1') == '0':
+        return
+    warmup = warmup_service()
+    stages = PAGE_STAGES.get(page, [])
+    if warmup.done(stages):
+        return
+    bar = st.progress(warmup.progress(), text="Warming up caches…")
+    warmup.wait(stages, lambda share, label: bar.progress(share, text=f"Warming up: {label or 'finishing'}…"))
+    bar.empty()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from modules.inventory_analysis import _transport_highs, _transport_ssp
+
+pytest.importorskip('scipy')
+
+
+def _check_flow(flow, supply, demand, cost):
+    assert (flow >= 0).all()
+    assert (flow.sum(axis=1) <= supply).all()
+    assert (flow.sum(axis=0) <= demand).all()
+    assert not flow[np.isinf(cost)].any()
+
+
+def _total_cost(flow, cost):
+    return (np.where(flow > 0, cost, 0) * flow).sum()
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_highs_matches_successive_shortest_paths(seed):
+    rng = np.random.default_rng(seed)
+    n_src, n_dst = rng.integers(1, 15, size=2)
+    supply = rng.integers(0, 60, n_src)
+    demand = rng.integers(0, 60, n_dst)
+    cost = rng.uniform(1, 2500, (n_src, n_dst)).round(3)
+    if seed % 3 == 0:
+        # Unknown cities: some lanes don't exist
+        cost[rng.random((n_src, n_dst)) < 0.4] = np.inf
+
+    highs = _transport_highs(supply, demand, cost, lanes_per_node=2)
+    ssp = _transport_ssp(supply, demand, cost)
+    _check_flow(highs, supply, demand, cost)
+    _check_flow(ssp, supply, demand, cost)
+    assert highs.sum() == ssp.sum()
+    assert _total_cost(highs, cost) == pytest.approx(_total_cost(ssp, cost), rel=1e-9)
+
+
+def test_every_lane_moves_min_of_supply_and_demand():
+    cost = np.array([[1.0, 4.0], [2.0, 1.0]])
+    flow = _transport_highs(np.array([5, 5]), np.array([3, 4]), cost)
+    np.testing.assert_array_equal(flow, [[3, 0], [0, 4]])
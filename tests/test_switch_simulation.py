@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+from modules.switch_simulation import portfolio_savings, savings_table, simulate_switching
+from utils.precompute import _merge_simulations
+
+COLUMNS = ['Route', 'Carrier', 'Net_Profit', 'Actual_Delivery_Days']
+
+
+def _assert_no_routes(simulation, n_boot):
+    assert len(simulation['routes']) == 0
+    assert simulation['profit_gain'].shape == (0, n_boot)
+    assert simulation['days_change'].shape == (0, n_boot)
+    assert len(savings_table(simulation)) == 0
+    portfolio = portfolio_savings(simulation)
+    assert (portfolio['Routes'] == 0).all()
+    assert (portfolio[['Projected_Savings', 'Savings_Low', 'Savings_High']] == 0).all().all()
+
+
+@pytest.mark.parametrize('df_profit', [
+    pd.DataFrame(columns=COLUMNS),
+    pd.DataFrame({'Route': ['Mumbai-Pune'] * 3 + ['Delhi-Jaipur'] * 2, 'Carrier': ['A'] * 3 + ['B'] * 2,
+                  'Net_Profit': [10.0, -5.0, 3.0, 7.0, 1.0], 'Actual_Delivery_Days': [2, 3, 4, 1, 2]}),
+], ids=['empty', 'single_carrier'])
+def test_routes_without_two_carriers_simulate_nothing(df_profit):
+    _assert_no_routes(simulate_switching(df_profit, n_boot=20), 20)
+
+
+def test_merging_no_simulations():
+    _assert_no_routes(_merge_simulations([]), 1000)
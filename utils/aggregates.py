@@ -0,0 +1,250 @@
+import numpy as np
+import pandas as pd
+
+# Profit cube: additive measures of df_profit per Route × Carrier ×
+# Product_Category × Priority × order month. Every measure is additive, so a
+# batch of new orders is folded in by adding its own cube (see apply_delta) and
+# any slice or coarser rollup is a sum over cells (see ProfitCube).
+CUBE_KEYS = ['Route', 'Carrier', 'Product_Category', 'Priority', 'Order_Month']
+CUBE_MEASURES = ['Orders', 'Net_Profit_Sum', 'Order_Value_Sum', 'Margin_Sum', 'Delivery_Days_Sum', 'Loss_Orders']
+ROUTE_CARRIER_KEYS = ['Route', 'Carrier']
+
+COST_COLS = ['Fuel_Cost', 'Labor_Cost', 'Vehicle_Maintenance', 'Insurance',
+             'Packaging_Cost', 'Technology_Platform_Fee', 'Other_Overhead']
+
+
+def profit_cube(df_profit):
+    """Additive profit measures of df_profit grouped by CUBE_KEYS"""
+    df = pd.DataFrame({
+        'Route': df_profit['Route'].astype(str),
+        'Carrier': df_profit['Carrier'].astype(str),
+        'Product_Category': df_profit['Product_Category'].astype(str),
+        'Priority': df_profit['Priority'].astype(str),
+        'Order_Month': df_profit['Order_Date'].dt.to_period('M').dt.to_timestamp(),
+        'Orders': 1,
+        'Net_Profit_Sum': df_profit['Net_Profit'].astype('float64'),
+        'Order_Value_Sum': df_profit['Order_Value_INR'].astype('float64'),
+        'Margin_Sum': df_profit['Margin_Percent'].astype('float64'),
+        'Delivery_Days_Sum': df_profit['Actual_Delivery_Days'].astype('float64'),
+        'Loss_Orders': (df_profit['Net_Profit'] < 0).astype('int64'),
+    })
+    return df.groupby(CUBE_KEYS, sort=True, dropna=False).sum().reset_index()
+
+
+def apply_delta(cube, delta):
+    """Fold the cube of newly ingested orders into an existing cube"""
+    if len(delta) == 0:
+        return cube
+    combined = pd.concat([cube, delta], ignore_index=True)
+    return combined.groupby(CUBE_KEYS, sort=True, dropna=False).sum().reset_index()
+
+
+# Keys of the dense block (every key but the order month) and the most cells
+# it may hold; larger cubes answer every query from the cells instead
+DENSE_KEYS = CUBE_KEYS[:-1]
+DENSE_CELL_LIMIT = 2_000_000
+
+
+class ProfitCube:
+    """Slice-and-rollup queries over profit_cube cells, answered with NumPy.
+
+    Each key column is held as integer codes into its sorted distinct values
+    and the measures as one (cells × measures) array. Queries that don't
+    involve the order month read a dense (route × carrier × category ×
+    priority × measure) block instead, so a slice is an index into it and a
+    rollup a sum over its other axes, independent of the number of orders.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells.reset_index(drop=True)
+        self.values, self.codes = {}, {}
+        for key in CUBE_KEYS:
+            self.codes[key], self.values[key] = pd.factorize(self.cells[key], sort=True, use_na_sentinel=False)
+        self.measures = self.cells[CUBE_MEASURES].to_numpy(dtype=float)
+
+        self.dense = None
+        shape = tuple(len(self.values[key]) for key in DENSE_KEYS)
+        if np.prod(shape) <= DENSE_CELL_LIMIT:
+            flat = np.ravel_multi_index([self.codes[key] for key in DENSE_KEYS], shape)
+            self.dense = np.stack([np.bincount(flat, weights=self.measures[:, col], minlength=int(np.prod(shape)))
+                                   for col in range(len(CUBE_MEASURES))], axis=1).reshape(*shape, len(CUBE_MEASURES))
+            # "All routes" queries start from the block already summed over routes
+            self._all_routes = self.dense.sum(axis=0)
+
+    def _lookup(self, key, value):
+        """Codes of one value or a list of values of ``key`` (absent values are dropped)"""
+        if not isinstance(value, (list, tuple, np.ndarray, pd.Index)):
+            # One value: a hash lookup, without building an index for it
+            try:
+                code = self.values[key].get_loc(value)
+            except KeyError:
+                return np.empty(0, dtype=np.intp)
+            if isinstance(code, (int, np.integer)):
+                return np.array([code], dtype=np.intp)
+            value = [value]
+        codes = self.values[key].get_indexer(value)
+        return np.unique(codes[codes >= 0])
+
+    def _sums(self, by, filters):
+        """(combinations of ``by`` × measures) sums over the cells matching ``filters``"""
+        shape = [len(self.values[key]) for key in by]
+        if self.dense is not None and 'Order_Month' not in by and 'Order_Month' not in filters:
+            keys = DENSE_KEYS
+            block = self.dense
+            if 'Route' not in filters and 'Route' not in by:
+                keys, block = DENSE_KEYS[1:], self._all_routes
+            selected = {}
+            for axis, key in enumerate(keys):
+                if key in filters:
+                    selected[key] = self._lookup(key, filters[key])
+                    block = np.take(block, selected[key], axis=axis)
+            block = block.sum(axis=tuple(axis for axis, key in enumerate(keys) if key not in by))
+            # Remaining axes are in DENSE_KEYS order; put them in ``by`` order
+            kept = [key for key in keys if key in by]
+            block = np.moveaxis(block, [kept.index(key) for key in by], list(range(len(by))))
+            # Filtered ``by`` axes only hold the selected values; place them at their codes
+            sums = np.zeros((*shape, len(CUBE_MEASURES)))
+            sums[np.ix_(*(selected.get(key, np.arange(size)) for key, size in zip(by, shape)))] = block
+            return sums.reshape(-1, len(CUBE_MEASURES))
+
+        match = np.ones(len(self.measures), dtype=bool)
+        for key, value in filters.items():
+            match &= np.isin(self.codes[key], self._lookup(key, value))
+        size = int(np.prod(shape))
+        group = (np.ravel_multi_index([self.codes[key][match] for key in by], shape) if by
+                 else np.zeros(np.count_nonzero(match), dtype=np.intp))
+        return np.stack([np.bincount(group, weights=self.measures[match, col], minlength=size)
+                         for col in range(len(CUBE_MEASURES))], axis=1)
+
+    def totals(self, **filters):
+        """Measure sums over the cells matching ``filters`` (key=value or key=[values])"""
+        return pd.Series(self._sums([], filters)[0], index=CUBE_MEASURES)
+
+    def rollup(self, by, **filters):
+        """Measure sums per combination of the ``by`` keys present in the slice, sorted by ``by``"""
+        return pd.DataFrame(self._rollup_columns(by, filters))
+
+    def _rollup_columns(self, by, filters):
+        """rollup as a dict of column arrays"""
+        by = [by] if isinstance(by, str) else list(by)
+        sums = self._sums(by, filters)
+        present = np.flatnonzero(sums[:, 0] > 0)
+        key_codes = np.unravel_index(present, [len(self.values[key]) for key in by])
+        columns = {key: self.values[key].to_numpy()[codes] for key, codes in zip(by, key_codes)}
+        for col, measure in enumerate(CUBE_MEASURES):
+            columns[measure] = sums[present, col]
+        for measure in ['Orders', 'Loss_Orders']:
+            columns[measure] = columns[measure].astype(np.int64)
+        return columns
+
+
+def route_carrier_stats(cube):
+    """Route × Carrier rollup of a ProfitCube (the measures profit_analysis works on)"""
+    return cube.rollup(ROUTE_CARRIER_KEYS).drop(columns='Order_Value_Sum')
+
+
+def carrier_stats_for_slice(cube, **filters):
+    """Per-carrier means over a slice of the cube, shaped like a groupby('Carrier') result"""
+    rows = cube._rollup_columns('Carrier', filters)
+    return pd.DataFrame({
+        'Carrier': rows['Carrier'],
+        'Net_Profit': rows['Net_Profit_Sum'] / rows['Orders'],
+        'Actual_Delivery_Days': rows['Delivery_Days_Sum'] / rows['Orders'],
+        'Order_ID': rows['Orders'],
+    })
+
+
+# --- TIME ROLLUPS ---
+# Materialized daily, weekly and monthly totals of df_profit per route, carrier
+# and origin warehouse. Each rollup keeps a watermark (the latest Order_Date
+# folded in) so a refresh only rebuilds the buckets new dates fall into.
+ROLLUP_GRAINS = {'daily': 'D', 'weekly': 'W', 'monthly': 'M'}  # pandas period frequencies
+ROLLUP_KEYS = ['Route', 'Carrier', 'Origin']
+ROLLUP_MEASURES = ['Orders', 'Revenue', *COST_COLS, 'Total_Cost', 'Net_Profit', 'Loss_Orders',
+                   'Delay_Days', 'Late_Orders']
+WATERMARK_ATTR = 'watermark'
+
+
+def period_start(dates, grain):
+    """Start of the ``grain`` bucket each date falls in"""
+    return dates.dt.to_period(ROLLUP_GRAINS[grain]).dt.start_time
+
+
+def bucket_start(day, grain):
+    """Start of the ``grain`` bucket holding one date"""
+    return pd.Timestamp(day).to_period(ROLLUP_GRAINS[grain]).start_time
+
+
+def time_rollup(df_profit, grain):
+    """Additive measures of df_profit per ``grain`` bucket (Period_Start) and ROLLUP_KEYS.
+
+    Delay_Days sums the days each order arrived after its promised delivery
+    time and Late_Orders counts those orders. Orders without an Order_Date
+    belong to no bucket and are left out.
+    """
+    dated = df_profit[df_profit['Order_Date'].notna()]
+    late_days = (dated['Actual_Delivery_Days'].astype('int32')
+                 - dated['Promised_Delivery_Days'].astype('int32')).clip(lower=0)
+    df = pd.DataFrame({
+        'Period_Start': period_start(dated['Order_Date'], grain),
+        'Route': dated['Route'].astype(str),
+        'Carrier': dated['Carrier'].astype(str),
+        'Origin': dated['Origin'].astype(str),
+        'Orders': 1,
+        'Revenue': dated['Order_Value_INR'].astype('float64'),
+        **{col: dated[col].astype('float64') for col in COST_COLS},
+        'Total_Cost': dated['Total_Cost'].astype('float64'),
+        'Net_Profit': dated['Net_Profit'].astype('float64'),
+        'Loss_Orders': (dated['Net_Profit'] < 0).astype('int64'),
+        'Delay_Days': late_days.astype('int64'),
+        'Late_Orders': (late_days > 0).astype('int64'),
+    })
+    rollup = df.groupby(['Period_Start', *ROLLUP_KEYS], sort=True).sum().reset_index()
+    rollup.attrs[WATERMARK_ATTR] = dated['Order_Date'].max().isoformat() if len(dated) else None
+    return rollup
+
+
+def rollup_watermark(rollup):
+    """Latest Order_Date folded into a rollup (None while it is empty)"""
+    watermark = rollup.attrs.get(WATERMARK_ATTR)
+    return pd.Timestamp(watermark) if watermark else None
+
+
+def refresh_rollup(rollup, df_profit, grain, since=None):
+    """Bring a rollup up to date with df_profit, rebuilding only the affected buckets.
+
+    Buckets from the one holding ``since`` onward are recomputed from the
+    df_profit rows dated in them and earlier buckets are kept. ``since``
+    defaults to the watermark, which covers orders dated after it; pass the
+    earliest Order_Date of the new rows when they may be backdated.
+    """
+    watermark = rollup_watermark(rollup)
+    since = watermark if since is None else since
+    if since is None or pd.isna(since):
+        return rollup if watermark is not None else time_rollup(df_profit, grain)
+    start = bucket_start(since, grain)
+    fresh = time_rollup(df_profit[df_profit['Order_Date'] >= start], grain)
+    refreshed = pd.concat([rollup[rollup['Period_Start'] < start], fresh], ignore_index=True)
+    marks = [mark for mark in (watermark, rollup_watermark(fresh)) if mark is not None]
+    refreshed.attrs[WATERMARK_ATTR] = max(marks).isoformat() if marks else None
+    return refreshed
+
+
+def rollup_window(rollup, start=None, end=None, **filters):
+    """Buckets of a rollup starting within [start, end] whose keys match ``filters`` (key=value or key=[values])"""
+    match = np.ones(len(rollup), dtype=bool)
+    if start is not None:
+        match &= (rollup['Period_Start'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        match &= (rollup['Period_Start'] <= pd.Timestamp(end)).to_numpy()
+    for key, value in filters.items():
+        values = value if isinstance(value, (list, tuple, np.ndarray, pd.Index)) else [value]
+        match &= rollup[key].isin(values).to_numpy()
+    return rollup[match]
+
+
+def rollup_series(rollup, start=None, end=None, by=None, **filters):
+    """Measures per bucket (and per ``by`` key) over a window of a rollup"""
+    window = rollup_window(rollup, start, end, **filters)
+    keys = ['Period_Start'] + ([by] if by else [])
+    return window.groupby(keys, sort=True)[ROLLUP_MEASURES].sum().reset_index()
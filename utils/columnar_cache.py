@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+# Parquet copies of the datasets live next to the CSVs they were built from
+CACHE_DIR = os.path.join('datasets', '.cache')
+MANIFEST_FILE = 'manifest.json'
+
+# Bump when the parsing or derivation logic changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 4
+
+HASH_CHUNK_BYTES = 1 << 20
+
+# Bytes just before the previously ingested end of a file that must still match
+# for the file to count as appended-to rather than rewritten
+TAIL_CHECK_BYTES = 64 * 1024
+
+# Serializes manifest updates between the threads of a process (page sessions,
+# the cache warm-up), each of which re-reads and merges before writing
+_MANIFEST_LOCK = threading.Lock()
+
+# How many earlier versions of an appended-to source are remembered, so derived
+# tables built from any of them can be brought up to date by a delta
+MAX_ANCESTORS = 32
+
+
+def parquet_available():
+    """Parquet needs pyarrow (or fastparquet); without it the cache is simply skipped"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        try:
+            import fastparquet  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+
+def _hash_range(path, start=0, end=None):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = fh.read(HASH_CHUNK_BYTES if remaining is None else min(HASH_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _ends_with_newline(path, size):
+    if size == 0:
+        return True
+    with open(path, 'rb') as fh:
+        fh.seek(size - 1)
+        return fh.read(1) == b'\n'
+
+
+def _empty_manifest():
+    return {'version': CACHE_FORMAT_VERSION, 'sources': {}, 'tables': {}}
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_FILE)) as fh:
+            manifest = json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return _empty_manifest()
+    return manifest if manifest.get('version') == CACHE_FORMAT_VERSION else _empty_manifest()
+
+
+def _write_manifest(cache_dir, manifest):
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(cache_dir, MANIFEST_FILE))
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def source_fingerprint(path, manifest, appended_to=None):
+    """Return the content hash of a source CSV.
+
+    Size and mtime are checked first; the file is only re-hashed when either
+    of them moved, so an untouched dataset costs a single ``stat`` call. When
+    ``appended_to`` (the previous manifest entry of a file that only grew) is
+    given, only the new bytes are hashed and chained onto the previous hash.
+    """
+    stat = os.stat(path)
+    known = manifest['sources'].get(path)
+    if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+        return known['hash']
+
+    if appended_to is not None:
+        content_hash = combine_keys(appended_to['hash'], _hash_range(path, appended_to['size'], stat.st_size))
+        ancestors = ([appended_to['hash']] + appended_to.get('ancestors', []))[:MAX_ANCESTORS]
+    else:
+        content_hash = _hash_range(path)
+        ancestors = []
+    manifest['sources'][path] = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': content_hash,
+        'tail_hash': _hash_range(path, max(0, stat.st_size - TAIL_CHECK_BYTES), stat.st_size),
+        'ancestors': ancestors,
+    }
+    return content_hash
+
+
+def appended_since_ingest(path, manifest):
+    """Previous manifest entry of ``path`` if the file has only grown since, else None.
+
+    The last ``TAIL_CHECK_BYTES`` before the old end of file must be unchanged
+    and end on a line break, so the new bytes are whole appended rows.
+    """
+    known = manifest['sources'].get(path)
+    if not known or 'tail_hash' not in known:
+        return None
+    size = os.stat(path).st_size
+    if size <= known['size'] or not _ends_with_newline(path, known['size']):
+        return None
+    start = max(0, known['size'] - TAIL_CHECK_BYTES)
+    if _hash_range(path, start, known['size']) != known['tail_hash']:
+        return None
+    return dict(known)
+
+
+def combine_keys(*keys):
+    """Derive a single cache key from the keys of every input of a derived table"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(CACHE_FORMAT_VERSION).encode())
+    for key in keys:
+        digest.update(key.encode())
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    """Keyed Parquet store for raw and derived frames.
+
+    Every table is stored under its name together with the key it was built
+    from. A lookup with a different key is a miss, which is how a changed
+    source CSV invalidates exactly the tables that depend on it.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.enabled = parquet_available()
+        self.manifest = _read_manifest(cache_dir)
+        self._changed_sources = set()
+
+    def appended_since_ingest(self, path):
+        return appended_since_ingest(path, self.manifest)
+
+    def fingerprint(self, path, appended_to=None):
+        before = self.manifest['sources'].get(path)
+        key = source_fingerprint(path, self.manifest, appended_to)
+        if self.manifest['sources'].get(path) != before:
+            self._changed_sources.add(path)
+        return key
+
+    def _table_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.parquet")
+
+    def key_of(self, name):
+        """Key the cached copy of a table was built from, if any"""
+        return self.manifest['tables'].get(name)
+
+    def inputs_of(self, name):
+        """Source keys a cached derived table was built from"""
+        return self.manifest.get('inputs', {}).get(name, {})
+
+    def report_of(self, name):
+        """Report stored with a cached table (e.g. df_profit's join coverage), if any"""
+        return self.manifest.get('reports', {}).get(name)
+
+    def is_append_of(self, path, key):
+        """True if the source at ``path`` is ``key`` or has only had rows appended since"""
+        known = self.manifest['sources'].get(path, {})
+        return key == known.get('hash') or key in known.get('ancestors', [])
+
+    def load(self, name, key):
+        if not self.enabled or self.manifest['tables'].get(name) != key:
+            return None
+        try:
+            return pd.read_parquet(self._table_path(name))
+        except (OSError, ValueError):
+            return None
+
+    def store(self, name, key, df, inputs=None, report=None):
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.parquet.tmp')
+            os.close(fd)
+        except OSError:
+            return
+        try:
+            df.to_parquet(tmp_path, index=False)
+            # The file and its manifest key are published together, so no other
+            # thread's copy of the table can end up under this key
+            with _MANIFEST_LOCK:
+                os.replace(tmp_path, self._table_path(name))
+                self.manifest['tables'][name] = key
+                if inputs is not None:
+                    self.manifest.setdefault('inputs', {})[name] = inputs
+                if report is not None:
+                    self.manifest.setdefault('reports', {})[name] = report
+                try:
+                    self._merge_manifest(tables=[name])
+                except OSError:
+                    # The manifest may still name the old key; never serve this file under it
+                    os.remove(self._table_path(name))
+                    raise
+        except (OSError, ValueError, TypeError):
+            # An unwritable cache must never break loading
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _merge_manifest(self, tables=()):
+        """Write the manifest on disk updated with this cache's new source hashes and ``tables``.
+
+        Called with _MANIFEST_LOCK held; entries other threads wrote in the
+        meantime are kept.
+        """
+        manifest = _read_manifest(self.cache_dir)
+        for path in self._changed_sources:
+            manifest['sources'][path] = self.manifest['sources'][path]
+        for name in tables:
+            manifest['tables'][name] = self.manifest['tables'][name]
+            for slot in ('inputs', 'reports'):
+                if name in self.manifest.get(slot, {}):
+                    manifest.setdefault(slot, {})[name] = self.manifest[slot][name]
+        _write_manifest(self.cache_dir, manifest)
+        self._changed_sources.clear()
+
+    def flush(self):
+        if self._changed_sources:
+            try:
+                with _MANIFEST_LOCK:
+                    self._merge_manifest()
+            except OSError:
+                self._changed_sources.clear()
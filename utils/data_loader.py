@@ -1,31 +1,118 @@
-import pandas as pd
+import logging
+import os
+
 import streamlit as st
 
+from utils.datasets import dataset_version, load_tables
+from utils.instrumentation import register_collector, span
+from utils.memory import PAGE_COLUMNS, memory_summary, optimize_tables
+from utils.precompute import artifact_path, lookup, read_artifact
+from utils.query_backend import SQLQueries, backend_name
+
+logger = logging.getLogger(__name__)
+
+# Deep bytes of each table as the pages hold it, exported as gauges with the timing metrics
+LOADED_BYTES = {}
+register_collector('loaded_table_bytes', LOADED_BYTES.copy)
+
+
+def slim_tables(tables, names):
+    """The tables ``names`` cut to the columns the pages read and downcast (see utils.memory)"""
+    with span('load.optimize'):
+        slimmed, report = optimize_tables({name: tables[name] for name in names}, PAGE_COLUMNS)
+    for row in memory_summary(report).itertuples(index=False):
+        LOADED_BYTES[row.Table] = int(row.After_KB * 1024)
+        logger.info("%s: %.1f KB -> %.1f KB (%d of %d columns kept)",
+                    row.Table, row.Before_KB, row.After_KB, row.Kept_Columns, row.Columns)
+    return slimmed
+
+
+# --- PAGE LOADERS ---
+# Each page loads only the tables it renders, memoized separately so opening
+# one page never parses or merges data for another. The returned frames are
+# slimmed copies; load_tables itself (batch report, benchmarks) keeps every column.
+
+@st.cache_data
+def load_profit_data():
+    try:
+        with span('load.profit'):
+            tables = load_tables(['df_profit'])
+        df_profit = slim_tables(tables, ['df_profit'])['df_profit']
+        return df_profit, tables['profit_cube'], tables['profit_rollups']
+    except FileNotFoundError:
+        return None, None, None
+
+
+def load_rollup_data():
+    """The profit rollups, for pages other than Vendor Profit Analysis (shares its cached load)"""
+    return load_profit_data()[2]
+
+
+@st.cache_data
+def load_inventory_data():
+    try:
+        with span('load.inventory'):
+            tables = slim_tables(load_tables(['inventory', 'orders']), ['inventory', 'orders'])
+        return tables['inventory'], tables['orders']
+    except FileNotFoundError:
+        return None, None
+
+
+@st.cache_data
+def load_route_data():
+    try:
+        with span('load.routes'):
+            tables = slim_tables(load_tables(['routes', 'vehicles']), ['routes', 'vehicles'])
+        return tables['routes'], tables['vehicles']
+    except FileNotFoundError:
+        return None, None
+
+
 @st.cache_data
-def load_and_process_data():
+def load_dispatch_data():
     try:
-        # Load Raw Data
-        orders = pd.read_csv('datasets/orders.csv')
-        costs = pd.read_csv('datasets/cost_breakdown.csv')
-        perf = pd.read_csv('datasets/delivery_performance.csv')
-        routes = pd.read_csv('datasets/routes_distance.csv')
-        inventory = pd.read_csv('datasets/warehouse_inventory.csv')
-        vehicles = pd.read_csv('datasets/vehicle_fleet.csv')
-        
-        # --- PROCESS PROFIT DATA ---
-        # Merge: Orders + Costs + Performance + Routes
-        df_profit = pd.merge(orders, costs, on='Order_ID')
-        df_profit = pd.merge(df_profit, perf[['Order_ID', 'Carrier', 'Actual_Delivery_Days']], on='Order_ID')
-        df_profit = pd.merge(df_profit, routes[['Order_ID', 'Route']], on='Order_ID')
-        
-        # Calculate Financials
-        cost_cols = ['Fuel_Cost', 'Labor_Cost', 'Vehicle_Maintenance', 'Insurance', 
-                     'Packaging_Cost', 'Technology_Platform_Fee', 'Other_Overhead']
-        df_profit['Total_Cost'] = df_profit[cost_cols].sum(axis=1)
-        df_profit['Net_Profit'] = df_profit['Order_Value_INR'] - df_profit['Total_Cost']
-        df_profit['Margin_Percent'] = (df_profit['Net_Profit'] / df_profit['Order_Value_INR']) * 100
-        
-        return df_profit, inventory, orders, routes, vehicles
-        
+        with span('load.dispatch'):
+            tables = slim_tables(load_tables(['orders', 'perf']), ['orders', 'perf'])
+        return tables['orders'], tables['perf']
     except FileNotFoundError:
-        return None, None, None, None, None
\ No newline at end of file
+        return None, None
+
+
+# --- PRECOMPUTED RESULTS ---
+# Built by utils.precompute; shared by every session and reread when the file changes
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _precomputed_sections(mtime):
+    with span('load.precomputed'):
+        return read_artifact()
+
+
+def precomputed(section, versions):
+    """A section of the precompute artifact if it was built from ``versions``, else None.
+
+    The result is shared across sessions: don't modify it.
+    """
+    try:
+        mtime = os.stat(artifact_path()).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return lookup(_precomputed_sections(mtime), section, versions)
+
+
+# --- QUERY BACKEND ---
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _sql_queries(versions):
+    return SQLQueries(dict(versions))
+
+
+def query_backend(**tables):
+    """SQLQueries over these loaded tables (name=frame) when the duckdb backend is selected and
+    their Parquet copies are current, else None: the page then uses pandas"""
+    if backend_name() != 'duckdb':
+        return None
+    versions = tuple(sorted((name, dataset_version(df)) for name, df in tables.items()))
+    if not all(version for _, version in versions):
+        return None
+    queries = _sql_queries(versions)
+    return queries if queries.covers(tables) else None
@@ -0,0 +1,465 @@
+# Dataset loading with no UI dependency: schema, Parquet cache, joins and incremental
+# ingestion. Pages use the memoized loaders in utils.data_loader; batch jobs import
+# this module directly so they never pull in Streamlit.
+import logging
+import os
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import (COST_COLS, ROLLUP_GRAINS, ProfitCube, apply_delta, profit_cube, refresh_rollup,
+                              route_carrier_stats, time_rollup)
+from utils.columnar_cache import ColumnarCache, combine_keys
+from utils.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = 'datasets'
+
+# Dataset name -> source CSV
+DATASET_FILES = {
+    'orders': 'orders.csv',
+    'costs': 'cost_breakdown.csv',
+    'perf': 'delivery_performance.csv',
+    'routes': 'routes_distance.csv',
+    'inventory': 'warehouse_inventory.csv',
+    'vehicles': 'vehicle_fleet.csv',
+}
+
+# Raw tables that df_profit is derived from
+PROFIT_SOURCES = ('orders', 'costs', 'perf', 'routes')
+
+# Sources that only ever grow by appended orders, so can be ingested incrementally
+APPEND_ONLY = PROFIT_SOURCES
+
+# Everything load_tables can return
+TABLE_NAMES = (*DATASET_FILES, 'df_profit')
+
+# Every loaded frame carries the cache key of the data it was built from under
+# this attrs entry, so derived results can be memoized per dataset version
+VERSION_ATTR = 'dataset_version'
+
+# --- SCHEMA ---
+# Declared column types per dataset. Low-cardinality text is read as categorical so
+# filters and groupbys compare integer codes, money is float32 and IDs such as
+# ORD000001 are stored as their integer part (see format_ids for the reverse).
+SCHEMA = {
+    'orders': {
+        'dtypes': {
+            'Customer_Segment': 'category', 'Priority': 'category', 'Product_Category': 'category',
+            'Order_Value_INR': 'float32', 'Origin': 'category', 'Destination': 'category',
+            'Special_Handling': 'category',
+        },
+        'dates': ['Order_Date'],
+        'ids': ['Order_ID'],
+    },
+    'costs': {
+        'dtypes': {col: 'float32' for col in COST_COLS},
+        'dates': [],
+        'ids': ['Order_ID'],
+    },
+    'perf': {
+        'dtypes': {
+            'Carrier': 'category', 'Promised_Delivery_Days': 'int16', 'Actual_Delivery_Days': 'int16',
+            'Delivery_Status': 'category', 'Quality_Issue': 'category', 'Customer_Rating': 'int8',
+            'Delivery_Cost_INR': 'float32',
+        },
+        'dates': [],
+        'ids': ['Order_ID'],
+    },
+    'routes': {
+        'dtypes': {
+            'Route': 'category', 'Toll_Charges_INR': 'float32', 'Traffic_Delay_Minutes': 'int16',
+            'Weather_Impact': 'category',
+        },
+        'dates': [],
+        'ids': ['Order_ID'],
+    },
+    'inventory': {
+        'dtypes': {
+            'Warehouse_ID': 'category', 'Location': 'category', 'Product_Category': 'category',
+            'Current_Stock_Units': 'int32', 'Reorder_Level': 'int32', 'Storage_Cost_per_Unit': 'float32',
+        },
+        'dates': ['Last_Restocked_Date'],
+        'ids': [],
+    },
+    'vehicles': {
+        'dtypes': {
+            'Vehicle_Type': 'category', 'Current_Location': 'category', 'Status': 'category',
+        },
+        'dates': [],
+        'ids': ['Vehicle_ID'],
+    },
+}
+
+# ID column -> (prefix, zero-padded width)
+ID_FORMATS = {
+    'Order_ID': ('ORD', 6),
+    'Vehicle_ID': ('VEH', 4),
+}
+
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def parse_ids(series, column):
+    """ORD000001 -> 1, vectorized over the column"""
+    prefix, _ = ID_FORMATS[column]
+    return series.str.slice(len(prefix)).astype('int32')
+
+
+def format_ids(series, column):
+    """Inverse of parse_ids, for display"""
+    prefix, width = ID_FORMATS[column]
+    return prefix + series.astype(str).str.zfill(width)
+
+
+def format_id(value, column):
+    prefix, width = ID_FORMATS[column]
+    return f"{prefix}{int(value):0{width}d}"
+
+
+def dataset_version(df):
+    """Version key of a frame returned by load_tables (None for any other frame)"""
+    return df.attrs.get(VERSION_ATTR)
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, DATASET_FILES[name])
+
+
+def is_appended_version(name, key, cache_dir=None):
+    """True if dataset ``name`` is still at version ``key`` or has only had rows appended since.
+
+    Lets anything derived from an older version of an append-only table be
+    extended with the new rows instead of rebuilt.
+    """
+    if name not in APPEND_ONLY:
+        return False
+    cache = ColumnarCache(cache_dir) if cache_dir else ColumnarCache()
+    return cache.is_append_of(dataset_path(name), key)
+
+
+def _apply_schema(name, df):
+    schema = SCHEMA[name]
+    for col in schema['dates']:
+        df[col] = pd.to_datetime(df[col], format=DATE_FORMAT, errors='coerce')
+    for col in schema['ids']:
+        df[col] = parse_ids(df[col], col)
+    return df
+
+
+def read_typed_csv(name, path=None):
+    """Parse a dataset CSV with its declared schema"""
+    df = pd.read_csv(path or dataset_path(name), dtype=SCHEMA[name]['dtypes'])
+    return _apply_schema(name, df)
+
+
+def read_csv_tail(name, offset, columns):
+    """Parse only the rows appended after byte ``offset`` of a dataset CSV"""
+    with open(dataset_path(name), 'rb') as fh:
+        fh.seek(offset)
+        df = pd.read_csv(fh, header=None, names=columns, dtype=SCHEMA[name]['dtypes'])
+    return _apply_schema(name, df)
+
+
+def append_rows(base, tail):
+    """Concatenate appended rows, widening categoricals instead of degrading them to strings"""
+    base = base.copy(deep=False)
+    tail = tail.copy(deep=False)
+    for col in base.columns:
+        if isinstance(base[col].dtype, pd.CategoricalDtype):
+            new_cats = tail[col].astype('category').cat.categories.difference(base[col].cat.categories)
+            if len(new_cats):
+                base[col] = base[col].cat.add_categories(new_cats)
+            tail[col] = pd.Categorical(tail[col], categories=base[col].cat.categories)
+    return pd.concat([base, tail], ignore_index=True)
+
+
+def dataset_key(name, cache, incremental=False):
+    """Current version key of one raw table, without reading it.
+
+    Returns ``(key, prior)``: ``prior`` is the previous manifest entry when
+    ``incremental`` is set and the append-only source only grew since (see
+    read_dataset), else None.
+    """
+    path = dataset_path(name)
+    prior = cache.appended_since_ingest(path) if incremental and name in APPEND_ONLY else None
+    return cache.fingerprint(path, appended_to=prior), prior
+
+
+def read_dataset(name, cache, incremental=False, fingerprint=None):
+    """Load one raw table from the columnar cache, parsing the CSV only on a miss.
+
+    With ``incremental`` set and an append-only source that only grew since the
+    cached copy was built, just the new tail rows are parsed and appended.
+    ``fingerprint`` is an earlier dataset_key result for the table.
+    Returns ``(key, df)``.
+    """
+    key, prior = fingerprint or dataset_key(name, cache, incremental)
+    df = cache.load(name, key)
+    if df is not None:
+        return key, df
+
+    if prior is not None:
+        base = cache.load(name, prior['hash'])
+        if base is not None:
+            try:
+                tail = read_csv_tail(name, prior['size'], list(base.columns))
+            except pd.errors.EmptyDataError:
+                tail = None
+            if tail is not None:
+                df = append_rows(base, tail)
+                cache.store(name, key, df)
+                return key, df
+
+    df = read_typed_csv(name)
+    cache.store(name, key, df)
+    return key, df
+
+
+def schema_memory_report():
+    """Deep memory of every dataset read with pandas defaults vs the declared schema"""
+    rows = []
+    for name in DATASET_FILES:
+        default_bytes = pd.read_csv(dataset_path(name)).memory_usage(deep=True).sum()
+        typed_bytes = read_typed_csv(name).memory_usage(deep=True).sum()
+        rows.append({
+            'Table': name,
+            'Default_KB': default_bytes / 1024,
+            'Typed_KB': typed_bytes / 1024,
+            'Saving_Percent': (1 - typed_bytes / default_bytes) * 100,
+        })
+    return pd.DataFrame(rows)
+
+
+# Columns each table contributes to df_profit (None = every column)
+PROFIT_COLUMNS = {
+    'orders': None,
+    'costs': None,
+    'perf': ['Carrier', 'Promised_Delivery_Days', 'Actual_Delivery_Days'],
+    'routes': ['Route'],
+}
+
+
+def _is_sorted_unique(keys):
+    return len(keys) < 2 or bool((keys[1:] > keys[:-1]).all())
+
+
+def join_coverage(key_arrays):
+    """Compare the Order_ID keys of every profit input.
+
+    Returns the keys present in all tables (in first-table order) and, per table,
+    how many orders seen anywhere are missing from it. Those orders cannot make
+    it into df_profit, so the counts are what the inner join silently dropped.
+    """
+    names = list(key_arrays)
+    first = key_arrays[names[0]]
+    common_mask = np.ones(len(first), dtype=bool)
+    for name in names[1:]:
+        common_mask &= np.isin(first, key_arrays[name])
+
+    all_keys = np.unique(np.concatenate([key_arrays[name] for name in names]))
+    missing = {name: int(len(all_keys) - np.isin(all_keys, key_arrays[name]).sum()) for name in names}
+    report = {
+        'total_orders': int(len(all_keys)),
+        'joined_orders': int(common_mask.sum()),
+        'missing_by_table': missing,
+    }
+    return first[common_mask], report
+
+
+def _positions(keys, target):
+    """Row positions of target within keys, or None when the tables are already aligned"""
+    if len(keys) == len(target) and np.array_equal(keys, target):
+        return None
+    if _is_sorted_unique(keys):
+        return np.searchsorted(keys, target)
+    return pd.Index(keys).get_indexer(target)
+
+
+def _merge_profit_frame(orders, costs, perf, routes):
+    # Merge: Orders + Costs + Performance + Routes
+    df_profit = pd.merge(orders, costs, on='Order_ID')
+    df_profit = pd.merge(df_profit, perf[['Order_ID', 'Carrier', 'Promised_Delivery_Days', 'Actual_Delivery_Days']], on='Order_ID')
+    return pd.merge(df_profit, routes[['Order_ID', 'Route']], on='Order_ID')
+
+
+def build_profit_frame(orders, costs, perf, routes):
+    """Join the four order-level tables on Order_ID and derive the financials.
+
+    Every table is indexed on its integer Order_ID once and the output columns
+    are gathered straight into the final frame, so no intermediate merge frames
+    are allocated. Tables already in the same key order are used as-is.
+    Returns ``(df_profit, join_report)``.
+    """
+    sources = {'orders': orders, 'costs': costs, 'perf': perf, 'routes': routes}
+    key_arrays = {name: df['Order_ID'].to_numpy() for name, df in sources.items()}
+    keys, report = join_coverage(key_arrays)
+
+    if not all(pd.Index(k).is_unique for k in key_arrays.values()):
+        # One-to-many keys need the row expansion of a real merge
+        logger.warning("df_profit: duplicate Order_IDs found, falling back to pd.merge")
+        df_profit = _merge_profit_frame(orders, costs, perf, routes)
+    else:
+        columns = {}
+        for name, df in sources.items():
+            pos = _positions(key_arrays[name], keys)
+            wanted = PROFIT_COLUMNS[name] or [c for c in df.columns if c not in columns]
+            for col in wanted:
+                values = df[col]
+                columns[col] = values.array if pos is None else values.take(pos).array
+        df_profit = pd.DataFrame(columns, copy=False)
+
+    # Calculate Financials
+    total_cost = df_profit[COST_COLS[0]].to_numpy(copy=True)
+    for col in COST_COLS[1:]:
+        total_cost += df_profit[col].to_numpy()
+    df_profit['Total_Cost'] = total_cost
+    df_profit['Net_Profit'] = df_profit['Order_Value_INR'] - df_profit['Total_Cost']
+    df_profit['Margin_Percent'] = (df_profit['Net_Profit'] / df_profit['Order_Value_INR']) * 100
+    return df_profit, report
+
+
+def _log_join_report(report):
+    dropped = report['total_orders'] - report['joined_orders']
+    if dropped:
+        missing = ', '.join(f"{name}: {count}" for name, count in report['missing_by_table'].items() if count)
+        logger.warning("df_profit: %d of %d orders dropped, missing from %s",
+                       dropped, report['total_orders'], missing)
+
+
+def _profit_delta(tables, joinable, df_profit):
+    """df_profit rows for joinable orders that the cached df_profit does not have yet"""
+    candidates = joinable[~np.isin(joinable, df_profit['Order_ID'].to_numpy())]
+    subsets = [tables[name][tables[name]['Order_ID'].isin(candidates)] for name in PROFIT_SOURCES]
+    delta, _ = build_profit_frame(*subsets)
+    return delta
+
+
+def _fold_cube(cells, df_profit, delta):
+    return apply_delta(cells, profit_cube(delta))
+
+
+def _refresh_rollup(rollup, df_profit, delta, grain):
+    # Backdated orders reopen older buckets, so refresh from the earliest new date
+    return refresh_rollup(rollup, df_profit, grain, since=delta['Order_Date'].min())
+
+
+# Tables derived from df_profit: name -> (build from df_profit, fold in a delta of new rows)
+DERIVED_PROFIT_TABLES = {
+    'profit_cube': (profit_cube, _fold_cube),
+    **{f'rollup_{grain}': (partial(time_rollup, grain=grain), partial(_refresh_rollup, grain=grain))
+       for grain in ROLLUP_GRAINS},
+}
+
+
+def _profit_tables(df_profit, derived, profit_key, report):
+    cube = ProfitCube(derived['profit_cube'])
+    stats = route_carrier_stats(cube)
+    for df in (df_profit, stats, *derived.values()):
+        df.attrs[VERSION_ATTR] = profit_key
+    rollups = {grain: derived[f'rollup_{grain}'] for grain in ROLLUP_GRAINS}
+    return {'df_profit': df_profit, 'profit_cube': cube, 'route_carrier_stats': stats,
+            'profit_rollups': rollups, 'join_report': report}
+
+
+def _cached_profit(cache, profit_key):
+    """The _load_profit result straight from the cache when everything in it was built
+    from ``profit_key``, else None; the source tables aren't needed"""
+    report = cache.report_of('df_profit')
+    df_profit = cache.load('df_profit', profit_key) if report is not None else None
+    if df_profit is None:
+        return None
+    derived = {name: cache.load(name, profit_key) for name in DERIVED_PROFIT_TABLES}
+    if any(df is None for df in derived.values()):
+        return None
+    _log_join_report(report)
+    return _profit_tables(df_profit, derived, profit_key, report)
+
+
+def _load_profit(cache, tables, keys):
+    """df_profit and the tables derived from it for the current source keys.
+
+    A cached df_profit built from earlier versions of the sources is extended
+    with just the newly joinable orders, provided every source has only had
+    rows appended since, and its derived tables fold in only those rows; any
+    other change rebuilds them from the raw tables. The join report is kept
+    with the cached df_profit for _cached_profit.
+    """
+    profit_key = combine_keys(*(keys[name] for name in PROFIT_SOURCES))
+    inputs = {name: keys[name] for name in PROFIT_SOURCES}
+    joinable, report = join_coverage({name: tables[name]['Order_ID'].to_numpy() for name in PROFIT_SOURCES})
+    _log_join_report(report)
+
+    df_profit = cache.load('df_profit', profit_key)
+    derived = {name: cache.load(name, profit_key) for name in DERIVED_PROFIT_TABLES}
+    if df_profit is None:
+        base_key, base_inputs = cache.key_of('df_profit'), cache.inputs_of('df_profit')
+        base = None
+        if base_key and all(name in base_inputs and cache.is_append_of(dataset_path(name), base_inputs[name])
+                            for name in PROFIT_SOURCES):
+            base = cache.load('df_profit', base_key)
+        if base is not None:
+            delta = _profit_delta(tables, joinable, base)
+            df_profit = append_rows(base, delta)
+            for name, (_, refresh) in DERIVED_PROFIT_TABLES.items():
+                prior = cache.load(name, base_key) if cache.key_of(name) == base_key else None
+                if prior is not None:
+                    derived[name] = refresh(prior, df_profit, delta)
+        else:
+            df_profit, _ = build_profit_frame(*(tables[name] for name in PROFIT_SOURCES))
+        cache.store('df_profit', profit_key, df_profit, inputs=inputs, report=report)
+
+    for name, (build, _) in DERIVED_PROFIT_TABLES.items():
+        if derived[name] is None:
+            derived[name] = build(df_profit)
+        if cache.key_of(name) != profit_key:
+            cache.store(name, profit_key, derived[name], inputs=inputs)
+    return _profit_tables(df_profit, derived, profit_key, report)
+
+
+def load_tables(names=None, cache_dir=None, incremental=True):
+    """Load the requested datasets, reusing cached copies of unchanged inputs.
+
+    ``names`` picks raw datasets (keys of DATASET_FILES) and/or 'df_profit';
+    only the CSVs those need are touched. Requesting 'df_profit' also returns
+    'profit_cube', 'route_carrier_stats', 'profit_rollups' (daily, weekly and
+    monthly time rollups by grain) and 'join_report'. With ``incremental`` on, rows
+    appended to the append-only sources are parsed on their own and folded
+    into the cached tables; any other change rebuilds from the CSVs.
+    """
+    names = list(names or TABLE_NAMES)
+    needed = [name for name in DATASET_FILES
+              if name in names or ('df_profit' in names and name in PROFIT_SOURCES)]
+    cache = ColumnarCache(cache_dir) if cache_dir else ColumnarCache()
+    try:
+        keys, tables, fingerprints, cached_profit = {}, {}, {}, None
+        if 'df_profit' in names:
+            # Unchanged sources (a stat each) mean the cached df_profit can be used without reading them
+            fingerprints = {name: dataset_key(name, cache, incremental) for name in PROFIT_SOURCES}
+            profit_key = combine_keys(*(fingerprints[name][0] for name in PROFIT_SOURCES))
+            with span('load.profit_cached'):
+                cached_profit = _cached_profit(cache, profit_key)
+            if cached_profit is not None:
+                needed = [name for name in needed if name in names]
+
+        for name in needed:
+            with span(f'load.read.{name}'):
+                keys[name], tables[name] = read_dataset(name, cache, incremental, fingerprints.get(name))
+            tables[name].attrs[VERSION_ATTR] = keys[name]
+
+        # --- PROCESS PROFIT DATA ---
+        # Only re-merged when one of its four inputs changed
+        if cached_profit is not None:
+            tables.update(cached_profit)
+        elif 'df_profit' in names:
+            with span('load.profit_frame'):
+                tables.update(_load_profit(cache, tables, keys))
+    finally:
+        cache.flush()
+    return {name: df for name, df in tables.items() if name in names or name not in DATASET_FILES}
+
+
+if __name__ == '__main__':
+    print(schema_memory_report().to_string(index=False, float_format='{:,.1f}'.format))
@@ -0,0 +1,92 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Roads run ~30% longer than the great circle between two cities
+ROAD_DETOUR_FACTOR = 1.3
+
+# City coordinates for distances and map visualization
+CITY_COORDS = {
+    "Mumbai": {"lat": 19.0760, "lon": 72.8777},
+    "Delhi": {"lat": 28.7041, "lon": 77.1025},
+    "Bangalore": {"lat": 12.9716, "lon": 77.5946},
+    "Chennai": {"lat": 13.0827, "lon": 80.2707},
+    "Kolkata": {"lat": 22.5726, "lon": 88.3639},
+    "Hyderabad": {"lat": 17.3850, "lon": 78.4867},
+    "Ahmedabad": {"lat": 23.0225, "lon": 72.5714},
+    "Pune": {"lat": 18.5204, "lon": 73.8567},
+    "Dubai": {"lat": 25.2048, "lon": 55.2708},
+    "Singapore": {"lat": 1.3521, "lon": 103.8198},
+    "Bangkok": {"lat": 13.7563, "lon": 100.5018},
+    "Hong Kong": {"lat": 22.3193, "lon": 114.1694}
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, broadcasting over array arguments"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class CityRegistry:
+    """Known cities as coordinate arrays, with their great-circle distance matrix.
+
+    A city's integer code is its position in ``names``; every city not in the
+    registry gets code -1, has NaN coordinates and is ``inf`` km from
+    everything, so callers see unknown cities instead of a made-up location.
+    """
+
+    def __init__(self, coords):
+        self.names = pd.Index(list(coords))
+        self.lat = np.array([coords[city]['lat'] for city in self.names], dtype=float)
+        self.lon = np.array([coords[city]['lon'] for city in self.names], dtype=float)
+        self._distance_km = None
+
+    @property
+    def distance_km(self):
+        """(cities × cities) km, computed once on first use"""
+        if self._distance_km is None:
+            self._distance_km = haversine_km(self.lat[:, None], self.lon[:, None],
+                                             self.lat[None, :], self.lon[None, :])
+        return self._distance_km
+
+    def codes(self, cities):
+        return self.names.get_indexer(pd.Index(cities).astype(str))
+
+    def unknown(self, cities):
+        """Distinct names of ``cities`` missing from the registry"""
+        cities = pd.Index(pd.unique(pd.Index(cities).astype(str)))
+        return sorted(cities[self.names.get_indexer(cities) < 0])
+
+    def report_unknown(self, cities, context):
+        """Log and return the cities ``context`` can't place"""
+        unknown = self.unknown(cities)
+        if unknown:
+            logger.warning("%s: no coordinates for %d cities: %s", context, len(unknown), ', '.join(unknown))
+        return unknown
+
+    def distance(self, origin_codes, dest_codes):
+        """km between coded cities, broadcasting the two code arrays; inf if either is unknown"""
+        origin_codes, dest_codes = np.broadcast_arrays(np.asarray(origin_codes), np.asarray(dest_codes))
+        km = self.distance_km[origin_codes, dest_codes]
+        return np.where((origin_codes < 0) | (dest_codes < 0), np.inf, km)
+
+    def distance_matrix(self, origins, destinations):
+        """(origins × destinations) km between named cities"""
+        return self.distance(self.codes(origins)[:, None], self.codes(destinations)[None, :])
+
+    def coords(self, cities):
+        """(lat, lon) arrays for named cities, NaN where unknown"""
+        codes = self.codes(cities)
+        known = codes >= 0
+        return (np.where(known, self.lat[codes], np.nan),
+                np.where(known, self.lon[codes], np.nan))
+
+
+CITIES = CityRegistry(CITY_COORDS)
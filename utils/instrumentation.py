@@ -0,0 +1,165 @@
+import atexit
+import bisect
+import collections
+import contextlib
+import functools
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Timing spans for the hot paths. Wrap a stage in ``with span('name'):`` or
+# decorate a function with @timed('name') and each run's wall time is added to
+# that span's latency histogram. Metrics are off unless SHIPLYTICS_METRICS
+# names a file; the histograms are then written there in Prometheus text
+# format (e.g. for node_exporter's textfile collector) at most every
+# FLUSH_INTERVAL seconds and at exit. While off, span() returns a shared no-op
+# context manager and @timed leaves the function untouched.
+METRICS_ENV = 'SHIPLYTICS_METRICS'
+METRIC_PREFIX = 'shiplytics'
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+RECENT_SAMPLES = 1024          # per span, for the rolling quantiles
+QUANTILES = (0.5, 0.9, 0.99)
+FLUSH_INTERVAL = 5.0
+
+_NOOP = contextlib.nullcontext()
+
+
+class SpanStats:
+    """Cumulative histogram of one span's durations plus a window of the latest ones"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds):
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def quantiles(self):
+        recent = sorted(self.recent)
+        return {q: recent[min(int(q * len(recent)), len(recent) - 1)] for q in QUANTILES} if recent else {}
+
+
+class Metrics:
+    def __init__(self, path):
+        self.path = path
+        self.spans = {}
+        self.collectors = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.observe(seconds)
+
+    def render(self):
+        """All spans and registered collectors in Prometheus text exposition format"""
+        metric = f'{METRIC_PREFIX}_span_seconds'
+        lines = [f'# HELP {metric} Wall time of instrumented stages.', f'# TYPE {metric} histogram']
+        recent_lines = [f'# HELP {metric}_recent Latency quantiles over the last {RECENT_SAMPLES} runs of each stage.',
+                        f'# TYPE {metric}_recent summary']
+        with self._lock:
+            for name, stats in sorted(self.spans.items()):
+                label = f'span="{name}"'
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, '+Inf'), stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label}}} {stats.total:.6f}')
+                lines.append(f'{metric}_count{{{label}}} {stats.count}')
+                for q, value in stats.quantiles().items():
+                    recent_lines.append(f'{metric}_recent{{{label},quantile="{q}"}} {value:.6f}')
+            collectors = list(self.collectors.items())
+        lines += recent_lines
+        for name, collect in collectors:
+            for key, value in collect().items():
+                lines.append(f'{METRIC_PREFIX}_{name}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self, force=False):
+        """Write the metrics file, unless it was written less than FLUSH_INTERVAL seconds ago.
+
+        Safe to call from any thread; a failed write is logged, never raised,
+        so exporting metrics can't break a page.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_flush < FLUSH_INTERVAL:
+                return
+            self._last_flush = now
+        text = self.render()
+        # Written to a temporary file of its own and renamed so scrapers never see a partial file
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(text)
+                os.chmod(tmp, 0o644)  # mkstemp files are owner-only; scrapers may run as another user
+                os.replace(tmp, self.path)
+            except OSError:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp)
+                raise
+        except OSError:
+            logger.warning("Could not write metrics to %s", self.path, exc_info=True)
+
+
+_metrics = Metrics(os.environ[METRICS_ENV]) if os.environ.get(METRICS_ENV) else None
+if _metrics is not None:
+    atexit.register(_metrics.flush, force=True)
+
+
+def enabled():
+    return _metrics is not None
+
+
+@contextlib.contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _metrics.observe(name, time.perf_counter() - start)
+
+
+def span(name):
+    """Context manager timing the enclosed block as ``name`` (a no-op while metrics are off)"""
+    return _timed_span(name) if _metrics is not None else _NOOP
+
+
+def timed(name):
+    """Decorator timing every call of a function as ``name``"""
+    def decorate(func):
+        if _metrics is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def register_collector(name, collect):
+    """Export the numeric values of ``collect()`` (a dict) as <prefix>_<name>_<key> gauges"""
+    if _metrics is not None:
+        with _metrics._lock:
+            _metrics.collectors[name] = collect
+
+
+def flush_metrics():
+    """Write the metrics file if it is due"""
+    if _metrics is not None:
+        _metrics.flush()
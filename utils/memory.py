@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from modules.route_analysis import ROUTE_STAT_COLS
+
+# Memory accounting and slimming of the frames the pages hold. memory_report
+# gives the deep size of every column; optimize_frame shrinks a frame for
+# serving: columns no page reads are dropped, integers are downcast to the
+# narrowest type that holds their range with headroom, floats become float32
+# only where that is exact, and text that repeats enough becomes categorical.
+
+# Columns the dashboard pages read from each loaded table (None = all of them)
+PAGE_COLUMNS = {
+    # Route selector and the carrier-switch simulation; KPIs and charts come from the cube and rollups
+    'df_profit': ['Route', 'Carrier', 'Net_Profit', 'Actual_Delivery_Days'],
+    # Demand per warehouse (stock_analysis, demand forecast) and pending orders for the fleet dispatch plan
+    # (Weight_KG is kept when orders.csv has it)
+    'orders': ['Order_ID', 'Order_Date', 'Priority', 'Product_Category', 'Special_Handling', 'Origin',
+               'Destination', 'Weight_KG'],
+    'perf': ['Order_ID'],
+    'routes': ['Order_ID', 'Route', *ROUTE_STAT_COLS],
+    'inventory': ['Location', 'Product_Category', 'Current_Stock_Units', 'Reorder_Level'],
+    'vehicles': None,
+}
+
+# Text columns whose share of repeated values (1 - distinct / rows) is at least this become categorical
+CATEGORY_REPETITION_RATIO = 0.5
+# Downcast integers keep room for this multiple of their largest magnitude, so
+# arithmetic like ``Reorder_Level * 3`` can't overflow the narrower type
+INT_HEADROOM = 16
+
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+
+
+def repetition_ratio(series):
+    return 1 - series.nunique(dropna=False) / len(series) if len(series) else 0.0
+
+
+def downcast_column(series, category_ratio=CATEGORY_REPETITION_RATIO):
+    """The column in the smallest type that keeps its values (the column itself if none is smaller)"""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        bound = int(np.abs(values).max()) * INT_HEADROOM if len(values) else 0
+        for int_type in INT_TYPES:
+            if int_type().itemsize >= dtype.itemsize:
+                return series
+            if bound <= np.iinfo(int_type).max:
+                return series.astype(int_type)
+        return series
+    if dtype == np.float64:
+        narrow = series.astype(np.float32)
+        exact = np.array_equal(narrow.to_numpy(np.float64), series.to_numpy(), equal_nan=True)
+        return narrow if exact else series
+    if (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)) \
+            and repetition_ratio(series) >= category_ratio:
+        return series.astype('category')
+    return series
+
+
+def optimize_frame(df, keep=None, category_ratio=CATEGORY_REPETITION_RATIO):
+    """Copy of ``df`` with only the ``keep`` columns (all if None), each downcast; attrs are kept"""
+    columns = [col for col in df.columns if keep is None or col in keep]
+    out = pd.DataFrame({col: downcast_column(df[col], category_ratio) for col in columns}, index=df.index)
+    out.attrs = dict(df.attrs)
+    return out
+
+
+def memory_report(df, table):
+    """Deep bytes per column (and the index) of one frame"""
+    usage = df.memory_usage(deep=True)
+    dtypes = df.dtypes.astype(str).to_dict()
+    return pd.DataFrame({
+        'Table': table,
+        'Column': usage.index,
+        'Dtype': [dtypes.get(col, str(df.index.dtype)) for col in usage.index],
+        'Bytes': usage.to_numpy(),
+    })
+
+
+def optimize_tables(tables, keep_columns=None, category_ratio=CATEGORY_REPETITION_RATIO):
+    """Optimized copies of a dict of frames and a per-column before/after memory report.
+
+    ``keep_columns`` maps table names to the columns to keep (see
+    PAGE_COLUMNS); tables not in it keep every column. In the report a
+    dropped column has Optimized_Dtype 'dropped' and 0 Optimized_Bytes.
+    """
+    keep_columns = keep_columns or {}
+    optimized, reports = {}, []
+    for name, df in tables.items():
+        optimized[name] = optimize_frame(df, keep_columns.get(name), category_ratio)
+        before = memory_report(df, name)
+        after = memory_report(optimized[name], name)[['Column', 'Dtype', 'Bytes']]
+        report = before.merge(after, on='Column', how='left', suffixes=('', '_after'))
+        reports.append(pd.DataFrame({
+            'Table': name,
+            'Column': report['Column'],
+            'Dtype': report['Dtype'],
+            'Optimized_Dtype': report['Dtype_after'].fillna('dropped'),
+            'Bytes': report['Bytes'],
+            'Optimized_Bytes': report['Bytes_after'].fillna(0).astype('int64'),
+        }))
+    columns = ['Table', 'Column', 'Dtype', 'Optimized_Dtype', 'Bytes', 'Optimized_Bytes']
+    return optimized, pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=columns)
+
+
+def memory_summary(report):
+    """Per-table totals of an optimize_tables report, in KB"""
+    kept = report['Optimized_Dtype'] != 'dropped'
+    summary = report.assign(Kept=kept & (report['Column'] != 'Index')).groupby('Table', sort=False).agg(
+        Columns=('Column', lambda cols: int((cols != 'Index').sum())),
+        Kept_Columns=('Kept', 'sum'),
+        Before_KB=('Bytes', 'sum'),
+        After_KB=('Optimized_Bytes', 'sum'),
+    ).reset_index()
+    summary[['Before_KB', 'After_KB']] /= 1024
+    summary['Saving_Percent'] = (1 - summary['After_KB'] / summary['Before_KB']) * 100
+    return summary
+
+
+if __name__ == '__main__':
+    from utils.datasets import TABLE_NAMES, load_tables
+
+    loaded = load_tables(TABLE_NAMES)
+    _, report = optimize_tables({name: loaded[name] for name in PAGE_COLUMNS}, PAGE_COLUMNS)
+    pd.set_option('display.width', 200)
+    kb = report.assign(Before_KB=report['Bytes'] / 1024, After_KB=report['Optimized_Bytes'] / 1024)
+    print(kb.drop(columns=['Bytes', 'Optimized_Bytes']).to_string(index=False, float_format='{:,.1f}'.format))
+    print()
+    summary = memory_summary(report)
+    print(summary.to_string(index=False, float_format='{:,.1f}'.format))
+    print(f"\nTotal: {summary['Before_KB'].sum():,.1f} KB -> {summary['After_KB'].sum():,.1f} KB")
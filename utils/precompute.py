@@ -0,0 +1,251 @@
+"""Precompute the per-route, per-category and per-city-pair results the pages show.
+
+    python -m utils.precompute --workers 8
+
+Each computation is partitioned by its key (route, product category, city
+pair) and the partitions run across a process pool. Input frames are handed
+to the workers as memory-mapped .npy columns (under /dev/shm where available),
+not pickled, so each worker reads only the rows of its partition. The merged
+results go into one artifact next to the columnar cache, tagged with the
+dataset versions they were computed from; the pages use a section while its
+versions match and compute it themselves otherwise.
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.columnar_cache import CACHE_DIR
+from utils.datasets import dataset_version, format_ids, load_tables
+from utils.instrumentation import span
+from modules.inventory_analysis import TRANSFER_COLUMNS, plan_transfers, stock_analysis
+from modules.route_analysis import pair_search, parse_route_data, rank_fleet
+from modules.switch_simulation import portfolio_savings, savings_table, simulate_switching
+
+ARTIFACT_FILE = 'precomputed.pkl'
+SECTIONS = ['switch_simulation', 'transfer_plan', 'route_searches']
+# Rows per task; partitions (a route, category or city pair) are never split,
+# so a task holds whole partitions adding up to about this many rows
+PARTITION_ROWS = 20_000
+SHARED_DIR = '/dev/shm'
+SEED = 0
+
+
+# --- SHARED FRAMES ---
+
+class SharedFrame:
+    """A frame written column by column to .npy files that worker processes memory-map.
+
+    Only the file paths, dtypes and category labels are pickled when the
+    object is sent to a worker; rows(start, stop) maps the files and copies
+    just that slice into a frame. Text columns are stored as categorical codes.
+    """
+
+    def __init__(self, df, directory, name):
+        self.columns = {}
+        for col in df.columns:
+            values = df[col]
+            if pd.api.types.is_object_dtype(values.dtype) or pd.api.types.is_string_dtype(values.dtype):
+                values = values.astype('category')
+            categories = values.cat.categories if isinstance(values.dtype, pd.CategoricalDtype) else None
+            array = values.cat.codes.to_numpy() if categories is not None else values.to_numpy()
+            path = os.path.join(directory, f'{name}.{len(self.columns)}.npy')
+            np.save(path, array)
+            self.columns[col] = (path, categories)
+        self.index_path = os.path.join(directory, f'{name}.index.npy')
+        np.save(self.index_path, df.index.to_numpy())
+        self.length = len(df)
+
+    def rows(self, start=0, stop=None):
+        stop = self.length if stop is None else stop
+        data = {}
+        for col, (path, categories) in self.columns.items():
+            values = np.load(path, mmap_mode='r')[start:stop]
+            values = np.array(values)
+            data[col] = pd.Categorical.from_codes(values, categories=categories) if categories is not None else values
+        return pd.DataFrame(data, index=np.array(np.load(self.index_path, mmap_mode='r')[start:stop]))
+
+
+def partition_bounds(keys, target_rows=PARTITION_ROWS):
+    """(start, stop) row ranges over ``keys`` (sorted) holding whole runs of equal keys, about ``target_rows`` each"""
+    if len(keys) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    bounds, start = [], 0
+    for run_start in starts[1:]:
+        if run_start - start >= target_rows:
+            bounds.append((start, int(run_start)))
+            start = int(run_start)
+    bounds.append((start, len(keys)))
+    return bounds
+
+
+def _partitioned(df, key, directory, name):
+    """``df`` sorted by ``key`` (stably) as a SharedFrame, with the row ranges of its tasks"""
+    codes = pd.factorize(key, sort=True)[0]
+    order = np.argsort(codes, kind='stable')
+    return SharedFrame(df.iloc[order], directory, name), partition_bounds(codes[order])
+
+
+# --- WORKER TASKS ---
+# Module-level so a spawned worker can import them
+
+def _simulate_block(profit, start, stop, block):
+    # Seeded per block, so results don't depend on the number of workers
+    return simulate_switching(profit.rows(start, stop), seed=[SEED, block])
+
+
+def _transfer_block(stock, start, stop):
+    return plan_transfers(stock.rows(start, stop))
+
+
+def _search_block(routes, vehicles, start, stop):
+    block = routes.rows(start, stop)
+    pairs = block.groupby(['City_A', 'City_B'], sort=False, observed=True).indices
+    block = block.drop(columns=['City_A', 'City_B'])
+    ranking = rank_fleet(vehicles.rows(), block['Distance_KM'].to_numpy(), top_n=3)
+    searches = {}
+    for (city_a, city_b), positions in pairs.items():
+        search = pair_search(block.iloc[positions], ranking, positions)
+        if search['vehicles'] is not None:
+            search['vehicles']['Vehicle_ID'] = format_ids(search['vehicles']['Vehicle_ID'], 'Vehicle_ID')
+        searches[(city_a, city_b)] = search
+    return searches
+
+
+# --- MERGING ---
+
+def _merge_simulations(parts):
+    """One simulate_switching result from the per-block ones, routes in name order like a single run"""
+    parts = [part for part in parts if len(part['routes'])]
+    if not parts:
+        return simulate_switching(pd.DataFrame(columns=['Route', 'Carrier', 'Net_Profit', 'Actual_Delivery_Days']))
+    routes = pd.concat([part['routes'] for part in parts], ignore_index=True)
+    order = np.argsort(routes['Route'].to_numpy(), kind='stable')
+    return {
+        'routes': routes.iloc[order].reset_index(drop=True),
+        'profit_gain': np.concatenate([part['profit_gain'] for part in parts])[order],
+        'days_change': np.concatenate([part['days_change'] for part in parts])[order],
+    }
+
+
+def pair_key(origin, destination):
+    """Key of route_searches: the two cities in name order (routes are found in either direction)"""
+    return (origin, destination) if origin <= destination else (destination, origin)
+
+
+def precompute(tables, workers=None):
+    """Artifact sections for the given load_tables result: {section: (versions, result)}.
+
+    The results are what the pages would compute: the switch_simulation
+    tables (bootstrap draws differ, being seeded per task), the full
+    transfer plan and the route search of every city pair with a route.
+    ``workers`` defaults to every core; 1 runs the tasks in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    shared_dir = SHARED_DIR if os.path.isdir(SHARED_DIR) else None
+    with tempfile.TemporaryDirectory(prefix='shiplytics-', dir=shared_dir) as directory:
+        df_profit = tables['df_profit'][['Route', 'Carrier', 'Net_Profit', 'Actual_Delivery_Days']]
+        profit, profit_bounds = _partitioned(df_profit, df_profit['Route'].astype(str), directory, 'profit')
+
+        analysis = stock_analysis(tables['inventory'], tables['orders'])
+        stock_df = analysis[['Product_Category', 'Location', 'Current_Stock_Units', 'Reorder_Level']]
+        stock, stock_bounds = _partitioned(stock_df, stock_df['Product_Category'], directory, 'stock')
+
+        route_df = parse_route_data(tables['routes'])
+        origin, dest = route_df['Origin'].astype(str), route_df['Destination'].astype(str)
+        pairs = route_df.assign(City_A=origin.where(origin <= dest, dest), City_B=dest.where(origin <= dest, origin))
+        routes, route_bounds = _partitioned(pairs, pd.MultiIndex.from_frame(pairs[['City_A', 'City_B']]),
+                                            directory, 'routes')
+        vehicles = SharedFrame(tables['vehicles'], directory, 'vehicles')
+
+        def run(submit):
+            simulations = [submit(_simulate_block, profit, start, stop, block)
+                           for block, (start, stop) in enumerate(profit_bounds)]
+            transfers = [submit(_transfer_block, stock, start, stop) for start, stop in stock_bounds]
+            searches = [submit(_search_block, routes, vehicles, start, stop) for start, stop in route_bounds]
+            return ([result() for result in simulations], [result() for result in transfers],
+                    [result() for result in searches])
+
+        if workers == 1:
+            simulations, transfers, searches = run(lambda func, *args: (lambda: func(*args)))
+        else:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(workers, mp_context=context) as pool:
+                simulations, transfers, searches = run(lambda func, *args: pool.submit(func, *args).result)
+
+    simulation = _merge_simulations(simulations)
+    transfers = [plan for plan in transfers if len(plan)]
+    plan = pd.concat(transfers, ignore_index=True) if transfers else pd.DataFrame(columns=TRANSFER_COLUMNS)
+    return {
+        'switch_simulation': (dataset_version(tables['df_profit']),
+                              (savings_table(simulation).set_index(['Route', 'Switch_Percent']),
+                               portfolio_savings(simulation).set_index('Switch_Percent'))),
+        'transfer_plan': ((dataset_version(tables['inventory']), dataset_version(tables['orders'])), plan),
+        'route_searches': ((dataset_version(tables['routes']), dataset_version(tables['vehicles'])),
+                           {key: search for part in searches for key, search in part.items()}),
+    }
+
+
+# --- ARTIFACT ---
+
+def artifact_path(cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, ARTIFACT_FILE)
+
+
+def write_artifact(sections, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = artifact_path(cache_dir)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        pickle.dump(sections, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_artifact(cache_dir=CACHE_DIR):
+    """The artifact's sections, or {} when none has been built (or it can't be read)"""
+    try:
+        with open(artifact_path(cache_dir), 'rb') as fh:
+            return pickle.load(fh)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return {}
+
+
+def lookup(sections, section, versions):
+    """A section's precomputed result if it was built from ``versions``, else None"""
+    entry = sections.get(section)
+    if entry is None or not versions or entry[0] != versions:
+        return None
+    return entry[1]
+
+
+def build_artifact(workers=None, cache_dir=None):
+    """Load the datasets, precompute every section and write the artifact; returns its path"""
+    with span('precompute.load'):
+        tables = load_tables(['df_profit', 'inventory', 'orders', 'routes', 'vehicles'], cache_dir=cache_dir)
+    with span('precompute.run'):
+        sections = precompute(tables, workers)
+    return write_artifact(sections, cache_dir or CACHE_DIR)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the dashboard's per-route, per-category and "
+                                                 "per-city-pair results into one cached artifact.")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    started = time.perf_counter()
+    path = build_artifact(args.workers)
+    sizes = {name: len(value) for name, (_, value) in read_artifact().items() if name != 'switch_simulation'}
+    print(f"{path}: {sizes.get('transfer_plan', 0)} transfers, {sizes.get('route_searches', 0)} city pairs "
+          f"({time.perf_counter() - started:.2f}s)")
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import CUBE_MEASURES
+from utils.columnar_cache import CACHE_DIR, ColumnarCache
+
+# Optional SQL backend for the page filters and aggregations. With
+# SHIPLYTICS_QUERY_BACKEND=duckdb (and duckdb installed), the profit slice
+# queries and the warehouse demand counts run in DuckDB over the Parquet
+# copies in the columnar cache: filters are pushed into a parallel, vectorized
+# scan of the file and only the small result frame is materialized. A table
+# is queried only while its Parquet copy is the version the page loaded;
+# otherwise (or without duckdb or pyarrow) the pages use the pandas path, the
+# profit cube and groupby, which returns the same frames.
+BACKEND_ENV = 'SHIPLYTICS_QUERY_BACKEND'
+
+# Columns the profit queries may filter on
+PROFIT_FILTER_KEYS = ('Route', 'Carrier', 'Product_Category', 'Priority')
+
+
+def duckdb_available():
+    try:
+        import duckdb  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def backend_name():
+    """'duckdb' when selected with SHIPLYTICS_QUERY_BACKEND and installed, else 'pandas'"""
+    if os.environ.get(BACKEND_ENV, 'pandas').lower() == 'duckdb' and duckdb_available():
+        return 'duckdb'
+    return 'pandas'
+
+
+def _where(filters):
+    """SQL WHERE clause and parameters for key=value or key=[values] filters"""
+    clauses, params = [], []
+    for key, value in filters.items():
+        if key not in PROFIT_FILTER_KEYS:
+            raise ValueError(f"can't filter on {key!r}")
+        values = list(value) if isinstance(value, (list, tuple, np.ndarray, pd.Index)) else [value]
+        if not values:
+            clauses.append('FALSE')
+            continue
+        clauses.append(f'"{key}" IN ({", ".join("?" * len(values))})')
+        params += [str(v) for v in values]
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+class SQLQueries:
+    """DuckDB views over the cached Parquet copies of the given table versions.
+
+    ``versions`` maps table names to the dataset_version of the frames the
+    page loaded; tables whose cached copy is another version are not
+    registered (see ``covers``). Queries open their own cursor, so one
+    instance can be shared by every session.
+    """
+
+    def __init__(self, versions, cache_dir=CACHE_DIR):
+        import duckdb
+        self.con = duckdb.connect()
+        cache = ColumnarCache(cache_dir)
+        self.files = {}
+        for name, version in versions.items():
+            path = cache._table_path(name)
+            if not (cache.enabled and version and cache.key_of(name) == version and os.path.exists(path)):
+                continue
+            quoted = path.replace("'", "''")
+            self.con.execute(f"CREATE VIEW \"{name}\" AS SELECT * FROM read_parquet('{quoted}')")
+            self.files[name] = (path, os.stat(path).st_mtime_ns)
+
+    def covers(self, names):
+        """True if every table in ``names`` is registered and its file hasn't been replaced since"""
+        for name in names:
+            if name not in self.files:
+                return False
+            path, mtime = self.files[name]
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except FileNotFoundError:
+                return False
+        return True
+
+    def _query(self, sql, params=()):
+        return self.con.cursor().execute(sql, list(params)).df()
+
+    def profit_totals(self, **filters):
+        """Like ProfitCube.totals: measure sums over the df_profit rows matching ``filters``"""
+        where, params = _where(filters)
+        row = self._query(f"""
+            SELECT COUNT(*) AS Orders,
+                   SUM(CAST(Net_Profit AS DOUBLE)) AS Net_Profit_Sum,
+                   SUM(CAST(Order_Value_INR AS DOUBLE)) AS Order_Value_Sum,
+                   SUM(CAST(Margin_Percent AS DOUBLE)) AS Margin_Sum,
+                   SUM(CAST(Actual_Delivery_Days AS DOUBLE)) AS Delivery_Days_Sum,
+                   COUNT(*) FILTER (WHERE Net_Profit < 0) AS Loss_Orders
+            FROM df_profit{where}""", params)
+        return row.iloc[0][CUBE_MEASURES].astype(float).fillna(0.0)
+
+    def carrier_stats(self, **filters):
+        """Like carrier_stats_for_slice: per-carrier means over the df_profit rows matching ``filters``"""
+        where, params = _where(filters)
+        stats = self._query(f"""
+            SELECT CAST(Carrier AS VARCHAR) AS Carrier,
+                   SUM(CAST(Net_Profit AS DOUBLE)) / COUNT(*) AS Net_Profit,
+                   SUM(CAST(Actual_Delivery_Days AS DOUBLE)) / COUNT(*) AS Actual_Delivery_Days,
+                   COUNT(*) AS Order_ID
+            FROM df_profit{where}
+            GROUP BY 1 ORDER BY 1""", params)
+        return stats.astype({'Carrier': str, 'Order_ID': np.int64})
+
+    def demand_counts(self):
+        """Orders per Origin and Product_Category, as stock_analysis counts them"""
+        return self._query("""
+            SELECT CAST(Origin AS VARCHAR) AS Origin, CAST(Product_Category AS VARCHAR) AS Product_Category,
+                   COUNT(*) AS Demand_Count
+            FROM orders
+            WHERE Origin IS NOT NULL AND Product_Category IS NOT NULL
+            GROUP BY 1, 2""").astype({'Demand_Count': np.int64})
@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+
+# Bounded least-recently-used cache for results that are cheap to keep but
+# wasteful to recompute on every rerun, such as the route search for a city
+# pair. One instance is shared by every session, so access is locked. Each
+# entry is stored under the dataset version it was computed from; the first
+# lookup for a new version drops every entry of the old ones.
+
+
+class LRUCache:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync_version(self, version):
+        if version != self.version:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+            self.version = version
+
+    def get_or_compute(self, key, version, compute):
+        """Cached value for ``key`` under ``version``, computing and storing it on a miss.
+
+        ``compute`` runs outside the lock, so two sessions missing the same key
+        at once may both compute it; the later result is kept.
+        """
+        with self._lock:
+            self._sync_version(version)
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            # A newer version may have arrived while computing; don't store stale results
+            if version == self.version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.evictions += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Entry count and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }